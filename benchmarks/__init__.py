@@ -0,0 +1 @@
+# Benchmarks for RFToolkit modules, run from the repo root with python -m benchmarks.<name>
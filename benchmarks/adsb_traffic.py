@@ -0,0 +1,234 @@
+"""
+Synthetic readsb traffic
+
+A population of aircraft flying straight lines around a receiver, each
+sending interleaved even/odd airborne positions, velocities and idents
+the way real DF17 traffic does. Frames are real (encoded ME fields, valid
+CRC), so the same stream can be rendered as readsb verbose blocks or as
+--raw hex lines and every decoder path sees sane data.
+
+Aircraft leave after a random lifetime and are replaced by new ones with
+fresh ICAOs, so the table churns like it does in busy airspace.
+"""
+
+import gzip
+import math
+import random
+
+from modules.protocols.adsb_crc import ModeSCRC
+from modules.protocols.adsb_decode import CALLSIGN_CHARSET
+
+EARTH_NM_PER_DEG = 60.0
+CPR_SCALE = 131072  # 2^17
+
+
+def cpr_nl(lat):
+    # number of longitude zones, straight from the spec formula
+    lat = abs(lat)
+    if lat >= 87.0:
+        return 1 if lat > 87.0 else 2
+    if lat < 1e-9:
+        return 59
+    a = 1 - math.cos(math.pi / 30)
+    b = math.cos(math.pi / 180 * lat) ** 2
+    return int(math.floor(2 * math.pi / math.acos(1 - a / b)))
+
+
+def cpr_encode(lat, lon, odd):
+    # airborne CPR encode, returns (yz, xz) 17 bit
+    i = 1 if odd else 0
+    dlat = 360.0 / (60 - i)
+    yz = int(math.floor(CPR_SCALE * ((lat % dlat) / dlat) + 0.5))
+    rlat = dlat * (yz / CPR_SCALE + math.floor(lat / dlat))
+    dlon = 360.0 / max(cpr_nl(rlat) - i, 1)
+    xz = int(math.floor(CPR_SCALE * ((lon % dlon) / dlon) + 0.5))
+    return yz % CPR_SCALE, xz % CPR_SCALE
+
+
+def encode_ac12(alt):
+    # 25 ft Q=1 altitude code
+    n = max(0, int(round((alt + 1000) / 25.0)))
+    return ((n >> 4) << 5) | 0x10 | (n & 0xf)
+
+
+class SimAircraft:
+    __slots__ = ('icao', 'callsign', 'lat', 'lon', 'alt', 'heading', 'speed', 'v_rate',
+                 'updated', 'expires', 'next_odd')
+
+    def __init__(self, rng, icao, center, radius_nm, now):
+        self.icao = icao
+        self.callsign = rng.choice(('KLM', 'BAW', 'DLH', 'AFR', 'EZY', 'RYR', 'UAL', 'SWR')) + str(rng.randint(10, 9999))
+        bearing = rng.uniform(0, 2 * math.pi)
+        dist = radius_nm * math.sqrt(rng.random())
+        self.lat = center[0] + dist * math.cos(bearing) / EARTH_NM_PER_DEG
+        self.lon = center[1] + dist * math.sin(bearing) / (EARTH_NM_PER_DEG * math.cos(math.radians(center[0])))
+        self.alt = rng.choice((rng.randint(1000, 10000), rng.randint(20000, 41000)))
+        self.heading = rng.uniform(0, 360)
+        self.speed = rng.uniform(140, 490)
+        self.v_rate = rng.choice((0, 0, 0, rng.randint(-30, 30) * 64))
+        self.updated = now
+        self.expires = now + rng.uniform(300, 3600)
+        self.next_odd = rng.random() < 0.5
+
+    def advance(self, now):
+        dt = now - self.updated
+        if dt <= 0:
+            return
+        self.updated = now
+        dist = self.speed * dt / 3600.0
+        hdg = math.radians(self.heading)
+        self.lat += dist * math.cos(hdg) / EARTH_NM_PER_DEG
+        self.lon += dist * math.sin(hdg) / (EARTH_NM_PER_DEG * math.cos(math.radians(self.lat)))
+        self.alt = min(45000, max(0, self.alt + self.v_rate * dt / 60.0))
+
+
+class SyntheticTraffic:
+    """
+    Generator of DF17 frames for a simulated airspace.
+
+    aircraft: how many are in the air at any time
+    rate:     messages per second over the whole airspace
+    Message mix per aircraft is roughly what a real transponder sends:
+    positions (alternating even/odd) ~45%, velocity ~40%, ident ~15%.
+    """
+
+    MIX = (('position', 0.45), ('velocity', 0.40), ('ident', 0.15))
+
+    def __init__(self, aircraft=200, rate=1000.0, center=(52.3, 4.76), radius_nm=200.0,
+                 seed=1, start_time=1000.0, stats_every=10.0):
+        self.rng = random.Random(seed)
+        self.rate = float(rate)
+        self.center = center
+        self.radius_nm = radius_nm
+        self.start_time = start_time
+        self.stats_every = stats_every
+        self.crc = ModeSCRC()
+        self._icao_seq = self.rng.randrange(self.ICAO_SPAN)
+        self.aircraft = [self._new_aircraft(start_time) for _ in range(aircraft)]
+        self._kinds = [k for k, _ in self.MIX]
+        self._weights = [w for _, w in self.MIX]
+
+    # fresh ICAOs without remembering the used ones: a stride coprime to the span walks
+    # the whole 0x100000-0xefffff range before repeating, so soak runs stay flat too
+    ICAO_BASE = 0x100000
+    ICAO_SPAN = 0xe00000
+    ICAO_STRIDE = 0x9e3779
+
+    def _new_aircraft(self, now):
+        self._icao_seq += 1
+        icao = self.ICAO_BASE + (self._icao_seq * self.ICAO_STRIDE) % self.ICAO_SPAN
+        return SimAircraft(self.rng, icao, self.center, self.radius_nm, now)
+
+    # ---------------- frame encoding ---------------- #
+
+    def _frame(self, icao, me):
+        body = bytes([0x8d]) + icao.to_bytes(3, 'big') + me.to_bytes(7, 'big')
+        return body + self.crc.crc(body).to_bytes(3, 'big')
+
+    def _ident_me(self, ac):
+        me = 4 << 51
+        name = ac.callsign.ljust(8)[:8]
+        for k, ch in enumerate(name):
+            me |= CALLSIGN_CHARSET.index(ch) << (42 - 6 * k)
+        return me
+
+    def _position_me(self, ac, odd):
+        yz, xz = cpr_encode(ac.lat, ac.lon, odd)
+        return (11 << 51) | (encode_ac12(ac.alt) << 36) | (int(odd) << 34) | (yz << 17) | xz
+
+    def _velocity_me(self, ac):
+        hdg = math.radians(ac.heading)
+        vx = int(round(ac.speed * math.sin(hdg)))
+        vy = int(round(ac.speed * math.cos(hdg)))
+        vr = abs(ac.v_rate) // 64
+        me = (19 << 51) | (1 << 48)
+        me |= (int(vx < 0) << 42) | (min(abs(vx) + 1, 1023) << 32)
+        me |= (int(vy < 0) << 31) | (min(abs(vy) + 1, 1023) << 21)
+        me |= (int(ac.v_rate < 0) << 19) | (min(vr + 1, 511) << 10)
+        return me
+
+    # ---------------- streams ---------------- #
+
+    def messages(self, count):
+        """
+        Yields (time, kind, frame_bytes, aircraft) for count messages.
+        Time is seconds from start_time, spaced at the configured rate.
+        """
+        rng = self.rng
+        step = 1.0 / self.rate
+        now = self.start_time
+        for _ in range(count):
+            now += step
+            idx = rng.randrange(len(self.aircraft))
+            ac = self.aircraft[idx]
+            if now >= ac.expires:
+                ac = self.aircraft[idx] = self._new_aircraft(now)
+            ac.advance(now)
+
+            kind = rng.choices(self._kinds, self._weights)[0]
+            if kind == 'position':
+                odd = ac.next_odd
+                ac.next_odd = not odd
+                me = self._position_me(ac, odd)
+                kind = 'odd' if odd else 'even'
+            elif kind == 'velocity':
+                me = self._velocity_me(ac)
+            else:
+                me = self._ident_me(ac)
+            yield now, kind, self._frame(ac.icao, me), ac
+
+    def verbose_lines(self, count):
+        # readsb verbose stdout for count messages, including periodic stats blocks
+        next_stats = self.start_time + self.stats_every
+        for now, kind, frame, ac in self.messages(count):
+            if now >= next_stats:
+                next_stats += self.stats_every
+                yield "Statistics: Thu Jan  1 00:00:00 2026 UTC - Thu Jan  1 00:00:10 2026 UTC"
+                yield f"  {self.rng.randint(0, 50)} accepted with 1-bit error repaired"
+                yield f"  {self.rng.randint(0, 9)} CPR attempts that failed the range check"
+                yield f"  {self.rng.randint(0, 9)} CPR attempts that failed the speed check"
+                yield ""
+
+            hexstr = frame.hex()
+            me_hex = frame[4:11].hex().upper()
+            yield f"*{hexstr};"
+            yield "CRC: 000000"
+            yield f"RSSI: {-self.rng.uniform(3, 35):.1f} dBFS"
+            yield f"Time: {(now - self.start_time) * 1e6:.2f}us"
+            yield f"hex: {hexstr[2:8]}"
+            yield f"DF:17 AA:{hexstr[2:8].upper()} CA:5 ME:{me_hex}"
+            if kind in ('even', 'odd'):
+                yield "  Extended Squitter Airborne position (barometric altitude) (11)"
+                yield f"  Baro altitude: {int(round((ac.alt + 1000) / 25.0)) * 25 - 1000:,} ft"
+                yield "  CPR type:      Airborne"
+                yield f"  CPR odd flag:  {kind}"
+                yield f"  CPR latitude:  ({(int.from_bytes(frame[4:11], 'big') >> 17) & 0x1ffff})"
+                yield f"  CPR longitude: ({int.from_bytes(frame[4:11], 'big') & 0x1ffff})"
+            elif kind == 'velocity':
+                yield "  Extended Squitter Airborne velocity over ground, subsonic (19/1)"
+                yield f"  Groundspeed:   {ac.speed:.1f} kt"
+                yield f"  Track/Heading  {ac.heading:.1f}"
+                yield f"  Baro rate:     {int(ac.v_rate)} ft/min"
+            else:
+                yield "  Extended Squitter Aircraft identification and category (4)"
+                yield f"  Ident:         {ac.callsign} "
+                yield "  Category:      A0"
+            yield ""
+
+    def raw_lines(self, count, mlat=True):
+        # readsb --raw output, optionally with the 12 MHz mlat timestamp prefix
+        for now, _kind, frame, _ac in self.messages(count):
+            if mlat:
+                ticks = int((now - self.start_time) * 12000000) & 0xffffffffffff
+                yield '@%012x%s;' % (ticks, frame.hex())
+            else:
+                yield f"*{frame.hex()};"
+
+
+def write_log(path, lines):
+    # save generated lines (plain or .gz) so they can go through the replay tool
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'wt') as f:
+        for line in lines:
+            f.write(line)
+            f.write('\n')
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+ADS-B ingestion + parsing benchmark on synthetic traffic
+
+Generates readsb output for a simulated airspace (see adsb_traffic.py)
+and pushes it through the parser, reporting messages/sec, CPR position
+decodes/sec, peak RSS and where the time goes per stage. The table runs
+on the generated timestamps, so CPR pairing and the 60 s expiry see
+realistic timing however fast the benchmark runs.
+
+Stages:
+  staged   single thread, every stage of the parser timed on its own
+  pipeline the real thing: readsb stand-in (cat) -> pipe readers -> queue
+           -> parser thread, end to end
+
+Usage:
+    python -m benchmarks.bench_adsb_pipeline [--aircraft 500] [--rate 2000]
+        [--messages 200000] [--mode text|raw|both] [--workers N] [--save traffic.log.gz]
+
+--workers N also runs the pipeline with parsing sharded over N worker
+processes (parse_workers), to see how it scales with cores. Wall time only
+improves with cores to spare, so it also prints the CPU split between the
+main process and the workers and the speedup that allows with N + 1 cores.
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from queue import Queue
+
+from modules.protocols.adsb import ADSB
+from modules.protocols.adsb_replay import VirtualClock
+
+from .adsb_traffic import SyntheticTraffic, write_log
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+
+def cpu_seconds():
+    # user + system time of (this process, its finished children), the parser workers are children
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime, children.ru_utime + children.ru_stime
+
+
+class TimedADSB(ADSB):
+    # the real parser with a stopwatch around each stage, times are inclusive of nested stages
+
+    STAGES = ('classify', 'block_parse', 'apply_fields', 'cpr', 'raw_batch')
+
+    def __init__(self):
+        super().__init__()
+        self.stage_time = dict.fromkeys(self.STAGES, 0.0)
+        self.stage_calls = dict.fromkeys(self.STAGES, 0)
+
+    def _timed(self, stage, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.stage_time[stage] += time.perf_counter() - start
+            self.stage_calls[stage] += 1
+
+    def _classify_line(self, line):
+        return self._timed('classify', super()._classify_line, line)
+
+    def _parse_complete_message_block(self):
+        return self._timed('block_parse', super()._parse_complete_message_block)
+
+    def _apply_block_fields(self, found, aircraft):
+        return self._timed('apply_fields', super()._apply_block_fields, found, aircraft)
+
+    def _apply_decoded_fields(self, icao, fields, ts):
+        return self._timed('apply_fields', super()._apply_decoded_fields, icao, fields, ts)
+
+    def _store_cpr_frame(self, *args):
+        return self._timed('cpr', super()._store_cpr_frame, *args)
+
+    def _process_raw_batch(self, batch):
+        return self._timed('raw_batch', super()._process_raw_batch, batch)
+
+    def exclusive_times(self, total):
+        # turn the nested stopwatches into self time per stage, plus what's left over
+        t = self.stage_time
+        out = {}
+        if self.stage_calls['classify']:
+            out['classify'] = t['classify']
+        out['cpr'] = t['cpr']
+        out['table_update'] = t['apply_fields'] - t['cpr']
+        if t['raw_batch']:
+            out['hex_decode'] = t['raw_batch'] - t['apply_fields']
+        else:
+            out['field_extract'] = t['block_parse'] - t['apply_fields']
+        out['assembly_other'] = total - sum(out.values())
+        return out
+
+
+def run_staged(lines, mode, start_time, batch_size=256):
+    # single threaded pass, same entry points the parser thread uses
+    adsb = TimedADSB()
+    clock = VirtualClock(start_time)
+    adsb.clock = clock
+    adsb.last_cleanup = start_time
+
+    start = time.perf_counter()
+    if mode == 'raw':
+        batch = []
+        for line in lines:
+            # mlat timestamp drives the clock, the parser gets the plain *...; line
+            clock.now = start_time + int(line[1:13], 16) / 12000000.0
+            batch.append('*' + line[13:])
+            if len(batch) >= batch_size:
+                adsb._process_raw_batch(batch)
+                batch = []
+        if batch:
+            adsb._process_raw_batch(batch)
+    else:
+        for line in lines:
+            if line.startswith('Time:'):
+                clock.now = start_time + float(line[6:-2]) / 1e6
+            adsb._process_output_line(line)
+        adsb._parse_complete_message_block()
+    total = time.perf_counter() - start
+    return adsb, total
+
+
+def run_pipeline(path, mode, queue_batches=256, workers=0):
+    # end to end with the live reader/parser threads, cat standing in for readsb
+    adsb = ADSB()
+    adsb.config['ingest_mode'] = mode
+    adsb.config['parse_workers'] = workers
+    adsb._reset_tracking_state()
+    adsb.monitoring = True
+    adsb.raw_output_queue = Queue(maxsize=queue_batches)
+    adsb.dropped_lines = 0
+
+    start = time.perf_counter()
+    adsb.adsb_process = subprocess.Popen(['cat', path], stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+    adsb._enqueue_output()
+    parser = threading.Thread(target=adsb._process_data, args=(adsb.raw_output_queue, mode == 'raw'), daemon=True)
+    parser.start()
+
+    for thread in adsb.reader_threads:
+        thread.join()
+    adsb.raw_output_queue.put(None)
+    parser.join()
+    total = time.perf_counter() - start
+
+    adsb.adsb_process.wait()
+    adsb.adsb_process = None
+    adsb.monitoring = False
+    return adsb, total
+
+
+def pool_startup_cpu(mode, workers):
+    # CPU a worker pool costs with nothing to parse (spawn, imports, shutdown), a fixed
+    # cost that a benchmark run has to pay but a receiver running for hours doesn't notice
+    with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False) as f:
+        path = f.name
+    try:
+        before = cpu_seconds()
+        run_pipeline(path, mode, workers=workers)
+        return cpu_seconds()[1] - before[1]
+    finally:
+        os.unlink(path)
+
+
+def report_staged(mode, messages, adsb, total):
+    print(f"\n[{mode}] staged, single thread")
+    print(f"  messages/sec:       {messages / total:>12,.0f}")
+    print(f"  CPR decodes/sec:    {adsb.position_updates / total:>12,.0f}  ({adsb.position_updates} positions)")
+    print(f"  aircraft in table:  {len(adsb.aircraft_data):>12}")
+    print(f"  peak RSS:           {peak_rss_mb():>12.1f} MB")
+    print("  per stage (self time, includes ~0.5 us stopwatch overhead per call):")
+    for stage, seconds in adsb.exclusive_times(total).items():
+        print(f"    {stage:<16} {seconds:>8.3f} s  {seconds / total * 100:>5.1f}%  {seconds / messages * 1e6:>7.2f} us/msg")
+
+
+def report_pipeline(mode, messages, adsb, total, workers=0):
+    stage = f"{workers} parser processes" if workers else "parser"
+    print(f"\n[{mode}] pipeline (pipe -> readers -> queue -> {stage})")
+    print(f"  messages/sec:       {messages / total:>12,.0f}")
+    print(f"  CPR decodes/sec:    {adsb.position_updates / total:>12,.0f}")
+    print(f"  lines dropped:      {adsb.dropped_lines:>12}")
+    print(f"  peak RSS:           {peak_rss_mb():>12.1f} MB")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ADS-B parser benchmark on synthetic readsb traffic")
+    ap.add_argument('--aircraft', type=int, default=500, help="aircraft in the air at once")
+    ap.add_argument('--rate', type=float, default=2000.0, help="messages/sec over the whole airspace (sets the virtual clock)")
+    ap.add_argument('--messages', type=int, default=200000, help="messages to generate")
+    ap.add_argument('--mode', default='both', choices=('text', 'raw', 'both'))
+    ap.add_argument('--seed', type=int, default=1)
+    ap.add_argument('--workers', type=int, nargs='*', default=[],
+                    help="also run the pipeline with parsing sharded over this many processes (several ok)")
+    ap.add_argument('--save', help="also write the generated log here (.gz ok), replayable with adsb_replay")
+    args = ap.parse_args(argv)
+
+    modes = ('text', 'raw') if args.mode == 'both' else (args.mode,)
+    print(f"{args.aircraft} aircraft, {args.rate:,.0f} msg/s, {args.messages:,} messages "
+          f"({args.messages / args.rate:,.0f} s of traffic)")
+    print(f"peak RSS before generating: {peak_rss_mb():.1f} MB")
+
+    for mode in modes:
+        traffic = SyntheticTraffic(args.aircraft, args.rate, seed=args.seed)
+        gen_start = time.perf_counter()
+        if mode == 'text':
+            lines = list(traffic.verbose_lines(args.messages))
+        else:
+            lines = list(traffic.raw_lines(args.messages))
+        print(f"\n[{mode}] generated {len(lines):,} lines in {time.perf_counter() - gen_start:.1f} s")
+
+        if args.save:
+            root, ext = (args.save[:-3], '.gz') if args.save.endswith('.gz') else os.path.splitext(args.save)
+            write_log(f"{root}.{mode}{ext}" if len(modes) > 1 else args.save, lines)
+
+        adsb, total = run_staged(lines, mode, traffic.start_time)
+        report_staged(mode, args.messages, adsb, total)
+
+        # the pipe path sees what readsb would print, raw mode without the mlat prefix
+        with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False) as f:
+            for line in lines:
+                f.write(('*' + line[13:]) if mode == 'raw' else line)
+                f.write('\n')
+            tmp_path = f.name
+        try:
+            del lines
+            before = cpu_seconds()
+            adsb, total = run_pipeline(tmp_path, mode)
+            baseline_cpu = cpu_seconds()[0] - before[0]
+            report_pipeline(mode, args.messages, adsb, total)
+            baseline = total
+            for workers in args.workers:
+                startup = pool_startup_cpu(mode, workers)
+                before = cpu_seconds()
+                adsb, total = run_pipeline(tmp_path, mode, workers=workers)
+                after = cpu_seconds()
+                main_cpu, worker_cpu = after[0] - before[0], max(after[1] - before[1] - startup, 0.0)
+                report_pipeline(mode, args.messages, adsb, total, workers)
+                print(f"  speedup vs in-process: {baseline / total:>11.2f}x  ({len(adsb.aircraft_data)} aircraft in table)")
+                # wall time only scales with spare cores; the CPU split says how far it can go:
+                # the main process (reading, routing, applying results) is the part that doesn't
+                print(f"  CPU per message:    {main_cpu / args.messages * 1e6:>9.2f} us here + "
+                      f"{worker_cpu / args.messages * 1e6:.2f} us in workers (in-process "
+                      f"{baseline_cpu / args.messages * 1e6:.2f} us, pool startup {startup:.2f} s not included)")
+                print(f"  ceiling with {workers + 1} cores: {baseline_cpu / max(main_cpu, worker_cpu / workers, 1e-9):>7.2f}x "
+                      f"({os.cpu_count()} here)")
+        finally:
+            os.unlink(tmp_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+readsb text parser micro-benchmark
+
+Runs a recorded readsb verbose log (e.g. captured with
+`readsb --device-type hackrf ... | tee readsb.log`) through the old
+per-field regex parser and the current single-pass extractor, and
+reports blocks/sec for both.
+
+Usage:
+    python -m benchmarks.bench_adsb_text_parser readsb.log [--repeat 5]
+"""
+
+import argparse
+import gzip
+import re
+import sys
+import time
+
+from modules.protocols.adsb import ADSB
+
+
+class LegacyTextParser(ADSB):
+    # the parser as it was before the single-pass extractor, kept only as a baseline
+
+    def _classify_line(self, line):
+        non_critical_errors = [
+            'cpr attempts that failed the range check',
+            'cpr attempts that failed the speed check',
+            'cpr messages that look like transponder failures filtered',
+            'accepted with 1-bit error repaired'
+        ]
+        is_critical_error = any(err in line.lower() for err in ['fail', 'fatal', 'error', 'cannot open', 'device not found'])
+        if is_critical_error and not any(non_crit in line.lower() for non_crit in non_critical_errors):
+            return 'error'
+        return 'frame' if line.startswith('*') else 'text'
+
+    def _parse_complete_message_block(self):
+        if not self.current_message_block:
+            return
+
+        block_text = '\n'.join(self.current_message_block)
+
+        icao_match = re.search(r'hex:\s*[~]?([0-9a-fA-F]{6})', block_text)
+        if icao_match:
+            self.current_icao = icao_match.group(1).upper()
+        elif 'DF:' in block_text:
+            match_df = re.search(r'AA:([0-9a-fA-F]{6})', block_text)
+            if match_df:
+                self.current_icao = match_df.group(1).upper()
+
+        if self.current_icao:
+            aircraft = self._get_aircraft_defaults(self.current_icao)
+            self._parse_message_block_fields(block_text, aircraft)
+
+    def _parse_message_block_fields(self, block_text, aircraft):
+        callsign_match = re.search(r'Ident:\s*([A-Z0-9]{2,8})\s', block_text)
+        if callsign_match:
+            callsign = callsign_match.group(1).strip()
+            if callsign and len(callsign) >= 2 and callsign != 'unknown':
+                aircraft.callsign = callsign
+
+        for pattern in [r'(?:Baro|Geom) altitude:\s*([0-9,]+)\s*ft', r'Altitude:\s*([0-9,]+)\s*ft']:
+            alt_match = re.search(pattern, block_text)
+            if alt_match:
+                aircraft.altitude = int(alt_match.group(1).replace(',', ''))
+                break
+
+        for pattern in [r'Groundspeed:\s*([0-9.]+)\s*kt', r'True Airspeed:\s*([0-9.]+)\s*kt', r'IAS:\s*([0-9.]+)\s*kt']:
+            speed_match = re.search(pattern, block_text)
+            if speed_match:
+                aircraft.speed = float(speed_match.group(1))
+                aircraft.speed_type = 'tas' if 'True Airspeed' in pattern else 'gs'
+                break
+
+        heading_match = re.search(r'(?:Track/Heading|True Track|Heading|Mag heading)\s+([0-9.]+)', block_text)
+        if heading_match:
+            aircraft.heading = float(heading_match.group(1))
+
+        vrate_match = re.search(r'(?:Vertical Rate|Baro rate|Airborne rate|Surface rate):\s*([+-]?[0-9.]+)\s*ft/min', block_text)
+        if vrate_match:
+            aircraft.v_rate = int(float(vrate_match.group(1)))
+
+        self._parse_position_data_from_block(block_text, aircraft)
+
+    def _parse_position_data_from_block(self, block_text, aircraft):
+        icao = aircraft.hex
+        cpr_type_match = re.search(r'CPR type:\s*(Airborne|Surface)', block_text)
+        cpr_type = cpr_type_match.group(1) if cpr_type_match else None
+
+        if not cpr_type:
+            pos_match = re.search(r'Latitude:\s*([+-]?\d+\.?\d*)\s+Longitude:\s*([+-]?\d+\.?\d*)', block_text)
+            if pos_match:
+                self._set_position(icao, aircraft, float(pos_match.group(1)), float(pos_match.group(2)), time.time())
+            return
+
+        odd_match = re.search(r'CPR odd flag:\s*odd', block_text)
+        even_match = re.search(r'CPR odd flag:\s*even', block_text)
+        lat_match = re.search(r'CPR latitude:\s*\(([0-9]+)\)', block_text)
+        lon_match = re.search(r'CPR longitude:\s*\(([0-9]+)\)', block_text)
+
+        if (odd_match or even_match) and lat_match and lon_match:
+            self._store_cpr_frame(icao, aircraft, cpr_type, bool(odd_match),
+                                  int(lat_match.group(1)), int(lon_match.group(1)), time.time())
+
+        pos_match = re.search(r'Latitude:\s*([+-]?\d+\.?\d*)\s+Longitude:\s*([+-]?\d+\.?\d*)', block_text)
+        if pos_match:
+            self._set_position(icao, aircraft, float(pos_match.group(1)), float(pos_match.group(2)), time.time())
+
+
+def load_lines(path):
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rt', errors='replace') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def run_parser(parser, lines):
+    # same per-line work _process_data does, minus the queue
+    parser._reset_tracking_state()
+    start = time.perf_counter()
+    for line in lines:
+        parser._classify_line(line)
+        parser._process_message_line(line)
+    parser._parse_complete_message_block()
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="readsb text parser micro-benchmark")
+    ap.add_argument('log', help="recorded readsb stdout (plain or .gz)")
+    ap.add_argument('--repeat', type=int, default=5, help="runs per parser, best one counts")
+    args = ap.parse_args(argv)
+
+    lines = load_lines(args.log)
+    blocks = sum(1 for line in lines if line.startswith('*'))
+    if not blocks:
+        print("No message blocks (*...; lines) found in the log.")
+        return 1
+
+    print(f"{len(lines)} lines, {blocks} message blocks")
+    results = {}
+    for name, parser in (('before (per-field regex)', LegacyTextParser()), ('after (single pass)', ADSB())):
+        best = min(run_parser(parser, lines) for _ in range(args.repeat))
+        results[name] = blocks / best
+        print(f"{name:<26} {results[name]:>12,.0f} blocks/sec  ({len(parser.aircraft_data)} aircraft)")
+
+    before, after = results.values()
+    print(f"speedup: {after / before:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+ADS-B long-run memory soak
+
+Feeds simulated days of synthetic traffic (aircraft arriving, flying,
+leaving, new ICAOs all the time) through the parser on a virtual clock
+and checks that memory stays flat: after a warm-up period the traced
+Python heap may not grow by more than --tolerance-mb, and no per-aircraft
+state (CPR cache) may outlive its aircraft. Debug mode is on so the raw
+line ring is exercised as well.
+
+Exits non-zero if an assertion fails, so it can run unattended.
+
+Usage:
+    python -m benchmarks.soak_adsb_memory [--days 1] [--aircraft 200] [--rate 20]
+        [--mode raw|text] [--tolerance-mb 2]
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+
+from modules.protocols.adsb import ADSB
+from modules.protocols.adsb_replay import VirtualClock
+
+from .adsb_traffic import SyntheticTraffic
+
+
+def current_rss_mb():
+    # resident set right now (not the peak), Linux only
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return float('nan')
+
+
+def check_invariants(adsb):
+    # nothing per aircraft may stick around once the aircraft is gone
+    stale = set(adsb.cpr_data) - set(adsb.aircraft_data)
+    assert not stale, f"CPR state left behind for {len(stale)} expired aircraft"
+    assert len(adsb.raw_output_buffer) <= adsb.RAW_BUFFER_LINES, "raw line ring over its limit"
+    assert len(adsb.current_message_block) <= 21, "message block not bounded"
+
+
+def soak(days, aircraft, rate, mode, sample_every=3600.0, batch_size=256, seed=1):
+    # generator of (sim_hours, stats dict) samples, one per simulated sample_every seconds
+    adsb = ADSB()
+    adsb.debug_mode = True
+    traffic = SyntheticTraffic(aircraft, rate, seed=seed)
+    clock = VirtualClock(traffic.start_time)
+    adsb.clock = clock
+    adsb.last_cleanup = clock.now
+
+    total = int(days * 86400 * rate)
+    next_sample = traffic.start_time + sample_every
+    batch = []
+
+    if mode == 'raw':
+        lines = traffic.raw_lines(total)
+    else:
+        lines = traffic.verbose_lines(total)
+
+    for line in lines:
+        if mode == 'raw':
+            clock.now = traffic.start_time + int(line[1:13], 16) / 12000000.0
+            batch.append('*' + line[13:])
+            if len(batch) < batch_size:
+                continue
+            adsb._process_raw_batch(batch)
+            batch = []
+        else:
+            if line.startswith('Time:'):
+                clock.now = traffic.start_time + float(line[6:-2]) / 1e6
+            adsb._process_output_line(line)
+
+        if clock.now >= next_sample:
+            next_sample += sample_every
+            gc.collect()
+            check_invariants(adsb)
+            yield (clock.now - traffic.start_time) / 3600.0, {
+                'aircraft': len(adsb.aircraft_data),
+                'cpr_entries': len(adsb.cpr_data),
+                'raw_ring': len(adsb.raw_output_buffer),
+                'created': adsb.aircraft_created,
+                'traced_mb': tracemalloc.get_traced_memory()[0] / (1024.0 * 1024.0),
+                'rss_mb': current_rss_mb(),
+            }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ADS-B parser memory soak on synthetic traffic")
+    ap.add_argument('--days', type=float, default=1.0, help="simulated days of traffic")
+    ap.add_argument('--aircraft', type=int, default=200, help="aircraft in the air at once")
+    ap.add_argument('--rate', type=float, default=20.0, help="messages/sec over the whole airspace")
+    ap.add_argument('--mode', default='raw', choices=('raw', 'text'))
+    ap.add_argument('--warmup-hours', type=float, default=2.0, help="growth before this doesn't count")
+    ap.add_argument('--tolerance-mb', type=float, default=2.0, help="allowed heap growth after warm-up")
+    args = ap.parse_args(argv)
+
+    tracemalloc.start()
+    started = time.time()
+    baseline = None
+    worst = 0.0
+    print(f"{'sim h':>6} {'aircraft':>9} {'cpr':>6} {'ring':>5} {'created':>9} {'heap MB':>8} {'RSS MB':>7}")
+    try:
+        for hours, st in soak(args.days, args.aircraft, args.rate, args.mode):
+            print(f"{hours:>6.1f} {st['aircraft']:>9} {st['cpr_entries']:>6} {st['raw_ring']:>5} "
+                  f"{st['created']:>9} {st['traced_mb']:>8.2f} {st['rss_mb']:>7.1f}")
+            if hours < args.warmup_hours:
+                continue
+            if baseline is None:
+                baseline = st['traced_mb']
+            worst = max(worst, st['traced_mb'] - baseline)
+    except AssertionError as e:
+        print(f"FAIL: {e}")
+        return 1
+
+    print(f"\n{args.days:g} simulated days in {time.time() - started:.0f} s")
+    if baseline is None:
+        print("Run shorter than the warm-up, nothing to compare.")
+        return 1
+    print(f"heap growth after warm-up: {worst:.2f} MB (limit {args.tolerance_mb:.2f} MB)")
+    if worst > args.tolerance_mb:
+        print("FAIL: memory keeps growing")
+        return 1
+    print("OK: memory flat")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,19 +6,36 @@ import datetime
 import shutil
 import signal
 import atexit
+import codecs
 import json
 import re
 import math # god fucking damn it, i need math for CPR calculations *AUGH dies of cringe.mp3*
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from itertools import islice
 from pathlib import Path
-from queue import Queue, Empty
+from queue import Queue, Full
+
+from .adsb_state import Aircraft, ChangeTracker
+from .adsb_stats import PipelineStats, format_seconds
 
 class ADSB:
     # CPR constants and other magic numbers
     NZ = 15.0 
     CPR_MAX_VALUE = 131072.0 # its 2^17
+    # aircraft-relative local decoding: how old the last fix may be, and how fast
+    # (kt) a target can plausibly move between fixes, plus slack for CPR rounding (NM)
+    CPR_REF_MAX_AGE = 60.0
+    CPR_MAX_SPEED_AIRBORNE = 1000.0
+    CPR_MAX_SPEED_SURFACE = 100.0
+    CPR_JUMP_SLACK_NM = 2.0
+    # tracks with nothing new for this long are dropped
+    AIRCRAFT_TIMEOUT = 60.0
+    # debug view ring, the last this many raw lines
+    RAW_BUFFER_LINES = 200
     
     # CPR Latitude Zone Table (yoinked from mayhem))
-    # will leave this here for now, MAY not be needed, but im not sure after all this mindfuckery
+    # latitudes where NL drops by one, starting at 59 -> 58. _cpr_NL bisects this
     ADSB_LAT_LUT = [
         10.47047130, 14.82817437, 18.18626357, 21.02939493,
         23.54504487, 25.82924707, 27.93898710, 29.91135686,
@@ -37,6 +54,40 @@ class ADSB:
         86.53536998, 87.00000000
     ]
 
+    # every field we pull out of a readsb verbose block. readsb prints one field per
+    # line, so this is anchored and run once per line (match, not search): a block is
+    # walked exactly once and each line costs a single attempt. first hit of each
+    # field wins, same as the old one-re.search-per-field code did
+    BLOCK_FIELD_RE = re.compile(
+        r'hex:\s*~?(?P<hex>[0-9a-fA-F]{6})'
+        r'|DF:.*?AA:(?P<aa>[0-9a-fA-F]{6})'
+        r'|Ident:\s*(?P<ident>[A-Z0-9]{2,8})(?:\s|$)'
+        r'|(?:Baro|Geom) altitude:\s*(?P<alt>[0-9,]+)\s*ft'
+        r'|Altitude:\s*(?P<alt_plain>[0-9,]+)\s*ft'
+        r'|Groundspeed:\s*(?P<gs>[0-9.]+)\s*kt'
+        r'|True Airspeed:\s*(?P<tas>[0-9.]+)\s*kt'
+        r'|IAS:\s*(?P<ias>[0-9.]+)\s*kt'
+        r'|(?:Track/Heading|True Track|Heading|Mag heading)\s+(?P<heading>[0-9.]+)'
+        r'|(?:Vertical Rate|Baro rate|Airborne rate|Surface rate):\s*(?P<vrate>[+-]?[0-9.]+)\s*ft/min'
+        r'|CPR type:\s*(?P<cpr_type>Airborne|Surface)'
+        r'|CPR odd flag:\s*(?P<cpr_flag>odd|even)'
+        r'|CPR latitude:.*?\((?P<cpr_lat>[0-9]+)\)'
+        r'|CPR longitude:.*?\((?P<cpr_lon>[0-9]+)\)'
+        r'|Latitude:\s*(?P<lat>[+-]?\d+\.?\d*)(?:\s+Longitude:\s*(?P<lat_lon>[+-]?\d+\.?\d*))?'
+        r'|Longitude:\s*(?P<lon>[+-]?\d+\.?\d*)'
+        r'|Squawk:\s*(?P<squawk>[0-7]{4})'
+    )
+
+    # line classifier, run on the lowercased line (IGNORECASE would cost sre its fast
+    # literal scan). known-harmless readsb stats lines are listed first so they win
+    # over the error words they contain
+    LINE_CLASS_RE = re.compile(
+        r'(?P<stats>cpr (?:attempts that failed the (?:range|speed) check'
+        r'|messages that look like transponder failures filtered)'
+        r'|accepted with 1-bit error repaired)'
+        r'|(?P<error>fa(?:il|tal)|error|cannot open|device not found)'
+    )
+
     def __init__(self):
         # setup base dir for logs and config
         self.base_dir = Path.home() / ".rf_toolkit" / "protocols"
@@ -50,18 +101,70 @@ class ADSB:
         # proc management and blah blah
         self.adsb_process = None
         self.monitoring = False
-        self.aircraft_data = {}
+        # icao -> Aircraft, kept in update order (oldest first): expiry pops from the
+        # front, the display reads from the back
+        self.aircraft_data = OrderedDict()
+        self.aircraft_lock = threading.Lock()
         self.current_icao = None
         self.current_message_block = []
+        # where "now" comes from for the table, replay swaps in a virtual clock
+        self.clock = time.time
         #track time for cleanup
-        self.last_cleanup = time.time()
+        self.last_cleanup = self.clock()
         self.debug_mode = False
-        self.raw_output_queue = Queue() 
-        self.raw_output_buffer = []
+        # batches (lists) of output lines from the pipe readers to the parser
+        self.raw_output_queue = Queue(maxsize=256)
+        self.dropped_lines = 0
+        self.raw_output_buffer = deque(maxlen=self.RAW_BUFFER_LINES)
         self.has_received_data = False
+        self.reader_threads = []
+        self.net_reader = None
+        self._crc = None
+        # merge mode: one reader and (optionally) one readsb per receiver
+        self.merger = None
+        self.merge_readers = []
+        self.merge_processes = []
+        # consumers that want to know what changed (output server, renderer)
+        self.change_trackers = []
+        self.output_server = None
+        # position history on disk, see adsb_history.TrackStore
+        self.track_store = None
+        # polar coverage / density maps, see adsb_coverage.CoverageRecorder
+        self.coverage = None
+        # the table mirrored into shared memory, see adsb_shm.SharedAircraftTable
+        self.shared_table = None
+        # parse_workers > 0: worker processes doing the parsing, see adsb_shard.ShardedParser
+        self.sharded_parser = None
+        # ICAO / callsign / squawk alerts, see adsb_watch.Watcher
+        self.watcher = None
+        # registration / type / operator by ICAO, see adsb_db.AircraftDB
+        self.aircraft_db = None
+        # periodic save of the tracking state for warm restarts, see adsb_checkpoint.Checkpointer
+        self.checkpointer = None
         
         # CPR data for position decoding
         self.cpr_data = {}
+        self.position_updates = 0
+        self.aircraft_created = 0
+
+        # per stage counters / latency, see stats_snapshot()
+        self.stats = PipelineStats()
+        self.stats.gauge('queue_depth', lambda: self.raw_output_queue.qsize())
+        self.stats.gauge('queue_capacity', lambda: self.raw_output_queue.maxsize)
+        self.stats.gauge('dropped_lines', lambda: self.dropped_lines)
+        self.stats.gauge('net_errors', lambda: sum(reader.errors for reader in self._net_readers()))
+        self.stats.gauge('aircraft', lambda: len(self.aircraft_data))
+        self.stats.gauge('aircraft_created', lambda: self.aircraft_created)
+        self.stats.gauge('cpr_entries', lambda: len(self.cpr_data))
+        self.stats.gauge('position_updates', lambda: self.position_updates)
+        self.stats.gauge('history', lambda: self.track_store.stats() if self.track_store else None)
+        self.stats.gauge('coverage', lambda: self.coverage.stats() if self.coverage else None)
+        self.stats.gauge('shared_table', lambda: self.shared_table.stats() if self.shared_table else None)
+        self.stats.gauge('shards', lambda: self.sharded_parser.stats() if self.sharded_parser else None)
+        self.stats.gauge('watch', lambda: self.watcher.stats() if self.watcher else None)
+        self.stats.gauge('aircraft_db', lambda: self.aircraft_db.stats() if self.aircraft_db else None)
+        self.stats.gauge('checkpoint', lambda: self.checkpointer.stats() if self.checkpointer else None)
+        self.stats_logger = None
         
         #ensure cleanup runs on exit
         atexit.register(self._exit_cleanup)
@@ -77,7 +180,83 @@ class ADSB:
             "max_display_aircraft": 30,
             # Local decoding option (needs GPS coords in config)
             # Default to False to prevent bad data if location isn't set
-            "local_decoding": False
+            "local_decoding": False,
+            # how we get data out of readsb: "text" (verbose stdout), "raw" (--raw, hex
+            # frames only, decoded here), or one of its network outputs "beast", "sbs",
+            # "json" read from a local socket. "merge" reads several Beast feeds (see receivers)
+            "ingest_mode": "text",
+            "net_host": "127.0.0.1",
+            "net_beast_port": 30005,
+            "net_sbs_port": 30003,
+            "net_json_port": 30047,
+            # False = attach to a readsb that is already running (e.g. a system service)
+            "net_spawn_readsb": True,
+            # max line batches waiting for the parser before readers start dropping
+            "ingest_queue_batches": 256,
+            # CRC check raw/Beast/IQ frames ourselves, and repair up to this many bit errors
+            "crc_check": True,
+            "crc_fix_bits": 1,
+            # merge mode feeds: {"name", "port", "host"} to attach to a running readsb,
+            # add "device" (HackRF serial) to have us start a readsb for it on that port
+            "receivers": [],
+            # same frame from another receiver within this many seconds is a duplicate
+            "merge_window": 1.0,
+            # localhost output for dashboards/loggers: SBS, JSON delta stream and HTTP
+            "output_server": False,
+            "output_host": "127.0.0.1",
+            "output_sbs_port": 30103,
+            "output_json_port": 30154,
+            "output_http_port": 8090,
+            "output_interval": 0.5,
+            # a client with more than this many bytes unsent gets disconnected
+            "output_client_buffer": 1048576,
+            # append a pipeline stats snapshot (JSON line) every N seconds, 0 = off
+            "stats_log_every": 0,
+            "stats_log_path": "",
+            # record positions to an SQLite track history (blank path = next to the config),
+            # at most one sample per aircraft every history_interval seconds
+            "history_enabled": False,
+            "history_path": "",
+            "history_interval": 5,
+            "history_retention_hours": 48,
+            "history_max_mb": 1024,
+            # coverage (max range per bearing/altitude band) and density maps around lat/lon,
+            # saved as .npz + PNGs to coverage_path (blank = next to the config)
+            "coverage_enabled": False,
+            "coverage_path": "",
+            "coverage_save_every": 60,
+            "coverage_radius_km": 500,
+            "coverage_cell_km": 2,
+            # publish the table in shared memory for other local processes (adsb_shm.SharedAircraftReader)
+            "shm_enabled": False,
+            "shm_name": "rf_toolkit_adsb",
+            "shm_capacity": 4096,
+            "shm_interval": 0.25,
+            # text/raw ingest: parse in this many worker processes, sharded by ICAO (0 = in this process)
+            "parse_workers": 0,
+            # seconds between view_aircraft refreshes
+            "display_refresh": 1.0,
+            # alert on the ICAOs / callsign patterns / squawks in watch_path (blank = next to
+            # the config), at most once per aircraft and entry every watch_window seconds.
+            # alerts go to watch_log_path (blank = next to the config), to watch_socket
+            # ("host:port" UDP or a unix datagram socket path) and watch_command, if set
+            "watch_enabled": False,
+            "watch_path": "",
+            "watch_window": 300,
+            "watch_log_path": "",
+            "watch_socket": "",
+            "watch_command": "",
+            # registration / type / operator from a local CSV (OpenSky or tar1090-db style),
+            # compiled into a memory-mapped index at aircraft_db_path (blank = next to the
+            # config), rebuilt whenever the CSV is newer
+            "aircraft_db_enabled": False,
+            "aircraft_db_csv": "",
+            "aircraft_db_path": "",
+            "aircraft_db_cache": 4096,
+            # save aircraft + CPR reference fixes every N seconds (and on stop) to checkpoint_path
+            # (blank = next to the config) and restore them on start, 0 = off
+            "checkpoint_every": 30,
+            "checkpoint_path": ""
         }
 
     def _save_config(self):
@@ -121,9 +300,11 @@ class ADSB:
                 print("4. Install readsb")
                 print("5. Configure HackRF/Display Settings")
                 print("6. Toggle Debug Mode")
-                print("7. Back to Protocols Menu")
+                print("7. Native IQ Decoder (no readsb)")
+                print("8. Replay Captured readsb Log")
+                print("9. Back to Protocols Menu")
                 
-                choice = input("\nEnter choice (1-7): ").strip()
+                choice = input("\nEnter choice (1-9): ").strip()
                 
                 if choice == '1':
                     self.start_adsb_monitoring()
@@ -140,6 +321,10 @@ class ADSB:
                     print(f"Debug Mode set to {'ON' if self.debug_mode else 'OFF'}.")
                     input("Press Enter to continue...")
                 elif choice == '7':
+                    self.native_decoder_menu()
+                elif choice == '8':
+                    self.replay_menu()
+                elif choice == '9':
                     self.stop_adsb()
                     return
                 else:
@@ -227,14 +412,106 @@ class ADSB:
             # added local decoding switch(needs user's lat and lon numbers)
             local_status = "Enabled" if self.config.get('local_decoding') else "Disabled"
             print(f"6. Local Decoding:          {local_status}")
-            print("7. Save & Back to Main Menu")
+            print(f"7. Ingest Mode:             {self.config['ingest_mode']}")
+            spawn_status = "Start readsb" if self.config.get('net_spawn_readsb') else "Attach to running readsb"
+            print(f"8. Network Source:          {spawn_status} ({self.config['net_host']})")
+            print(f"9. Merge Receivers:         {len(self.config.get('receivers', []))} configured")
+            output_status = "Enabled" if self.config.get('output_server') else "Disabled"
+            print(f"10. Output Server:          {output_status} (SBS {self.config['output_sbs_port']}, "
+                  f"JSON {self.config['output_json_port']}, HTTP {self.config['output_http_port']})")
+            history_status = "Enabled" if self.config.get('history_enabled') else "Disabled"
+            print(f"11. Track History:          {history_status} (every {self.config['history_interval']} s, "
+                  f"max {self.config['history_max_mb']} MB)")
+            coverage_status = "Enabled" if self.config.get('coverage_enabled') else "Disabled"
+            print(f"12. Coverage Maps:          {coverage_status} ({self.config['coverage_radius_km']} km, "
+                  f"{self.config['coverage_cell_km']} km cells)")
+            shm_status = "Enabled" if self.config.get('shm_enabled') else "Disabled"
+            print(f"13. Shared Memory Table:    {shm_status} ({self.config['shm_name']})")
+            workers = self.config.get('parse_workers', 0)
+            print(f"14. Parser Workers:         {workers or 'Off (parse in this process)'}")
+            print(f"15. Display Refresh (s):    {self.config['display_refresh']}")
+            watch_status = "Enabled" if self.config.get('watch_enabled') else "Disabled"
+            print(f"16. Watchlist Alerts:       {watch_status} (repeat after {self.config['watch_window']} s)")
+            db_status = "Enabled" if self.config.get('aircraft_db_enabled') else "Disabled"
+            print(f"17. Aircraft Database:      {db_status} ({self.config.get('aircraft_db_csv') or 'no CSV set'})")
+            checkpoint_every = self.config.get('checkpoint_every', 30)
+            print(f"18. Warm Restart Checkpoint: {f'every {checkpoint_every} s' if checkpoint_every else 'Off'}")
+            print("19. Save & Back to Main Menu")
             print("----------------------------------------")
             
-            choice = input("\nEnter choice to change (1-7): ").strip()
+            choice = input("\nEnter choice to change (1-19): ").strip()
 
-            if choice == '7':
+            if choice == '19':
                 self._save_config()
                 break
+
+            if choice == '17':
+                self.config['aircraft_db_enabled'] = not self.config.get('aircraft_db_enabled', False)
+                print(f"\nAircraft database is now {'Enabled' if self.config['aircraft_db_enabled'] else 'Disabled'} (applies on next start).")
+                if self.config['aircraft_db_enabled']:
+                    source = input(f"Aircraft CSV (blank keeps {self.config.get('aircraft_db_csv') or 'none'}): ").strip()
+                    if source:
+                        self.config['aircraft_db_csv'] = source
+                    if not Path(self.config.get('aircraft_db_csv') or self._aircraft_db_path()).exists():
+                        print("That file doesn't exist yet, set a CSV (e.g. OpenSky's aircraftDatabase.csv).")
+                input("Press Enter to continue...")
+                continue
+
+            if choice == '16':
+                self.config['watch_enabled'] = not self.config.get('watch_enabled', False)
+                print(f"\nWatchlist alerts are now {'Enabled' if self.config['watch_enabled'] else 'Disabled'} (applies on next start).")
+                if self.config['watch_enabled']:
+                    path = self.config.get('watch_path') or str(self.config_path.parent / 'adsb_watchlist.txt')
+                    print(f"Entries are read from {path}, one '<icao|callsign|squawk> <pattern> [label]' per line.")
+                input("Press Enter to continue...")
+                continue
+
+            if choice == '13':
+                self.config['shm_enabled'] = not self.config.get('shm_enabled', False)
+                print(f"\nShared memory table is now {'Enabled' if self.config['shm_enabled'] else 'Disabled'} (applies on next start).")
+                input("Press Enter to continue...")
+                continue
+
+            if choice == '12':
+                self.config['coverage_enabled'] = not self.config.get('coverage_enabled', False)
+                print(f"\nCoverage maps are now {'Enabled' if self.config['coverage_enabled'] else 'Disabled'} (applies on next start).")
+                if self.config['coverage_enabled'] and not (self.config['lat'] or self.config['lon']):
+                    print("Set the receiver latitude/longitude first, ranges are measured from there.")
+                input("Press Enter to continue...")
+                continue
+
+            if choice == '11':
+                self.config['history_enabled'] = not self.config.get('history_enabled', False)
+                print(f"\nTrack history is now {'Enabled' if self.config['history_enabled'] else 'Disabled'} (applies on next start).")
+                input("Press Enter to continue...")
+                continue
+
+            if choice == '10':
+                self.config['output_server'] = not self.config.get('output_server', False)
+                print(f"\nOutput server is now {'Enabled' if self.config['output_server'] else 'Disabled'} (applies on next start).")
+                input("Press Enter to continue...")
+                continue
+
+            if choice == '9':
+                self._configure_receivers()
+                continue
+
+            if choice == '7':
+                # cycle through ingest modes
+                modes = ['text', 'raw', 'beast', 'sbs', 'json', 'merge']
+                current = self.config.get('ingest_mode', 'text')
+                self.config['ingest_mode'] = modes[(modes.index(current) + 1) % len(modes)] if current in modes else 'text'
+                print(f"\nIngest mode is now {self.config['ingest_mode']}.")
+                input("Press Enter to continue...")
+                continue
+
+            if choice == '8':
+                self.config['net_spawn_readsb'] = not self.config.get('net_spawn_readsb', True)
+                host = input(f"Enter readsb host (blank keeps {self.config['net_host']}): ").strip()
+                if host:
+                    self.config['net_host'] = host
+                input("Press Enter to continue...")
+                continue
             
             if choice == '6':
                 #the toggle for local decoding itself
@@ -249,6 +526,9 @@ class ADSB:
                 '3': ('lat', float, "Enter Receiver Latitude (e.g., 34.05): "),
                 '4': ('lon', float, "Enter Receiver Longitude (e.g., -118.24): "),
                 '5': ('max_display_aircraft', int, "Enter Max Aircraft Rows to Display (e.g., 30): "),
+                '14': ('parse_workers', int, f"Enter parser worker processes (0 = off, this box has {os.cpu_count()} cores): "),
+                '15': ('display_refresh', float, "Enter seconds between aircraft view refreshes (e.g., 0.5): "),
+                '18': ('checkpoint_every', int, "Enter seconds between tracking state checkpoints (0 = off): "),
             }
             
             if choice in setting_map:
@@ -269,8 +549,66 @@ class ADSB:
 
             input("Press Enter to continue...")
 
+    def _configure_receivers(self):
+        # add/remove the feeds used by merge mode
+        receivers = self.config.setdefault('receivers', [])
+        while True:
+            os.system('clear')
+            print("========================================")
+            print("        MERGE MODE RECEIVERS")
+            print("========================================")
+            if not receivers:
+                print("No receivers configured.")
+            for idx, rx in enumerate(receivers, 1):
+                source = f"HackRF {rx['device']}" if rx.get('device') else rx.get('host', '127.0.0.1')
+                print(f"{idx}. {rx['name']:<12} {source}:{rx['port']}")
+            print("----------------------------------------")
+            print("a. Add receiver   d. Delete receiver   b. Back")
+
+            choice = input("\nEnter choice: ").strip().lower()
+            if choice == 'b':
+                return
+            if choice == 'a':
+                try:
+                    name = input("Name (e.g., roof): ").strip() or f"rx{len(receivers) + 1}"
+                    port = int(input("Beast port (e.g., 30005): ").strip())
+                    device = input("HackRF serial to start readsb on (blank = attach to running readsb): ").strip()
+                    rx = {'name': name, 'port': port}
+                    if device:
+                        rx['device'] = device
+                    else:
+                        rx['host'] = input("Host (blank = 127.0.0.1): ").strip() or '127.0.0.1'
+                    receivers.append(rx)
+                except ValueError:
+                    print("\nInvalid port.")
+                    input("Press Enter to continue...")
+            elif choice == 'd':
+                try:
+                    receivers.pop(int(input("Receiver number to delete: ").strip()) - 1)
+                except (ValueError, IndexError):
+                    print("\nNo such receiver.")
+                    input("Press Enter to continue...")
+
     def start_adsb_monitoring(self):
         # start readsb process and blah blah
+        ingest_mode = self.config.get('ingest_mode', 'text')
+        net_mode = ingest_mode in ('beast', 'sbs', 'json')
+
+        if ingest_mode == 'merge':
+            self._start_merge_ingest()
+            input("Press Enter to continue...")
+            return
+        if net_mode and not self.config.get('net_spawn_readsb', True):
+            # attach only, someone else runs readsb
+            self.stop_adsb()
+            self._reset_tracking_state()
+            self.monitoring = True
+            self._start_aux_services()
+            self._start_net_ingest(ingest_mode)
+            print(f"Attached to readsb {ingest_mode} output at {self.config['net_host']}.")
+            input("Press Enter to continue...")
+            return
+
         if not self.is_readsb_available():
             print("readsb not found! Please install it first using option 4.")
             input("Press Enter to continue...")
@@ -296,32 +634,37 @@ class ADSB:
                 '--lon', str(self.config['lon']),
                 '--stats-every', str(self.config['stats_every']),
             ]
+            if ingest_mode == 'raw':
+                # only the *...; hex lines, we decode them ourselves
+                cmd += ['--raw']
+            elif net_mode:
+                # structured output on a local socket instead of verbose text
+                cmd += ['--quiet', '--net'] + self._net_output_args(ingest_mode)
             
             print(f"Running command: {' '.join(cmd)}")
             
             #reset state variables
             self.monitoring = True
-            self.aircraft_data = {}
-            self.raw_output_buffer = []
-            self.has_received_data = False
-            self.current_icao = None
-            self.current_message_block = []
-            self.cpr_data = {}
+            self._reset_tracking_state()
+            self._start_aux_services()
             
-            #start readsb subprocess
+            #start readsb subprocess, raw unbuffered pipes, we do our own chunking
             self.adsb_process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
+                bufsize=0,
                 preexec_fn=os.setsid # Create new process group
             )
             
             #threads for output processing, separate since forever cause its easier that way and it broke when i tr
-            threading.Thread(target=self._enqueue_output, daemon=True).start()
-            threading.Thread(target=self._process_data, daemon=True).start()
+            # fresh queue per run so a parser thread from a previous run can't steal batches
+            self.raw_output_queue = Queue(maxsize=self.config.get('ingest_queue_batches', 256))
+            self.dropped_lines = 0
+            self._enqueue_output()
+            threading.Thread(target=self._process_data, args=(self.raw_output_queue, ingest_mode == 'raw'), daemon=True).start()
+            if net_mode:
+                self._start_net_ingest(ingest_mode)
             
             print("ADS-B monitoring process initiated. Data will be available shortly.")
             time.sleep(2)
@@ -331,7 +674,7 @@ class ADSB:
             #stderr output if available
             if self.adsb_process and self.adsb_process.stderr:
                 try:
-                    err_output = self.adsb_process.stderr.read().strip()
+                    err_output = self.adsb_process.stderr.read().decode(errors='replace').strip()
                     if err_output:
                         print("\n--- readsb stderr output ---")
                         print(err_output)
@@ -343,77 +686,584 @@ class ADSB:
             
         input("Press Enter to continue...")
 
+    def _reset_tracking_state(self):
+        with self.aircraft_lock:
+            for tracker in self.change_trackers:
+                for icao in self.aircraft_data:
+                    tracker.mark_removed(icao)
+        self.aircraft_data = OrderedDict()
+        self.raw_output_buffer.clear()
+        self.has_received_data = False
+        self.current_icao = None
+        self.current_message_block.clear()
+        self.cpr_data = {}
+        self.position_updates = 0
+        self.aircraft_created = 0
+        self.stats.reset()
+
+    def _net_output_args(self, ingest_mode):
+        # readsb flags that open the listening port for the chosen format
+        if ingest_mode == 'beast':
+            return ['--net-bo-port', str(self.config['net_beast_port'])]
+        if ingest_mode == 'sbs':
+            return ['--net-sbs-port', str(self.config['net_sbs_port'])]
+        return ['--net-json-port', str(self.config['net_json_port'])]
+
+    def _start_net_ingest(self, ingest_mode):
+        from .adsb_net import NetFeedReader
+
+        port = self.config[f'net_{ingest_mode}_port']
+        callback = self._handle_beast_batch if ingest_mode == 'beast' else self._handle_record_batch
+        self.net_reader = NetFeedReader(self.config['net_host'], port, ingest_mode, callback)
+        self.net_reader.start()
+
+    def _start_aux_services(self):
+        # things that hang off a running pipeline, whatever the ingest mode. Called before any
+        # reader or parser thread starts: the checkpoint goes first so everything after it sees
+        # the restored table, and live aircraft land behind the restored ones (last_seen order)
+        self._start_checkpointer()
+        self._start_aircraft_db()
+        self._start_output_server()
+        self._start_stats_logger()
+        self._start_track_store()
+        self._start_coverage()
+        self._start_shared_table()
+        self._start_watcher()
+
+    def _start_checkpointer(self):
+        interval = self.config.get('checkpoint_every', 30)
+        if not interval:
+            return
+        from .adsb_checkpoint import Checkpointer
+
+        path = self.config.get('checkpoint_path') or str(self.config_path.parent / 'adsb_state.ckpt')
+        checkpointer = Checkpointer(self, path, interval)
+        restored = checkpointer.restore()
+        if restored:
+            print(f"Restored {restored} aircraft from {path} "
+                  f"({len(self.cpr_data)} can decode positions from a single frame)")
+        checkpointer.start()
+        self.checkpointer = checkpointer
+
+    def _aircraft_db_path(self):
+        return self.config.get('aircraft_db_path') or str(self.config_path.parent / 'adsb_aircraft.db')
+
+    def _start_aircraft_db(self):
+        if not self.config.get('aircraft_db_enabled'):
+            return
+        from .adsb_db import AircraftDB, build_index
+
+        path = self._aircraft_db_path()
+        source = self.config.get('aircraft_db_csv')
+        try:
+            if source and (not os.path.exists(path) or os.path.getmtime(source) > os.path.getmtime(path)):
+                print(f"Building the aircraft database index from {source}...")
+                build_index(source, path)
+            self.aircraft_db = AircraftDB(path, cache_size=self.config.get('aircraft_db_cache', 4096))
+        except (OSError, ValueError) as e:
+            print(f"Aircraft database not loaded: {e}")
+            return
+        print(f"Aircraft database: {len(self.aircraft_db)} aircraft from {path}")
+
+    def _start_watcher(self):
+        if not self.config.get('watch_enabled'):
+            return
+        from .adsb_watch import Watcher, Watchlist
+
+        path = self.config.get('watch_path') or str(self.config_path.parent / 'adsb_watchlist.txt')
+        try:
+            watchlist = Watchlist.load(path)
+        except (OSError, ValueError) as e:
+            print(f"Watchlist not loaded: {e}")
+            return
+        watcher = Watcher(
+            self, watchlist,
+            window=self.config.get('watch_window', 300),
+            log_path=self.config.get('watch_log_path') or str(self.config_path.parent / 'adsb_alerts.log'),
+            socket_addr=self.config.get('watch_socket') or None,
+            command=self.config.get('watch_command') or None,
+        )
+        watcher.start()
+        self.watcher = watcher
+        print(f"Watching for {len(watchlist)} watchlist entries from {path}")
+
+    def _start_shared_table(self):
+        if not self.config.get('shm_enabled'):
+            return
+        from .adsb_shm import SharedAircraftTable
+
+        tracker = self.add_change_tracker()
+        table = SharedAircraftTable(
+            self, tracker,
+            name=self.config.get('shm_name', 'rf_toolkit_adsb'),
+            capacity=self.config.get('shm_capacity', 4096),
+            interval=self.config.get('shm_interval', 0.25),
+        )
+        try:
+            table.start()
+        except OSError as e:
+            print(f"Shared memory table not started: {e}")
+            self.remove_change_tracker(tracker)
+            return
+        self.shared_table = table
+        print(f"Publishing the aircraft table to shared memory '{table.name}'")
+
+    def _start_coverage(self):
+        if not self.config.get('coverage_enabled'):
+            return
+        if not (self.config['lat'] or self.config['lon']):
+            print("Coverage maps not started: receiver latitude/longitude not set.")
+            return
+        path = self.config.get('coverage_path') or str(self.config_path.parent / 'adsb_coverage.npz')
+        try:
+            from .adsb_coverage import CoverageRecorder
+
+            coverage = CoverageRecorder(
+                self.config['lat'], self.config['lon'],
+                radius_km=self.config.get('coverage_radius_km', 500),
+                cell_km=self.config.get('coverage_cell_km', 2),
+                path=path,
+            )
+        except ImportError as e:
+            print(f"Coverage maps not started: {e}")
+            return
+        coverage.start(self.config.get('coverage_save_every', 60))
+        self.coverage = coverage
+        print(f"Saving coverage maps to {path} every {self.config.get('coverage_save_every', 60)} s")
+
+    def _history_path(self):
+        return self.config.get('history_path') or str(self.config_path.parent / 'adsb_history.sqlite')
+
+    def _start_track_store(self):
+        if not self.config.get('history_enabled'):
+            return
+        from .adsb_history import TrackStore
+
+        path = self._history_path()
+        try:
+            store = TrackStore(
+                path,
+                interval=self.config.get('history_interval', 5),
+                retention_hours=self.config.get('history_retention_hours', 48),
+                max_mb=self.config.get('history_max_mb', 1024),
+            )
+        except Exception as e:
+            print(f"Track history not started: {e}")
+            return
+        store.start()
+        self.track_store = store
+        print(f"Recording track history to {path}")
+
+    def _start_stats_logger(self):
+        interval = self.config.get('stats_log_every', 0)
+        if not interval:
+            return
+        from .adsb_stats import StatsLogger
+
+        path = self.config.get('stats_log_path') or str(self.config_path.parent / 'adsb_stats.jsonl')
+        self.stats_logger = StatsLogger(self.stats, path, interval)
+        self.stats_logger.start()
+        print(f"Logging pipeline stats to {path} every {interval} s")
+
+    def stats_snapshot(self):
+        """
+        Pipeline counters, gauges and latency summaries as a plain dict.
+
+        Counters only ever go up (per monitoring run), so rates are the
+        difference between two snapshots, see PipelineStats.rates().
+        Latencies are in seconds.
+        """
+        return self.stats.snapshot()
+
+    def _start_output_server(self):
+        # fan the table out to local clients, if enabled
+        if not self.config.get('output_server'):
+            return
+        from .adsb_output import AircraftOutputServer
+
+        tracker = self.add_change_tracker()
+        server = AircraftOutputServer(
+            self, tracker,
+            host=self.config.get('output_host', '127.0.0.1'),
+            sbs_port=self.config.get('output_sbs_port', 30103),
+            json_port=self.config.get('output_json_port', 30154),
+            http_port=self.config.get('output_http_port', 8090),
+            interval=self.config.get('output_interval', 0.5),
+            max_buffer=self.config.get('output_client_buffer', 1048576),
+        )
+        try:
+            server.start()
+        except OSError as e:
+            print(f"Output server not started: {e}")
+            self.remove_change_tracker(tracker)
+            return
+        self.output_server = server
+        print(f"Output server on {server.host}: SBS {server.ports['sbs']}, JSON {server.ports['json']}, HTTP {server.ports['http']}")
+
+    def _start_merge_ingest(self):
+        # N Beast feeds -> dedup -> one shared aircraft table
+        from .adsb_merge import MultiReceiverMerger
+        from .adsb_net import NetFeedReader
+
+        receivers = self.config.get('receivers', [])
+        if not receivers:
+            print("No receivers configured for merge mode (Configure -> Merge Receivers).")
+            return
+
+        self.stop_adsb()
+        self._reset_tracking_state()
+        self.merger = MultiReceiverMerger(self._handle_beast_batch, self.config.get('merge_window', 1.0))
+
+        readsb_path = None
+        for rx in receivers:
+            if not rx.get('device'):
+                continue
+            readsb_path = readsb_path or self.get_readsb_path()
+            if not readsb_path:
+                print("readsb not found, can't start local receivers! Install it with option 4.")
+                self.merger = None
+                return
+            cmd = [
+                readsb_path,
+                '--device-type', 'hackrf',
+                '--device', str(rx['device']),
+                '--gain', str(self.config['gain']),
+                '--freq', str(self.config['freq']),
+                '--lat', str(self.config['lat']),
+                '--lon', str(self.config['lon']),
+                '--quiet', '--net',
+                '--net-bo-port', str(rx['port']),
+                # every instance opens its default ports too, keep them from colliding
+                '--net-ri-port', '0', '--net-ro-port', '0', '--net-sbs-port', '0',
+                '--net-bi-port', '0', '--net-json-port', '0',
+            ]
+            print(f"Starting {rx['name']}: {' '.join(cmd)}")
+            self.merge_processes.append(subprocess.Popen(
+                cmd,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                preexec_fn=os.setsid
+            ))
+
+        self.monitoring = True
+        self._start_aux_services()
+        for rx in receivers:
+            callback = self.merger.add_receiver(rx['name'])
+            host = '127.0.0.1' if rx.get('device') else rx.get('host', '127.0.0.1')
+            reader = NetFeedReader(host, rx['port'], 'beast', callback)
+            reader.start()
+            self.merge_readers.append(reader)
+        print(f"Merging {len(receivers)} receivers.")
+
+    def _net_readers(self):
+        # every NetFeedReader running, attach mode has one, merge mode one per receiver
+        return ([self.net_reader] if self.net_reader else []) + list(self.merge_readers)
+
+    def _get_crc(self):
+        # shared CRC engine, None when checking is switched off
+        if not self.config.get('crc_check', True):
+            return None
+        if self._crc is None:
+            from .adsb_crc import ModeSCRC
+            self._crc = ModeSCRC(max_fix_bits=self.config.get('crc_fix_bits', 1))
+        return self._crc
+
+    def _handle_beast_batch(self, batch):
+        # raw frames with readsb's own receive time, decoded straight into the table
+        from .adsb_decode import decode_frame
+
+        self.has_received_data = True
+        start = time.perf_counter()
+        counters = self.stats.counters
+        counters['net_frames'] += len(batch)
+        crc = self._get_crc()
+        for ts, _signal, msg in batch:
+            if self.debug_mode:
+                self.raw_output_buffer.append('*' + msg.hex() + ';')
+            if crc is not None and len(msg) == 14:
+                msg, _ = crc.check(msg)
+                if msg is None:
+                    counters['crc_rejected'] += 1
+                    continue
+            fields = decode_frame(msg)
+            if fields:
+                self._apply_decoded_fields(fields['icao'], fields, ts)
+        self.stats.latency['net_batch'].record(time.perf_counter() - start)
+
+    def _handle_record_batch(self, batch):
+        # already decoded SBS / JSON records
+        self.has_received_data = True
+        self.stats.counters['net_records'] += len(batch)
+        for icao, fields, ts in batch:
+            self._apply_decoded_fields(icao, fields, ts if ts is not None else self.clock())
+
+    def _apply_decoded_fields(self, icao, fields, ts):
+        # structured fields (numbers, no text) into the aircraft table
+        aircraft = self._get_aircraft_defaults(icao)
+
+        if 'callsign' in fields:
+            aircraft.callsign = fields['callsign']
+        if 'altitude' in fields:
+            aircraft.altitude = fields['altitude']
+        if 'speed' in fields:
+            aircraft.speed = fields['speed']
+            aircraft.speed_type = fields.get('speed_type', 'gs')
+        if 'heading' in fields:
+            aircraft.heading = fields['heading']
+        if 'v_rate' in fields:
+            aircraft.v_rate = fields['v_rate']
+        if 'squawk' in fields:
+            aircraft.squawk = fields['squawk']
+
+        if 'cpr_lat' in fields:
+            self._store_cpr_frame(icao, aircraft, fields['cpr_type'], fields['cpr_odd'],
+                                  fields['cpr_lat'], fields['cpr_lon'], ts)
+        elif 'lat' in fields:
+            self._set_position(icao, aircraft, fields['lat'], fields['lon'], ts)
+        self._mark_updated(icao)
+
+        if self.watcher is not None:
+            self.watcher.check(aircraft, aircraft.last_seen)
+
     def _enqueue_output(self):
-        # read through stdout/stderr from subprocess and enqueue for all the juicy stuff(processing)
+        # read through stdout/stderr from subprocess and enqueue for all the juicy stuff(processing).
+        # blocking reads of whatever is in the pipe (up to 64k), split into lines in bulk and
+        # handed over as one batch, so nothing here ever sleeps or polls
+        out_queue = self.raw_output_queue
+        counters = self.stats.counters
+
         def read_pipe(pipe, source):
+            fd = pipe.fileno()
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            pending = ''
+            lines_key, bytes_key = f'{source}_lines', f'{source}_bytes'
             while self.monitoring:
                 try:
-                    line = pipe.readline()
-                    if line:
-                        self.raw_output_queue.put(line)
-                    else:
-                        if self.adsb_process.poll() is not None:
-                            break
-                        time.sleep(0.1)
-                except Exception:
+                    data = os.read(fd, 65536)
+                except OSError:
                     break
+                if not data:
+                    break # EOF, readsb exited
 
-        # separate threads for stdout and stderr reading (same as the previous comment on this)
-        if self.adsb_process and self.adsb_process.stdout:
-            threading.Thread(target=read_pipe, args=(self.adsb_process.stdout, 'stdout'), daemon=True).start()
-        if self.adsb_process and self.adsb_process.stderr:
-            threading.Thread(target=read_pipe, args=(self.adsb_process.stderr, 'stderr'), daemon=True).start()
+                lines = (pending + decoder.decode(data)).split('\n')
+                pending = lines.pop()
+                counters[bytes_key] += len(data)
+                if lines:
+                    counters[lines_key] += len(lines)
+                    self._put_batch(out_queue, lines, source)
 
-    def _process_data(self):
-        # pull data and parse it
+        # separate threads for stdout and stderr reading (same as the previous comment on this)
+        self.reader_threads = []
+        if not self.adsb_process:
+            return
+        for pipe, source in ((self.adsb_process.stdout, 'stdout'), (self.adsb_process.stderr, 'stderr')):
+            if pipe:
+                thread = threading.Thread(target=read_pipe, args=(pipe, source), daemon=True)
+                thread.start()
+                self.reader_threads.append(thread)
+
+    def _put_batch(self, out_queue, lines, source='stdout'):
+        # backpressure: if the parser is behind, hold the reader (and so readsb's pipe) briefly,
+        # after that drop the batch and count it instead of growing without limit.
+        # batches carry their enqueue time so the parser can tell how long they waited
+        item = (time.perf_counter(), lines)
+        try:
+            out_queue.put_nowait(item)
+        except Full:
+            self.stats.counters[f'{source}_blocked'] += 1
+            start = item[0]
+            try:
+                out_queue.put(item, timeout=0.1)
+            except Full:
+                self.dropped_lines += len(lines)
+            self.stats.latency[f'{source}_blocked'].record(time.perf_counter() - start)
+
+    def _process_data(self, in_queue, raw_mode=False):
+        # pull batches and parse them, blocks on the queue until there is work
+        counters = self.stats.counters
+        queue_wait = self.stats.latency['queue_wait']
+        workers = self.config.get('parse_workers', 0)
+        if workers and self.config.get('ingest_mode', 'text') in ('text', 'raw'):
+            if self._process_data_sharded(in_queue, raw_mode, workers):
+                return
+            # the worker pool failed, carry on parsing in here
         while self.monitoring:
+            item = in_queue.get()
+            if item is None:
+                break # stop_adsb woke us up
+            queued_at, batch = item
+            queue_wait.record(time.perf_counter() - queued_at)
+            counters['batches'] += 1
+            counters['lines_parsed'] += len(batch)
+            if raw_mode:
+                self._process_raw_batch(batch)
+                continue
+            for line in batch:
+                try:
+                    self._process_output_line(line)
+                except Exception:
+                    pass
+
+    def _process_data_sharded(self, in_queue, raw_mode, workers):
+        # same loop, but this thread only splits the lines up, worker processes parse them.
+        # False if the workers died and the caller should take over
+        from .adsb_shard import ShardedParser, WorkerDied
+
+        counters = self.stats.counters
+        queue_wait = self.stats.latency['queue_wait']
+        sharded = ShardedParser(self, workers, raw_mode)
+        try:
+            sharded.start()
+        except OSError as e:
+            print(f"\nParser workers not started ({e}), parsing in-process.")
+            return False
+        self.sharded_parser = sharded
+        died = None
+        try:
+            while self.monitoring:
+                item = in_queue.get()
+                if item is None:
+                    break
+                queued_at, batch = item
+                queue_wait.record(time.perf_counter() - queued_at)
+                counters['batches'] += 1
+                counters['lines_parsed'] += len(batch)
+                sharded.feed(batch)
+                if in_queue.empty():
+                    # nothing else waiting, don't sit on a part filled batch
+                    sharded.flush()
+        except WorkerDied as e:
+            died = e
+        finally:
+            sharded.stop()
+            self.sharded_parser = None
+        counters['shard_lines_lost'] += sharded.lines_lost
+        if died is not None:
+            print(f"\n{died}, {sharded.lines_lost} lines it had queued were lost, parsing in-process from here on.")
+            return False
+        return True
+
+    def _apply_shard_update(self, rows, fixes, refs=()):
+        # state rows (Aircraft.__slots__ order), fixes and CPR reference fixes from a parser
+        # worker, see adsb_shard. The refs only come while a checkpointer wants them
+        now = self.clock()
+        if now - self.last_cleanup >= 1.0:
+            self._cleanup_old_aircraft(now)
+
+        table = self.aircraft_data
+        created = []
+        with self.aircraft_lock:
+            for row in rows:
+                icao = row[0]
+                aircraft = table.get(icao)
+                if aircraft is None:
+                    aircraft = table[icao] = Aircraft(icao, row[1])
+                    self.aircraft_created += 1
+                    created.append(aircraft)
+                else:
+                    table.move_to_end(icao)
+                # None means the worker hasn't got it, not that it went away
+                for name, value in zip(Aircraft.__slots__, row):
+                    if value is not None:
+                        setattr(aircraft, name, value)
+                for tracker in self.change_trackers:
+                    tracker.mark(icao)
+                if self.watcher is not None:
+                    self.watcher.check(aircraft, aircraft.last_seen)
+        if self.aircraft_db is not None:
+            for aircraft in created:
+                self.aircraft_db.enrich(aircraft)
+
+        cpr_data = self.cpr_data
+        for icao, ref in refs:
+            entry = cpr_data.get(icao)
+            if entry is None:
+                entry = cpr_data[icao] = {}
+            entry['ref'] = ref
+
+        for icao, ts, lat, lon in fixes:
+            aircraft = table.get(icao)
+            if aircraft is not None:
+                self._position_hooks(aircraft, lat, lon, ts)
+
+    def _process_raw_batch(self, batch):
+        # readsb --raw: hex frames get batch decoded, anything else (errors, stats) goes the usual way
+        from .adsb_decode import decode_hex_frames
+
+        frames = []
+        for line in batch:
+            line = line.strip()
+            if line.startswith('*'):
+                frames.append(line)
+            elif line:
+                try:
+                    self._process_output_line(line)
+                except Exception:
+                    pass
+        if not frames:
+            return
+
+        self.has_received_data = True
+        if self.debug_mode:
+            self.raw_output_buffer.extend(frames)
+
+        start = time.perf_counter()
+        now = self.clock()
+        decoded = decode_hex_frames(frames, self._get_crc())
+        counters = self.stats.counters
+        counters['raw_frames'] += len(frames)
+        counters['raw_decoded'] += len(decoded)
+        self.stats.latency['hex_decode'].record(time.perf_counter() - start)
+        for fields in decoded:
             try:
-                line = self.raw_output_queue.get_nowait()
-                line_str = line.strip()
-                
-                if not line_str:
-                    continue
-                
-                # data reception check
-                if not self.has_received_data and len(line_str) > 5 and line_str.startswith('*'):
-                    self.has_received_data = True
-
-                # output for debug
-                self.raw_output_buffer.append(line_str)
-                if len(self.raw_output_buffer) > 200: 
-                    self.raw_output_buffer = self.raw_output_buffer[-100:]
-
-                # Process complete message blocks for data extraction
-                self._process_message_line(line_str)
-
-                # non critical DOGSHIT THAT WASTED TOO MUCH OF MY FUCKING TIME
-                non_critical_errors = [
-                    'cpr attempts that failed the range check',
-                    'cpr attempts that failed the speed check',
-                    'cpr messages that look like transponder failures filtered',
-                    'accepted with 1-bit error repaired'
-                ]
-                
-                is_critical_error = any(err in line_str.lower() for err in ['fail', 'fatal', 'error', 'cannot open', 'device not found'])
-                
-                if is_critical_error and not any(non_crit in line_str.lower() for non_crit in non_critical_errors):
-                    # print CRITICAL shit into the console
-                    print(f"\nREADSB ERROR: {line_str}")
-                    
-            except Empty:
-                time.sleep(0.1) # wait if queue is as big as diddy's sentence
+                self._apply_decoded_fields(fields['icao'], fields, now)
             except Exception:
                 pass
+        self.stats.latency['raw_batch'].record(time.perf_counter() - start)
+
+    def _process_output_line(self, line):
+        line_str = line.strip()
+        if not line_str:
+            return
+
+        kind = self._classify_line(line_str)
+
+        # data reception check
+        if kind == 'frame' and not self.has_received_data and len(line_str) > 5:
+            self.has_received_data = True
+
+        # output for debug, the ring drops the oldest line itself
+        self.raw_output_buffer.append(line_str)
+
+        # Process complete message blocks for data extraction
+        self._process_message_line(line_str)
+
+        if kind == 'error':
+            # print CRITICAL shit into the console
+            print(f"\nREADSB ERROR: {line_str}")
+
+    def _classify_line(self, line):
+        # one scan: 'frame' (raw *...; line), 'error', 'stats' or 'text' (block body / noise)
+        if line.startswith('*'):
+            return 'frame'
+        match = self.LINE_CLASS_RE.search(line.lower())
+        if match:
+            return match.lastgroup
+        if line[0].isdigit() or line.startswith('Statistics'):
+            return 'stats'
+        return 'text'
 
     def _process_message_line(self, line):
         # complete message blocks for parsing based on start markers
         if line.startswith('*'):
             # Process the previous message block if we have one(we do have one, right?)
             if self.current_message_block:
-                self._parse_complete_message_block()
+                self._finish_block()
             
-            # start of a new message block
-            self.current_message_block = [line]
+            # start of a new message block, same list every time
+            block = self.current_message_block
+            block.clear()
+            block.append(line)
             self.current_icao = None
         #ensure block exists and isnt empty
         elif self.current_message_block:
@@ -422,210 +1272,270 @@ class ADSB:
             
             # if the block is SUS(sorry)piciously long or ends, process it
             if not line.strip() or len(self.current_message_block) > 20:
-                self._parse_complete_message_block()
-                self.current_message_block = []
+                self._finish_block()
+                self.current_message_block.clear()
+
+    def _finish_block(self):
+        # parse the collected block, timed (regex extraction + table update + CPR)
+        start = time.perf_counter()
+        self._parse_complete_message_block()
+        self.stats.latency['block_parse'].record(time.perf_counter() - start)
+        self.stats.counters['blocks_parsed'] += 1
 
     def _parse_complete_message_block(self):
         # Parse a block of readsb output for data, translation: BUTCHER THE SUCKER
         if not self.current_message_block:
             return
             
-        block_text = '\n'.join(self.current_message_block)
-
-        # Reverted ICAO extraction to regex, still will have the DF: stuff for reliability
-        icao = None
-        icao_match = re.search(r'hex:\s*[~]?([0-9a-fA-F]{6})', block_text)
-        if icao_match:
-            icao = icao_match.group(1).upper()
-            self.current_icao = icao
-        elif 'DF:' in block_text:
-            match_df = re.search(r'AA:([0-9a-fA-F]{6})', block_text)
-            if match_df:
-                icao = match_df.group(1).upper()
-                self.current_icao = icao
+        # single pass over the block, one anchored match per line, keep the first hit of every field
+        found = {}
+        match_line = self.BLOCK_FIELD_RE.match
+        for line in self.current_message_block:
+            match = match_line(line)
+            if match is None:
+                continue
+            key = match.lastgroup
+            if key == 'lat_lon':
+                # latitude and longitude on one line
+                if 'lat' not in found:
+                    found['lat'] = match.group('lat')
+                    found['lon'] = match.group('lat_lon')
+            elif key not in found:
+                found[key] = match.group(key)
+
+        # hex: first, still have the DF: AA: stuff for reliability
+        if 'hex' in found:
+            self.current_icao = found['hex'].upper()
+        elif 'aa' in found:
+            self.current_icao = found['aa'].upper()
 
         if self.current_icao:
             aircraft = self._get_aircraft_defaults(self.current_icao)
-            self._parse_message_block_fields(block_text, aircraft)
+            self._apply_block_fields(found, aircraft)
+            if self.watcher is not None:
+                self.watcher.check(aircraft, aircraft.last_seen)
 
-    def _parse_message_block_fields(self, block_text, aircraft):
-        # Extract callsign, altitude, speed, V-rate, heading, lon/lat using regex (holy fuck i wanna kill myself)
-        
-        #callsign
-        callsign_match = re.search(r'Ident:\s*([A-Z0-9]{2,8})\s', block_text)
-        if callsign_match:
-            callsign = callsign_match.group(1).strip()
-            if callsign and len(callsign) >= 2 and callsign != 'unknown':
-                aircraft['callsign'] = callsign
+    def _apply_block_fields(self, found, aircraft):
+        # callsign, altitude, speed, V-rate, heading, lon/lat out of the extracted field map,
+        # converted to numbers once here and never parsed again
+        callsign = found.get('ident')
+        if callsign and callsign != 'unknown':
+            aircraft.callsign = callsign
 
         #altitude (baro or geom, whatever tf works)
-        alt_patterns = [r'(?:Baro|Geom) altitude:\s*([0-9,]+)\s*ft', r'Altitude:\s*([0-9,]+)\s*ft']
-        for pattern in alt_patterns:
-            alt_match = re.search(pattern, block_text)
-            if alt_match:
-                altitude = alt_match.group(1).replace(',', '')
-                if altitude and altitude != 'N/A':
-                    aircraft['altitude'] = altitude
-                    break
+        altitude = found.get('alt') or found.get('alt_plain')
+        if altitude:
+            aircraft.altitude = int(altitude.replace(',', ''))
 
-        # SPEED (groundspeed, TAS or IAS)
-        speed_patterns = [r'Groundspeed:\s*([0-9.]+)\s*kt', r'True Airspeed:\s*([0-9.]+)\s*kt', r'IAS:\s*([0-9.]+)\s*kt']
-        for pattern in speed_patterns:
-            speed_match = re.search(pattern, block_text)
-            if speed_match:
-                speed = speed_match.group(1)
-                if speed and speed != 'N/A':
-                    if 'True Airspeed' in pattern:
-                        aircraft['speed'] = f"{speed} kt (TAS)"
-                    else:
-                        aircraft['speed'] = f"{speed} kt"
+        if 'squawk' in found:
+            aircraft.squawk = found['squawk']
+
+        try:
+            # SPEED (groundspeed, TAS or IAS)
+            for key in ('gs', 'tas', 'ias'):
+                if key in found:
+                    aircraft.speed = float(found[key])
+                    aircraft.speed_type = key
                     break
 
-        # heading/track
-        heading_match = re.search(r'(?:Track/Heading|True Track|Heading|Mag heading)\s+([0-9.]+)', block_text)
-        if heading_match:
-            heading = heading_match.group(1)
-            if heading and heading != 'N/A':
-                aircraft['heading'] = heading
-
-        # V-rate, also called vertical rate, hm, i learned something new today
-        vrate_match = re.search(r'(?:Vertical Rate|Baro rate|Airborne rate|Surface rate):\s*([+-]?[0-9.]+)\s*ft/min', block_text)
-        if vrate_match:
-            v_rate = vrate_match.group(1)
-            if v_rate and v_rate != 'N/A':
-                aircraft['v_rate'] = v_rate
-
-        # parse and store cpr
-        self._parse_position_data_from_block(block_text, aircraft)
-
-    def _parse_position_data_from_block(self, block_text, aircraft):
-        # Store CPR frames and try to decode position
-        icao = aircraft['hex']
-
-        cpr_type_match = re.search(r'CPR type:\s*(Airborne|Surface)', block_text)
-        cpr_type = cpr_type_match.group(1) if cpr_type_match else None
-
-        #check for local decoding toggle from config
-        use_local = self.config.get('local_decoding', False)
-
-        if not cpr_type:
-            pos_match = re.search(r'Latitude:\s*([+-]?\d+\.?\d*)\s+Longitude:\s*([+-]?\d+\.?\d*)', block_text)
-            if pos_match:
-                aircraft['lat'] = pos_match.group(1)
-                aircraft['lon'] = pos_match.group(2)
-            return
-
-        odd_match = re.search(r'CPR odd flag:\s*odd', block_text)
-        even_match = re.search(r'CPR odd flag:\s*even', block_text)
-        lat_match = re.search(r'CPR latitude:\s*\(([0-9]+)\)', block_text)
-        lon_match = re.search(r'CPR longitude:\s*\(([0-9]+)\)', block_text)
-
-        if (odd_match or even_match) and lat_match and lon_match:
-            is_odd = bool(odd_match)
-            lat = int(lat_match.group(1))
-            lon = int(lon_match.group(1))
-
-            if icao not in self.cpr_data:
-                self.cpr_data[icao] = {}
-
-            current_time = time.time()
-            frame_data = {'lat': lat, 'lon': lon, 'time': current_time, 'type': cpr_type}
-
-             #if local decoding is enabled, try to decode immediately with reference position
-            decoded_locally = False
-            # determine format bit 'i': 0 for even, 1 for odd
-            if use_local:
-                i = 1 if is_odd else 0
-                try:
-                    ref_lat = float(self.config.get('lat', 0.0))
-                    ref_lon = float(self.config.get('lon', 0.0))
-
-                    #decode latitude
-                    rec_lat = self._local_decode_lat(ref_lat, lat, i)
-                    # if no lat - cannot proceed
-                    if rec_lat is not None:
-                        # calculate NL using recovered latitude
-                        nl = self._cpr_NL(rec_lat)
-                        # decode longitude
-                        rec_lon = self._local_decode_lon(ref_lon, lon, i, nl)
-                        
-                        if rec_lon is not None:
-                            aircraft['lat'] = f"{rec_lat:.4f}"
-                            aircraft['lon'] = f"{rec_lon:.4f}"
-                            decoded_locally = True
-                except Exception:
-                    pass # fallback to global if local fails
+            # heading/track
+            if 'heading' in found:
+                aircraft.heading = float(found['heading'])
 
-            if is_odd:
-                self.cpr_data[icao]['odd'] = frame_data
-                self.cpr_data[icao]['last_odd'] = current_time
-            else:
-                self.cpr_data[icao]['even'] = frame_data
-                self.cpr_data[icao]['last_even'] = current_time
+            # V-rate, also called vertical rate, hm, i learned something new today
+            if 'vrate' in found:
+                aircraft.v_rate = int(float(found['vrate']))
+        except ValueError:
+            pass # things like "1.2.3" that the regex lets through
+
+        # readsb already decoded the position, that wins. Otherwise store cpr and try to decode,
+        # never both: one block is one fix (and one history sample)
+        position = None
+        if 'lat' in found and 'lon' in found:
+            try:
+                position = float(found['lat']), float(found['lon'])
+            except ValueError:
+                pass
+        cpr_type = found.get('cpr_type')
+        if position is not None:
+            self._set_position(aircraft.hex, aircraft, position[0], position[1], self.clock())
+        elif cpr_type and 'cpr_flag' in found and 'cpr_lat' in found and 'cpr_lon' in found:
+            self._store_cpr_frame(aircraft.hex, aircraft, cpr_type, found['cpr_flag'] == 'odd',
+                                  int(found['cpr_lat']), int(found['cpr_lon']), self.clock())
+        self._mark_updated(aircraft.hex)
+
+    def _store_cpr_frame(self, icao, aircraft, cpr_type, is_odd, lat, lon, current_time):
+        # one CPR frame (timestamped by whoever received it) -> position if we can get one
+        entry = self.cpr_data.get(icao)
+        if entry is None:
+            entry = self.cpr_data[icao] = {}
+
+        # determine format bit 'i': 0 for even, 1 for odd
+        i = 1 if is_odd else 0
+        surface = cpr_type == 'Surface'
+
+        # once we have a good fix, every single frame decodes against it, no pair needed
+        counters = self.stats.counters
+        counters['cpr_frames'] += 1
+        ref = entry.get('ref')
+        if ref and current_time - ref[2] <= self.CPR_REF_MAX_AGE:
+            pos = self._local_decode_position(ref[0], ref[1], lat, lon, i, surface)
+            if pos and self._position_reasonable(ref, pos[0], pos[1], current_time, surface):
+                counters['cpr_local_ok'] += 1
+                self._set_position(icao, aircraft, pos[0], pos[1], current_time)
+                # pair bookkeeping is only for getting the first fix
+                for key in ('odd', 'even', 'last_odd', 'last_even'):
+                    entry.pop(key, None)
+                return
+            counters['cpr_local_fail'] += 1
+
+        #if receiver local decoding is enabled, try to decode immediately with the receiver position
+        if self.config.get('local_decoding', False):
+            try:
+                pos = self._local_decode_position(float(self.config.get('lat', 0.0)),
+                                                  float(self.config.get('lon', 0.0)),
+                                                  lat, lon, i, surface)
+                if pos:
+                    counters['cpr_receiver_ok'] += 1
+                    self._set_position(icao, aircraft, pos[0], pos[1], current_time)
+                    return
+                counters['cpr_receiver_fail'] += 1
+            except Exception:
+                pass # fallback to global if local fails
 
-            # Only try global decode if local didn't happen (or failed)
-            if not decoded_locally:
-                self._try_decode_cpr_position(icao, aircraft)
+        frame_data = {'lat': lat, 'lon': lon, 'time': current_time, 'type': cpr_type}
+        if is_odd:
+            entry['odd'] = frame_data
+            entry['last_odd'] = current_time
+        else:
+            entry['even'] = frame_data
+            entry['last_even'] = current_time
 
-        pos_match = re.search(r'Latitude:\s*([+-]?\d+\.?\d*)\s+Longitude:\s*([+-]?\d+\.?\d*)', block_text)
-        if pos_match:
-            aircraft['lat'] = pos_match.group(1)
-            aircraft['lon'] = pos_match.group(2)
+        self._try_decode_cpr_position(icao, aircraft)
+
+    def _local_decode_position(self, ref_lat, ref_lon, lat_msg, lon_msg, i, surface=False):
+        # local decode against any reference point, None if it doesn't resolve
+        try:
+            rec_lat = self._local_decode_lat(ref_lat, lat_msg, i, surface)
+            # if no lat - cannot proceed
+            if rec_lat is None:
+                return None
+            # calculate NL using recovered latitude
+            rec_lon = self._local_decode_lon(ref_lon, lon_msg, i, self._cpr_NL(rec_lat), surface)
+        except ValueError:
+            return None
+        if rec_lon is None:
+            return None
+        return rec_lat, rec_lon
+
+    def _position_reasonable(self, ref, lat, lon, ts, surface=False):
+        # did the target move no further than it physically could since the reference fix
+        dt = max(ts - ref[2], 0.0)
+        max_speed = self.CPR_MAX_SPEED_SURFACE if surface else self.CPR_MAX_SPEED_AIRBORNE
+        max_nm = max_speed * dt / 3600.0 + self.CPR_JUMP_SLACK_NM
+
+        dlat_nm = (lat - ref[0]) * 60.0
+        dlon = (lon - ref[1] + 180.0) % 360.0 - 180.0
+        dlon_nm = dlon * 60.0 * math.cos(math.radians((lat + ref[0]) / 2.0))
+        return dlat_nm * dlat_nm + dlon_nm * dlon_nm <= max_nm * max_nm
+
+    def _set_position(self, icao, aircraft, lat, lon, ts):
+        # a good fix, also the reference for the next local decode
+        aircraft.lat = lat
+        aircraft.lon = lon
+        self.position_updates += 1
+        self._position_hooks(aircraft, lat, lon, ts)
+        entry = self.cpr_data.get(icao)
+        if entry is None:
+            entry = self.cpr_data[icao] = {}
+        entry['ref'] = (lat, lon, ts)
+
+    def _position_hooks(self, aircraft, lat, lon, ts):
+        # everything that wants each new fix
+        if self.track_store is not None:
+            self.track_store.add_position(aircraft, ts, lat, lon)
+        if self.coverage is not None:
+            self.coverage.add(lat, lon, aircraft.altitude)
 
     def _get_aircraft_defaults(self, icao):
-        # Initialize or update an aircraft entry and its last_seen
-        if icao not in self.aircraft_data:
-            self.aircraft_data[icao] = {
-                'hex': icao,
-                # use time.time() float for logic, convert to string only for display
-                'last_seen': time.time(),
-                'callsign': 'N/A',
-                'altitude': 'N/A',
-                'speed': 'N/A',
-                'heading': 'N/A',
-                'v_rate': 'N/A',
-                'lat': 'N/A',
-                'lon': 'N/A',
-            }
-        self.aircraft_data[icao]['last_seen'] = time.time()
-        return self.aircraft_data[icao]
+        # Initialize or update an aircraft entry and its last_seen, and move it to the recent end
+        now = self.clock()
+        if now - self.last_cleanup >= 1.0:
+            self._cleanup_old_aircraft(now)
+
+        with self.aircraft_lock:
+            aircraft = self.aircraft_data.get(icao)
+            if aircraft is None:
+                aircraft = self.aircraft_data[icao] = Aircraft(icao, now)
+                self.aircraft_created += 1
+                created = True
+            else:
+                aircraft.last_seen = now
+                self.aircraft_data.move_to_end(icao)
+                created = False
+        if created and self.aircraft_db is not None:
+            # outside the lock, a lookup that isn't cached may have to page in the index
+            self.aircraft_db.enrich(aircraft)
+        return aircraft
         
-    def _cleanup_old_aircraft(self):
-        #remove aircraft tracks that havent updated in 60 seconds
-        cutoff_time = time.time() - 60
-        # create list of keys to remove to avoid runtime errors during iteration
-        to_remove = [k for k, v in self.aircraft_data.items() if v['last_seen'] < cutoff_time]
-        for k in to_remove:
-            del self.aircraft_data[k]
+    def _mark_updated(self, icao):
+        # tell the change trackers, once every field of this message is in: a consumer
+        # draining before that would pick up the old values and not look again
+        if self.change_trackers:
+            with self.aircraft_lock:
+                for tracker in self.change_trackers:
+                    tracker.mark(icao)
+
+    def _cleanup_old_aircraft(self, now=None):
+        #remove aircraft tracks (and their CPR state) that havent updated in 60 seconds.
+        # the table is in update order, so this only ever looks at the ones that expired
+        now = self.clock() if now is None else now
+        self.last_cleanup = now
+        cutoff_time = now - self.AIRCRAFT_TIMEOUT
+        expired = 0
+        # the parser and the view thread both get here, the lock keeps aircraft_expired right too
+        with self.aircraft_lock:
+            while self.aircraft_data:
+                icao, aircraft = next(iter(self.aircraft_data.items()))
+                if aircraft.last_seen >= cutoff_time:
+                    break
+                del self.aircraft_data[icao]
+                self.cpr_data.pop(icao, None)
+                expired += 1
+                for tracker in self.change_trackers:
+                    tracker.mark_removed(icao)
+            if expired:
+                self.stats.counters['aircraft_expired'] += expired
+
+    def add_change_tracker(self):
+        # register a new consumer of table changes, see ChangeTracker
+        tracker = ChangeTracker(self.aircraft_lock)
+        with self.aircraft_lock:
+            self.change_trackers = self.change_trackers + [tracker]
+        return tracker
+
+    def remove_change_tracker(self, tracker):
+        with self.aircraft_lock:
+            self.change_trackers = [t for t in self.change_trackers if t is not tracker]
+
+    def aircraft_snapshot(self):
+        # consistent list of the current table, oldest update first
+        with self.aircraft_lock:
+            return list(self.aircraft_data.values())
+
+    def _most_recent_aircraft(self, limit):
+        # newest first, costs O(limit) not a sort of the whole table
+        with self.aircraft_lock:
+            return list(islice(reversed(self.aircraft_data.values()), limit))
 
     def _cpr_NL(self, lat):
-        # ICAO specified NL function
-        if lat == 0:
-            return 59
-        
-        # fixed threshold for nl=1
-        if abs(lat) >= 87.0:
-            return 1
-
-        lat_rad = math.radians(abs(lat))
-        try:
-            t = 1 - math.cos(math.pi / 30) / math.cos(lat_rad)
-            if t <= 0:
-                return 1
-            #Note: whaat is happening????? i think this works
-            acos_arg = t
-            if acos_arg < -1:
-                acos_arg = -1
-            if acos_arg > 1:
-                acos_arg = 1
-
-            nl = int(math.floor(2 * math.pi / math.acos(acos_arg)))
-            return nl
-        except ValueError:
-            return 1
+        # ICAO specified NL function, as a lookup: count the zone edges below |lat|
+        # (matches floor(2pi / acos(1 - (1 - cos(pi/2NZ)) / cos^2(lat))) exactly, >= 87 deg gives 1)
+        return 59 - bisect_right(self.ADSB_LAT_LUT, abs(lat))
 
-    def _cpr_Dlat(self, i):
-        return 360.0 / (60 - i)
+    def _cpr_Dlat(self, i, surface=False):
+        # surface positions pack a quarter of the globe into the same 17 bits
+        return (90.0 if surface else 360.0) / (60 - i)
 
     def _cpr_Dlon(self, i, nl):
         ni = max(1.0, nl - i)
@@ -642,11 +1552,17 @@ class ADSB:
         if dt > 10.0:
             return None
 
+        # surface frames only cover 90 deg, so we need the receiver to pick the quadrant
+        surface = cpr_type == 'Surface'
+        if surface and not (ref_lat or ref_lon):
+            return None
+        span = 90.0 if surface else 360.0
+
         # integer math for zone Index, using integer division // to mimic floor
         j = (59 * even_lat - 60 * odd_lat + 65536) // 131072
 
-        dlat_even = 360.0 / 60.0
-        dlat_odd = 360.0 / 59.0
+        dlat_even = span / 60.0
+        dlat_odd = span / 59.0
 
         # find latitude for both even and odd frames
         #rlat = dlat * ( (zin - nz * floor(zin/nz)) + YZ/2^17 )
@@ -656,6 +1572,15 @@ class ADSB:
         # odd frame (i=1)
         rlat_odd = dlat_odd * (self._cpr_mod(j, 59) + odd_lat / 131072.0)
 
+        if surface:
+            # 0..90 north, the southern answer is 90 deg lower. take whichever is closer to us
+            if abs(rlat_even - 90.0 - ref_lat) < abs(rlat_even - ref_lat): rlat_even -= 90.0
+            if abs(rlat_odd - 90.0 - ref_lat) < abs(rlat_odd - ref_lat): rlat_odd -= 90.0
+        else:
+            # southern hemisphere comes out as 270..360
+            if rlat_even >= 270.0: rlat_even -= 360.0
+            if rlat_odd >= 270.0: rlat_odd -= 360.0
+
         # select most recent latitude
         if even_ts >= odd_ts:
             rlat = rlat_even
@@ -682,29 +1607,40 @@ class ADSB:
 
         # lon decoding
         if nl == 1:
-            rlon = 360.0 * xz / 131072.0
+            rlon = span * xz / 131072.0
         else:
             #correct modulus is nli = max(nl - i, 1)
             nli = max(nl - i, 1)
-            dlon = 360.0 / nli
+            dlon = span / nli
             
             #integer math for lon zone index
             m = ((nl - 1) * even_lon - nl * odd_lon + 65536) // 131072
             
             rlon = dlon * (self._cpr_mod(m, nli) + xz / 131072.0)
 
+        if surface:
+            # four 90 deg candidates, the one nearest the receiver wins
+            rlon = min((rlon + k * 90.0 for k in range(4)),
+                       key=lambda c: abs((c - ref_lon + 180.0) % 360.0 - 180.0))
+
         # normalize lon to standard [-180, 180]
         if rlon >= 180.0: rlon -= 360.0
         
         return rlat, rlon
 
-    def _local_decode_lat(self, lat_ref, lat_msg, i):
+    def decode_cpr_batch(self, even_lat, even_lon, odd_lat, odd_lon, even_ts, odd_ts):
+        # vectorized global decode of many airborne even/odd pairs at once (needs numpy),
+        # returns (lat, lon) arrays with NaN where a pair doesn't decode
+        from .adsb_cpr import decode_cpr_batch
+        return decode_cpr_batch(even_lat, even_lon, odd_lat, odd_lon, even_ts, odd_ts, self.ADSB_LAT_LUT)
+
+    def _local_decode_lat(self, lat_ref, lat_msg, i, surface=False):
         # new - added validity check for local decoding
         
         if not (0 <= lat_msg < self.CPR_MAX_VALUE):
             raise ValueError("lat_msg out of 17-bit range")
 
-        dlati = self._cpr_Dlat(i)
+        dlati = self._cpr_Dlat(i, surface)
         
         #local decoding formula
         encoded_term = lat_msg / self.CPR_MAX_VALUE
@@ -726,7 +1662,7 @@ class ADSB:
 
         return rlat
 
-    def _local_decode_lon(self, lon_ref, lon_msg, i, nl):
+    def _local_decode_lon(self, lon_ref, lon_msg, i, nl, surface=False):
         # normalize reference lon
         lon_ref = (lon_ref + 360.0) % 360.0
         
@@ -735,7 +1671,7 @@ class ADSB:
 
         #use correct nli for local decode
         nli = max(nl - i, 1)
-        dloni = 360.0 / nli 
+        dloni = (90.0 if surface else 360.0) / nli
         
         encoded_term = lon_msg / self.CPR_MAX_VALUE
         m1 = math.floor(lon_ref / dloni)
@@ -776,6 +1712,7 @@ class ADSB:
             return
 
         if abs(last_odd_ts - last_even_ts) >= 10.0:
+            self.stats.counters['cpr_global_stale'] += 1
             return
 
         odd_data = cpr_data['odd']
@@ -785,17 +1722,21 @@ class ADSB:
         ref_lon = self.config.get('lon', 0.0)
 
         try:
+            start = time.perf_counter()
             result = self._decode_cpr(
                 even_data['lat'], even_data['lon'],
                 odd_data['lat'], odd_data['lon'],
                 last_even_ts, last_odd_ts,
                 odd_type, ref_lat, ref_lon
             )
+            self.stats.latency['cpr_global'].record(time.perf_counter() - start)
 
-            if result is not None:
+            if result is None:
+                self.stats.counters['cpr_global_fail'] += 1
+            else:
+                self.stats.counters['cpr_global_ok'] += 1
                 lat_deg, lon_deg = result
-                aircraft['lat'] = f"{lat_deg:.4f}"
-                aircraft['lon'] = f"{lon_deg:.4f}"
+                self._set_position(icao, aircraft, lat_deg, lon_deg, max(last_odd_ts, last_even_ts))
 
             if last_odd_ts > last_even_ts:
                 cpr_data.pop('even', None)
@@ -810,95 +1751,286 @@ class ADSB:
             pass
 
     def view_aircraft(self):
-        if not self.monitoring or not self.adsb_process:
+        if not self.monitoring:
             print("ADS-B monitoring is not running! Start monitoring first using option 1.")
             input("Press Enter to continue...")
             return
 
+        # incremental: only changed lines are sent, rows are re-formatted when the parser marks them
+        from .adsb_view import Screen, AircraftRows
+
+        screen = Screen()
+        tracker = self.add_change_tracker()
+        table = AircraftRows(self, tracker)
+        previous_stats = self.stats_snapshot()
+        screen.open()
         try:
             while True:
-                os.system('clear')
-
-                print("=" * 125)
-                print("         AIRCRAFT DATA - ADS-B")
-                print("=" * 125)
-
                 # cleanup old aircraft before displaying
                 self._cleanup_old_aircraft()
 
-                now_str = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                print(f"Last Update: {now_str}")
-                print(f"Mode: {'RAW DATA (DEBUG)' if self.debug_mode else 'DECODED DATA'}")
                 monitor_status = 'data is being received' if self.has_received_data else 'waiting for first message... (Check device and antenna)'
-                print(f"Monitoring status: {monitor_status}")
+                lines = [
+                    "=" * 145,
+                    "         AIRCRAFT DATA - ADS-B",
+                    "=" * 145,
+                    f"Last Update: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+                    f"Mode: {'RAW DATA (DEBUG)' if self.debug_mode else 'DECODED DATA'}",
+                    f"Monitoring status: {monitor_status}",
+                ]
+                current_stats = self.stats_snapshot()
+                lines += self._pipeline_stats_lines(previous_stats, current_stats)
+                previous_stats = current_stats
+                if self.merger:
+                    lines += self._receiver_stats_lines()
+                if self.output_server:
+                    out = self.output_server.stats()
+                    lines.append(f"Output clients: {out['clients']} ({out['bytes_sent']} bytes sent, {out['disconnected_slow']} slow clients dropped)")
+                if self.watcher:
+                    alert = self.watcher.last_alert
+                    last = f", last {alert['icao']} {alert['callsign'] or ''} ({alert['match']} {alert['pattern']})" if alert else ''
+                    lines.append(f"Watchlist alerts: {self.watcher.alerts}{last}")
 
                 if self.debug_mode:
-                    print("--- RAW READSB OUTPUT (Last 50 lines) ---")
+                    lines.append("--- RAW READSB OUTPUT (Last 50 lines) ---")
                     if self.raw_output_buffer:
-                        for line in self.raw_output_buffer[-50:]:
-                            print(line)
+                        # list() copies the ring in one go, the parser thread keeps appending to it
+                        lines += list(self.raw_output_buffer)[-50:]
                     else:
-                        print("No raw data buffer available yet.")
+                        lines.append("No raw data buffer available yet.")
                 else:
                     total_tracks = len(self.aircraft_data)
                     max_rows = self.config['max_display_aircraft']
+                    rows = table.update(max_rows)
 
-                    print(f"Aircraft tracks seen (Last 60 seconds): {total_tracks} (Displaying top {min(total_tracks, max_rows)})")
-                    print("=" * 125)
+                    lines.append(f"Aircraft tracks seen (Last 60 seconds): {total_tracks} (Displaying top {min(total_tracks, max_rows)})")
+                    lines.append("=" * 145)
 
-                    if not self.aircraft_data:
-                        print("No aircraft tracks currently active.")
+                    if not rows:
+                        lines.append("No aircraft tracks currently active.")
                     else:
-                        header = f"{'ICAO Hex':<10} {'Callsign':<12} {'Altitude':<12} {'Speed':<12} {'Heading':<10} {'V-Rate':<10} {'Lat/Lon':<25} {'Last Seen':<10}"
-                        print(header)
-                        print("-" * 125)
-
-                        sorted_aircraft = sorted(
-                            self.aircraft_data.values(),
-                            key=lambda x: x.get('last_seen', 0.0), 
-                            reverse=True
-                        )
-
-                        for aircraft in sorted_aircraft[:max_rows]:
-                            hex_code = aircraft.get('hex', '---')
-                            callsign = aircraft.get('callsign', 'N/A')
-                            altitude = aircraft.get('altitude', 'N/A')
-                            speed = aircraft.get('speed', 'N/A')
-                            heading = aircraft.get('heading', 'N/A')
-                            v_rate = aircraft.get('v_rate', 'N/A')
-                            
-                            # convert timestamp to string only for display
-                            ts = aircraft.get('last_seen', 0.0)
-                            if isinstance(ts, float):
-                                last_seen = datetime.datetime.fromtimestamp(ts).strftime("%H:%M:%S")
-                            else:
-                                last_seen = str(ts) # fallback if something broke
-
-                            lat_lon = f"{aircraft.get('lat', 'N/A')}/{aircraft.get('lon', 'N/A')}"
-
-                            if v_rate not in ('N/A', '0') and v_rate.replace('+', '').replace('-', '').replace('.', '').isdigit():
-                                v_rate_display = f"{int(float(v_rate)):+} ft/m"
-                            else:
-                                v_rate_display = v_rate
-
-                            if altitude != 'N/A' and altitude.replace(',', '').replace(' ft', '').isdigit():
-                                altitude_display = f"{int(altitude.replace(',', ''))} ft"
-                            else:
-                                altitude_display = altitude
-
-                            speed_display = speed
-                            if speed != 'N/A' and ' kt' not in speed and '(TAS)' not in speed:
-                                speed_display = f"{speed} kt"
-
-                            print(f"{hex_code:<10} {callsign:<12} {altitude_display:<12} {speed_display:<12} {heading:<10} {v_rate_display:<10} {lat_lon:<25} {last_seen:<10}")
-
-                print("\nPress Ctrl+C to return to the menu.")
-                time.sleep(1)
+                        lines.append(f"{'ICAO Hex':<10} {'Callsign':<12} {'Reg':<9} {'Type':<5} {'Altitude':<12} {'Speed':<12} "
+                                     f"{'Heading':<10} {'V-Rate':<10} {'Lat/Lon':<25} {'Last Seen':<10} Operator")
+                        lines.append("-" * 145)
+                        lines += rows
+
+                lines.append("")
+                lines.append("Press Ctrl+C to return to the menu.")
+                screen.render(lines)
+                time.sleep(self.config.get('display_refresh', 1.0))
+
+        except KeyboardInterrupt:
+            return
+        finally:
+            screen.close()
+            self.remove_change_tracker(tracker)
+
+    def _pipeline_stats_lines(self, previous, current):
+        # three line summary of every stage, rates since the last refresh
+        rate = PipelineStats.rates(previous, current)
+        c, g, lat = current['counters'], current['gauges'], current['latency']
+
+        def r(name):
+            return f"{rate.get(name, 0.0):.0f}/s"
+
+        def p(name, pct):
+            return format_seconds(lat[name]['p' + str(pct)]) if name in lat else "-"
+
+        read = rate.get('stdout_lines', 0.0) + rate.get('stderr_lines', 0.0)
+        return [
+            f"Ingest: {read:.0f} lines/s | queue {g['queue_depth']}/{g['queue_capacity']} "
+            f"(wait p99 {p('queue_wait', 99)}) | dropped {g['dropped_lines']} "
+            f"(+{c.get('shard_lines_lost', 0)} with a dead parser worker) | reader blocked {c.get('stdout_blocked', 0)}x",
+            f"Parse:  blocks {r('blocks_parsed')} (p50 {p('block_parse', 50)}, p99 {p('block_parse', 99)}) | "
+            f"raw {r('raw_frames')} (batch p99 {p('raw_batch', 99)}) | net {r('net_frames')} frames, {r('net_records')} records ({g['net_errors']} bad batches) | "
+            f"CRC rejects {c.get('crc_rejected', 0)}",
+            f"CPR:    local {c.get('cpr_local_ok', 0)} ok/{c.get('cpr_local_fail', 0)} fail | "
+            f"global {c.get('cpr_global_ok', 0)} ok/{c.get('cpr_global_fail', 0)} fail/{c.get('cpr_global_stale', 0)} stale | "
+            f"receiver {c.get('cpr_receiver_ok', 0)} | aircraft {g['aircraft']} ({c.get('aircraft_expired', 0)} expired)",
+        ]
+
+    def _receiver_stats_lines(self):
+        # merge mode: how much each receiver hears and how much of that nobody else did
+        lines = [f"{'Receiver':<14} {'Msgs':>10} {'Msg/s':>8} {'First':>10} {'Share':>7} {'Unique':>10} {'Uniq/s':>8}"]
+        for row in self.merger.stats():
+            lines.append(f"{row['name']:<14} {row['messages']:>10} {row['msg_rate']:>8.1f} {row['first']:>10} "
+                         f"{row['contribution'] * 100:>6.1f}% {row['unique']:>10} {row['unique_rate']:>8.1f}")
+        lines.append(f"Duplicates dropped: {self.merger.duplicates}")
+        return lines
+
+    def replay_menu(self):
+        # feed a recorded readsb log back through the parser on a virtual clock
+        from .adsb_replay import LogReplayer, format_report, parse_speed
+
+        path = input("Path to readsb log (.log or .gz): ").strip()
+        if not path or not Path(path).exists():
+            print("File not found.")
+            input("Press Enter to continue...")
+            return
+        try:
+            speed = parse_speed(input("Speed (1, 10 or max) [max]: ").strip() or 'max')
+        except ValueError:
+            print("Invalid speed.")
+            input("Press Enter to continue...")
+            return
+
+        self.stop_adsb()
+        replayer = LogReplayer(self, path, speed)
 
+        def progress(report):
+            print(f"\r{report['lines']} lines, {report['virtual_span']:.0f} s of log, "
+                  f"{report['aircraft_active']} aircraft active", end='', flush=True)
+
+        print("Replaying... (Ctrl+C to stop)")
+        try:
+            report = replayer.run(progress)
         except KeyboardInterrupt:
+            report = replayer.report()
+        print("\n" + format_report(report))
+        input("Press Enter to continue...")
+
+    def native_decoder_menu(self):
+        # in-process demod, no readsb needed. works on .iq recordings or live hackrf
+        try:
+            from .adsb_demod import ModeSDemodulator
+            demod = ModeSDemodulator(crc_fix_bits=self.config.get('crc_fix_bits', 1))
+        except ImportError as e:
+            print(f"Native decoder unavailable: {e}")
+            input("Press Enter to continue...")
+            return
+
+        os.system('clear')
+        print("========================================")
+        print("      NATIVE MODE S / ADS-B DECODER")
+        print("========================================")
+        print("1. Decode recorded .iq file (2 MS/s)")
+        print("2. Live decode from HackRF")
+        print("3. Back")
+
+        choice = input("\nEnter choice (1-3): ").strip()
+
+        if choice == '1':
+            recordings_dir = Path.home() / ".rf_toolkit" / "recordings"
+            recordings = sorted(recordings_dir.glob("*.iq")) if recordings_dir.exists() else []
+            if recordings:
+                print("\nAvailable recordings:")
+                for i, rec in enumerate(recordings):
+                    print(f"{i + 1}. {rec.name}")
+            path = input("\nSelect recording number or enter a path: ").strip()
+            if path.isdigit() and 0 < int(path) <= len(recordings):
+                path = recordings[int(path) - 1]
+            if not path or not Path(path).exists():
+                print("File not found.")
+                input("Press Enter to continue...")
+                return
+            try:
+                with open(path, 'rb') as f:
+                    self._run_native_decoder(demod, f)
+            except KeyboardInterrupt:
+                pass
+            self._print_demod_stats(demod)
+
+        elif choice == '2':
+            if self.monitoring:
+                print("readsb monitoring is using the HackRF, stop it first (option 3).")
+                input("Press Enter to continue...")
+                return
+            process = None
+            try:
+                process = demod.open_hackrf(self.config['freq'], self.config['gain'])
+                print("Decoding live from HackRF. Press Ctrl+C to stop.")
+                self._run_native_decoder(demod, process.stdout)
+            except FileNotFoundError:
+                print("hackrf_transfer not found! Install hackrf tools first.")
+            except KeyboardInterrupt:
+                pass
+            finally:
+                if process:
+                    process.terminate()
+                    try:
+                        process.wait(timeout=3)
+                    except subprocess.TimeoutExpired:
+                        process.kill()
+            self._print_demod_stats(demod)
+        else:
             return
 
+        input("Press Enter to continue...")
+
+    def _run_native_decoder(self, demod, stream):
+        # frames are decoded into the aircraft table, rate line every second.
+        # CPR pairing runs on sample time, so recordings decode the same at any speed
+        from .adsb_decode import decode_frame
+
+        self._reset_tracking_state()
+        base_time = time.time()
+        last_report = base_time
+        for sample_idx, frame in demod.iter_stream(stream):
+            if self.debug_mode:
+                print(demod.frame_to_hex(frame))
+            fields = decode_frame(frame)
+            if fields:
+                self._apply_decoded_fields(fields['icao'], fields, base_time + sample_idx / demod.SAMPLE_RATE)
+            now = time.time()
+            if now - last_report >= 1.0:
+                last_report = now
+                st = demod.stats()
+                print(f"frames: {st['frames']}  rate: {st['frames_per_sec']:.1f} frames/sec  "
+                      f"speed: {st['realtime_factor']:.2f}x realtime  aircraft: {len(self.aircraft_data)}")
+
+    def _print_demod_stats(self, demod):
+        st = demod.stats()
+        print("\n--- Native decoder stats ---")
+        print(f"Samples processed: {st['samples']} ({st['samples'] / demod.SAMPLE_RATE:.1f} s of signal)")
+        print(f"Preambles seen:    {st['preambles']}")
+        print(f"Frames decoded:    {st['frames']} ({st['corrected']} repaired)")
+        print(f"Frames/sec:        {st['frames_per_sec']:.1f}")
+        print(f"Speed:             {st['realtime_factor']:.2f}x realtime")
+        if self.aircraft_data:
+            print(f"\n--- Aircraft decoded ({len(self.aircraft_data)}) ---")
+            for aircraft in self._most_recent_aircraft(self.config['max_display_aircraft']):
+                print(aircraft.display_row())
+
     def stop_adsb(self):
+        if self.checkpointer:
+            self.checkpointer.stop()
+            self.checkpointer = None
+        if self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+        if self.shared_table:
+            self.shared_table.stop()
+            self.remove_change_tracker(self.shared_table.tracker)
+            self.shared_table = None
+        if self.coverage:
+            self.coverage.stop()
+            self.coverage = None
+        if self.track_store:
+            self.track_store.stop()
+            self.track_store = None
+        if self.stats_logger:
+            self.stats_logger.stop()
+            self.stats_logger = None
+        if self.output_server:
+            self.output_server.stop()
+            self.remove_change_tracker(self.output_server.tracker)
+            self.output_server = None
+        if self.net_reader:
+            self.net_reader.stop()
+            self.net_reader = None
+        for reader in self.merge_readers:
+            reader.stop()
+        self.merge_readers = []
+        for process in self.merge_processes:
+            try:
+                os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+            except Exception:
+                pass
+        self.merge_processes = []
+        self.merger = None
+        if self.aircraft_db:
+            self.aircraft_db.close()
+            self.aircraft_db = None
         if self.adsb_process:
             try:
                 os.killpg(os.getpgid(self.adsb_process.pid), signal.SIGTERM)
@@ -909,6 +2041,11 @@ class ADSB:
                     pass
             self.adsb_process = None
         self.monitoring = False
+        # wake the parser thread so it sees monitoring is off
+        try:
+            self.raw_output_queue.put_nowait(None)
+        except Full:
+            pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,201 @@
+import argparse
+import os
+import struct
+import sys
+import threading
+import time
+
+from .adsb_shm import RECORD, pack_aircraft, unpack_record
+from .adsb_state import Aircraft
+
+# Warm restart: the tracking state (every aircraft plus the fix its CPR
+# decoding is referenced to) saved to a small binary file now and then and
+# on stop, loaded again on the next start. Aircraft still in range get
+# their first position from a single frame instead of waiting for a fresh
+# even/odd pair.
+#
+#   header  32 bytes, HEADER below
+#   entries count * ENTRY: the shared memory table's RECORD (adsb_shm) and
+#           the CPR reference fix lat, lon, time (time 0 = none)
+
+MAGIC = b'ADCK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIdQ4x')            # magic, version, entry size, count, saved at, sequence
+ENTRY = struct.Struct('<' + RECORD.format.lstrip('<') + 'ddd')
+REF = struct.Struct('<ddd')
+NO_REF = REF.pack(0.0, 0.0, 0.0)
+RECORD_FIELDS = len(RECORD.unpack(bytes(RECORD.size)))
+
+
+def read_checkpoint(path):
+    # (saved_at, [(aircraft dict, ref or None)]), ValueError for anything that isn't a checkpoint
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        magic, version, entry_size, count, saved_at, _seq = HEADER.unpack_from(data, 0)
+    except struct.error:
+        raise ValueError(f"{path} is not a checkpoint") from None
+    if magic != MAGIC or version != VERSION or entry_size != ENTRY.size:
+        raise ValueError(f"{path} is not a checkpoint (or from another version)")
+    if len(data) != HEADER.size + count * ENTRY.size:
+        raise ValueError(f"{path} is truncated")
+
+    entries = []
+    for values in ENTRY.iter_unpack(memoryview(data)[HEADER.size:]):
+        ref = values[RECORD_FIELDS:]
+        entries.append((unpack_record(values[:RECORD_FIELDS]), ref if ref[2] else None))
+    return saved_at, entries
+
+
+class Checkpointer:
+    """
+    Saves ADSB's tracking state every interval seconds from its own thread,
+    and once more on stop().
+
+    A save packs the table into one bytes object while holding the table
+    lock (a couple of us per aircraft, the parser waits no longer than
+    that) and writes it outside it: to a temp file, fsync, then renamed
+    over the old one, so a crash mid-save leaves the previous checkpoint.
+
+    restore() puts a checkpoint back into an empty table, aged against
+    the clock: aircraft that would have expired by now are left out, and
+    a CPR reference fix is only kept while it's young enough for local
+    decoding (ADSB.CPR_REF_MAX_AGE). The speed check on the next decode
+    counts the time we were down, so an aircraft that moved on fails it
+    and goes back to pairing.
+    """
+
+    def __init__(self, adsb, path, interval=30.0):
+        self.adsb = adsb
+        self.path = path
+        self.interval = interval
+        self.saves = 0
+        self.errors = 0
+        self.last_bytes = 0
+        self.last_seconds = 0.0
+        self.restored = 0
+        self._seq = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def restore(self):
+        # load the checkpoint into the table, returns how many aircraft came back
+        adsb = self.adsb
+        try:
+            _saved_at, entries = read_checkpoint(self.path)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            print(f"Checkpoint not restored: {e}")
+            return 0
+
+        now = adsb.clock()
+        expire = now - adsb.AIRCRAFT_TIMEOUT
+        ref_expire = now - adsb.CPR_REF_MAX_AGE
+        entries.sort(key=lambda entry: entry[0]['last_seen'])
+        restored = 0
+        with adsb.aircraft_lock:
+            table = adsb.aircraft_data
+            live = bool(table)
+            for fields, ref in entries:
+                icao = fields['hex']
+                # a live feed may have beaten us to it, what it has is newer
+                if fields['last_seen'] < expire or fields['last_seen'] > now or icao in table:
+                    continue
+                aircraft = Aircraft(icao, fields['last_seen'])
+                for name, value in fields.items():
+                    setattr(aircraft, name, value)
+                table[icao] = aircraft
+                if ref is not None and ref_expire <= ref[2] <= now:
+                    adsb.cpr_data[icao] = {'ref': ref}
+                for tracker in adsb.change_trackers:
+                    tracker.mark(icao)
+                restored += 1
+            if live and restored:
+                # restored aircraft went in behind live ones, expiry walks the table in
+                # last_seen order and would stop at the first live one
+                for icao in sorted(table, key=lambda icao: table[icao].last_seen):
+                    table.move_to_end(icao)
+        self.restored = restored
+        return restored
+
+    def save(self):
+        adsb = self.adsb
+        start = time.perf_counter()
+        cpr_data = adsb.cpr_data
+        parts = []
+        with adsb.aircraft_lock:
+            for icao, aircraft in adsb.aircraft_data.items():
+                entry = cpr_data.get(icao)
+                ref = entry.get('ref') if entry else None
+                parts.append(pack_aircraft(aircraft))
+                parts.append(REF.pack(*ref) if ref else NO_REF)
+            count = len(parts) // 2
+        self._seq += 1
+        data = HEADER.pack(MAGIC, VERSION, ENTRY.size, count, adsb.clock(), self._seq) + b''.join(parts)
+
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except OSError:
+            self.errors += 1
+            return False
+        self.saves += 1
+        self.last_bytes = len(data)
+        self.last_seconds = time.perf_counter() - start
+        return True
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # one last save, so a restart from the menu loses nothing
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.save()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.save()
+
+    def stats(self):
+        return {
+            'saves': self.saves,
+            'errors': self.errors,
+            'bytes': self.last_bytes,
+            'save_seconds': self.last_seconds,
+            'restored': self.restored,
+        }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="show what's in an ADS-B tracking checkpoint")
+    ap.add_argument('path')
+    args = ap.parse_args(argv)
+
+    try:
+        saved_at, entries = read_checkpoint(args.path)
+    except (OSError, ValueError) as e:
+        print(e)
+        return 1
+    age = time.time() - saved_at
+    refs = sum(1 for _fields, ref in entries if ref)
+    print(f"saved {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(saved_at))} ({age:.0f} s ago), "
+          f"{len(entries)} aircraft, {refs} with a CPR reference fix")
+    for fields, ref in sorted(entries, key=lambda entry: -entry[0]['last_seen']):
+        pos = f"{fields['lat']:.4f}/{fields['lon']:.4f}" if fields['lat'] is not None else '-'
+        print(f"  {fields['hex']:<7} {fields['callsign'] or '-':<9} {saved_at - fields['last_seen']:>5.0f} s  {pos:<20} "
+              f"{'ref ' + format(saved_at - ref[2], '.0f') + ' s' if ref else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
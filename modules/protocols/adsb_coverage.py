@@ -0,0 +1,315 @@
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only the coverage maps need it
+    np = None
+
+import argparse
+import os
+import struct
+import sys
+import threading
+import zlib
+
+# Receiver coverage and traffic density, accumulated as positions are decoded.
+# Positions are buffered and folded into the arrays a batch at a time, so the
+# per-position cost on the parser thread is one list append.
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG = 111.32
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for coverage maps (pip install numpy)")
+
+
+def band_labels(alt_edges):
+    # row names of PolarCoverage.ranges
+    edges = [int(e) for e in alt_edges]
+    labels = ['all', f"<{edges[0]} ft"]
+    labels += [f"{lo}-{hi} ft" for lo, hi in zip(edges, edges[1:])]
+    labels.append(f">={edges[-1]} ft")
+    return labels
+
+
+class PolarCoverage:
+    """
+    Max range (km) seen per bearing, overall and per altitude band.
+
+    ranges[0] is every position, ranges[1 + k] the k-th altitude band:
+    below alt_edges[0], between consecutive edges, above the last one.
+    Positions without an altitude only count towards row 0.
+    """
+
+    def __init__(self, lat, lon, bearing_bins=72, alt_edges=(10000, 20000, 30000)):
+        _require_numpy()
+        self.lat = lat
+        self.lon = lon
+        self.bearing_bins = bearing_bins
+        self.alt_edges = np.asarray(alt_edges, dtype=np.float64)
+        self.ranges = np.zeros((len(alt_edges) + 2, bearing_bins), dtype=np.float32)
+
+    def update(self, lat, lon, alt):
+        # float arrays, alt NaN where unknown
+        p1 = np.radians(self.lat)
+        p2 = np.radians(lat)
+        dlon = np.radians(lon - self.lon)
+        a = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dlon / 2) ** 2
+        dist = (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))).astype(np.float32)
+        bearing = np.degrees(np.arctan2(np.sin(dlon) * np.cos(p2),
+                                        np.cos(p1) * np.sin(p2) - np.sin(p1) * np.cos(p2) * np.cos(dlon)))
+        bins = ((bearing % 360.0) * (self.bearing_bins / 360.0)).astype(np.intp) % self.bearing_bins
+
+        np.maximum.at(self.ranges[0], bins, dist)
+        known = ~np.isnan(alt)
+        bands = np.searchsorted(self.alt_edges, alt[known], side='right') + 1
+        np.maximum.at(self.ranges, (bands, bins[known]), dist[known])
+
+
+class DensityGrid:
+    """
+    Position counts on a square km grid centred on the receiver, north up
+    (row 0 is the northern edge). Anything outside radius_km is counted in
+    `outside` only.
+    """
+
+    def __init__(self, lat, lon, radius_km=500.0, cell_km=2.0):
+        _require_numpy()
+        self.lat = lat
+        self.lon = lon
+        self.radius_km = radius_km
+        self.cell_km = cell_km
+        self.size = int(np.ceil(2 * radius_km / cell_km))
+        self.counts = np.zeros((self.size, self.size), dtype=np.uint32)
+        self.outside = 0
+        self._km_per_deg_lon = KM_PER_DEG * np.cos(np.radians(lat))
+
+    def update(self, lat, lon):
+        x = ((lon - self.lon + 180.0) % 360.0 - 180.0) * self._km_per_deg_lon + self.radius_km
+        y = self.radius_km - (lat - self.lat) * KM_PER_DEG
+        col = np.floor(x / self.cell_km).astype(np.intp)
+        row = np.floor(y / self.cell_km).astype(np.intp)
+        inside = (col >= 0) & (col < self.size) & (row >= 0) & (row < self.size)
+        self.outside += int(inside.size - np.count_nonzero(inside))
+        np.add.at(self.counts, (row[inside], col[inside]), 1)
+
+
+class CoverageRecorder:
+    """
+    Feeds decoded positions into a PolarCoverage and a DensityGrid.
+
+    add() is called from the parser thread for every fix and only buffers.
+    The buffer is folded into both maps every batch_size positions, or
+    whenever someone wants a consistent view (arrays(), save()). If path
+    is set, save() writes an .npz there (plus PNG renderings next to it)
+    and a previous .npz for the same receiver and geometry is loaded on
+    start, so the maps keep accumulating across restarts. Delete the file
+    to start over, e.g. after moving the antenna.
+    """
+
+    def __init__(self, lat, lon, radius_km=500.0, cell_km=2.0, bearing_bins=72,
+                 alt_edges=(10000, 20000, 30000), path=None, batch_size=4096):
+        self.polar = PolarCoverage(lat, lon, bearing_bins, alt_edges)
+        self.density = DensityGrid(lat, lon, radius_km, cell_km)
+        self.path = path
+        self.batch_size = batch_size
+        self.positions = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def add(self, lat, lon, alt):
+        with self._lock:
+            pending = self._pending
+            pending.append((lat, lon, np.nan if alt is None else alt))
+            if len(pending) >= self.batch_size:
+                self._fold()
+
+    def _fold(self):
+        # lock held
+        if not self._pending:
+            return
+        batch = np.array(self._pending, dtype=np.float64)
+        self._pending = []
+        self.polar.update(batch[:, 0], batch[:, 1], batch[:, 2])
+        self.density.update(batch[:, 0], batch[:, 1])
+        self.positions += len(batch)
+
+    def arrays(self):
+        # copies of everything, safe to hand to another thread
+        with self._lock:
+            self._fold()
+            return {
+                'receiver': np.array([self.polar.lat, self.polar.lon]),
+                'polar_ranges': self.polar.ranges.copy(),
+                'alt_edges': self.polar.alt_edges.copy(),
+                'density': self.density.counts.copy(),
+                'density_geometry': np.array([self.density.radius_km, self.density.cell_km]),
+                'outside': np.array(self.density.outside),
+                'positions': np.array(self.positions),
+            }
+
+    def _load(self, path):
+        try:
+            with np.load(path) as saved:
+                same = (np.allclose(saved['receiver'], [self.polar.lat, self.polar.lon])
+                        and saved['polar_ranges'].shape == self.polar.ranges.shape
+                        and np.array_equal(saved['alt_edges'], self.polar.alt_edges)
+                        and np.allclose(saved['density_geometry'], [self.density.radius_km, self.density.cell_km]))
+                if not same:
+                    return
+                self.polar.ranges[:] = saved['polar_ranges']
+                self.density.counts[:] = saved['density']
+                self.density.outside = int(saved['outside'])
+                self.positions = int(saved['positions'])
+        except (OSError, KeyError, ValueError):
+            pass
+
+    def save(self, path=None):
+        # atomic: the .npz and PNGs are written to temp names and renamed into place
+        path = path or self.path
+        data = self.arrays()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, **data)
+        os.replace(tmp, path)
+        root = path[:-4] if path.endswith('.npz') else path
+        for name, image in (('polar', render_polar(data['polar_ranges'])),
+                            ('density', render_density(data['density']))):
+            out = f"{root}_{name}.png"
+            write_png(out + '.tmp', image)
+            os.replace(out + '.tmp', out)
+        return path
+
+    # ---------------- periodic save ---------------- #
+
+    def start(self, interval):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # saves one last time
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if self.path:
+            try:
+                self.save()
+            except OSError:
+                pass
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.save()
+            except OSError:
+                pass
+
+    def stats(self):
+        return {
+            'positions': self.positions + len(self._pending),
+            'max_range_km': float(self.polar.ranges[0].max()),
+            'outside_grid': self.density.outside,
+        }
+
+
+# ---------------- images ---------------- #
+
+# band colours for the polar plot: all, then low to high altitude
+BAND_COLOURS = [(90, 90, 90), (230, 80, 60), (240, 170, 40), (90, 190, 90), (60, 140, 230)]
+
+
+def render_polar(ranges, size=600, ring_km=50.0):
+    """
+    Coverage polygons as an RGB image, north up, receiver in the middle,
+    scaled so the longest range fills the frame. Higher bands are drawn
+    first so the lower (shorter) ones stay visible on top, grey rings
+    every ring_km.
+    """
+    _require_numpy()
+    bins = ranges.shape[1]
+    scale = max(float(ranges.max()), ring_km) * 1.05
+    half = size / 2.0
+    yy, xx = np.mgrid[0:size, 0:size]
+    east = (xx + 0.5 - half) / half * scale
+    north = (half - yy - 0.5) / half * scale
+    dist = np.hypot(east, north)
+    bearing_bin = ((np.degrees(np.arctan2(east, north)) % 360.0) * (bins / 360.0)).astype(np.intp) % bins
+
+    image = np.full((size, size, 3), 16, dtype=np.uint8)
+    for band in range(ranges.shape[0] - 1, 0, -1):
+        inside = dist <= ranges[band][bearing_bin]
+        image[inside & (ranges[band][bearing_bin] > 0)] = BAND_COLOURS[band % len(BAND_COLOURS)]
+    # outline of the overall coverage
+    outline = np.abs(dist - ranges[0][bearing_bin]) <= scale / half
+    image[outline] = (255, 255, 255)
+    rings = np.abs((dist + ring_km / 2) % ring_km - ring_km / 2) <= scale / half * 0.5
+    image[rings & ~outline] = (70, 70, 70)
+    return image
+
+
+def render_density(counts):
+    # log scaled heat map, black -> blue -> yellow -> white
+    _require_numpy()
+    level = np.log1p(counts.astype(np.float64))
+    top = level.max()
+    if top > 0:
+        level /= top
+    stops = [0.0, 0.35, 0.75, 1.0]
+    image = np.empty(counts.shape + (3,), dtype=np.uint8)
+    for channel, values in enumerate(((0, 30, 250, 255), (0, 60, 220, 255), (0, 200, 40, 255))):
+        image[..., channel] = np.interp(level, stops, values).astype(np.uint8)
+    return image
+
+
+def write_png(path, image):
+    # 8 bit RGB PNG with just the stdlib (zlib), image is an HxWx3 uint8 array
+    height, width = image.shape[:2]
+    rows = np.concatenate([np.zeros((height, 1), dtype=np.uint8),
+                           np.ascontiguousarray(image, dtype=np.uint8).reshape(height, width * 3)], axis=1)
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)))
+        f.write(chunk(b'IEND', b''))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="summarise / render a saved ADS-B coverage file")
+    ap.add_argument('npz', help="coverage .npz written by the ADS-B module")
+    ap.add_argument('--png', help="write polar and density images with this prefix")
+    args = ap.parse_args(argv)
+    _require_numpy()
+
+    with np.load(args.npz) as data:
+        ranges = data['polar_ranges']
+        edges = data['alt_edges']
+        density = data['density']
+        print(f"receiver {data['receiver'][0]:.4f}, {data['receiver'][1]:.4f}: "
+              f"{int(data['positions'])} positions, {int(data['outside'])} outside the density grid")
+    bins = ranges.shape[1]
+    for label, row in zip(band_labels(edges), ranges):
+        best = int(np.argmax(row))
+        print(f"  {label:<14} max {row.max():6.1f} km at {best * 360.0 / bins:5.1f} deg, "
+              f"median {np.median(row):6.1f} km, {np.count_nonzero(row)}/{bins} bearings heard")
+    if args.png:
+        write_png(args.png + '_polar.png', render_polar(ranges))
+        write_png(args.png + '_density.png', render_density(density))
+        print(f"wrote {args.png}_polar.png and {args.png}_density.png")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only the batch path needs it
+    np = None
+
+# Batched CPR global decoding. Same math as ADSB._decode_cpr, but over whole
+# arrays of even/odd pairs, for replaying long logs or a busy receiver where the
+# per-frame scalar path would dominate.
+
+CPR_MAX = 131072        # 2^17
+MAX_PAIR_DT = 10.0      # seconds between even and odd frame
+
+
+def cpr_nl_array(lat, lat_lut):
+    # NL for an array of latitudes, a searchsorted over the zone edge table
+    edges = np.asarray(lat_lut, dtype=np.float64)
+    return 59 - np.searchsorted(edges, np.abs(lat), side='right')
+
+
+def decode_cpr_batch(even_lat, even_lon, odd_lat, odd_lon, even_ts, odd_ts, lat_lut, max_dt=MAX_PAIR_DT):
+    # airborne even/odd pairs in, (lat, lon) float arrays out, NaN where the pair is unusable
+    if np is None:
+        raise ImportError("numpy is required for batch CPR decoding (pip install numpy)")
+
+    e_lat = np.asarray(even_lat, dtype=np.int64)
+    e_lon = np.asarray(even_lon, dtype=np.int64)
+    o_lat = np.asarray(odd_lat, dtype=np.int64)
+    o_lon = np.asarray(odd_lon, dtype=np.int64)
+    e_ts = np.asarray(even_ts, dtype=np.float64)
+    o_ts = np.asarray(odd_ts, dtype=np.float64)
+
+    # latitude zone index, integer floor like the scalar path
+    j = (59 * e_lat - 60 * o_lat + CPR_MAX // 2) // CPR_MAX
+    rlat_even = (360.0 / 60.0) * (np.mod(j, 60) + e_lat / CPR_MAX)
+    rlat_odd = (360.0 / 59.0) * (np.mod(j, 59) + o_lat / CPR_MAX)
+    rlat_even = np.where(rlat_even >= 270.0, rlat_even - 360.0, rlat_even)
+    rlat_odd = np.where(rlat_odd >= 270.0, rlat_odd - 360.0, rlat_odd)
+
+    nl_even = cpr_nl_array(rlat_even, lat_lut)
+    nl_odd = cpr_nl_array(rlat_odd, lat_lut)
+
+    # newest frame decides which latitude and longitude we report
+    use_even = e_ts >= o_ts
+    rlat = np.where(use_even, rlat_even, rlat_odd)
+    i = np.where(use_even, 0, 1)
+    xz = np.where(use_even, e_lon, o_lon)
+
+    nl = nl_even
+    nli = np.maximum(nl - i, 1)
+    m = ((nl - 1) * e_lon - nl * o_lon + CPR_MAX // 2) // CPR_MAX
+    rlon = (360.0 / nli) * (np.mod(m, nli) + xz / CPR_MAX)
+    rlon = np.where(rlon >= 180.0, rlon - 360.0, rlon)
+
+    valid = (np.abs(e_ts - o_ts) <= max_dt) & (nl_even == nl_odd) & (rlat >= -90.0) & (rlat <= 90.0)
+    lat = np.where(valid, rlat, np.nan)
+    lon = np.where(valid, rlon, np.nan)
+    return lat, lon
@@ -0,0 +1,187 @@
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only the batch path needs it
+    np = None
+
+
+class ModeSCRC:
+    """
+    Mode S CRC-24 check and error repair
+
+    Table driven CRC over frame bytes, plus syndrome -> bit position maps
+    built once up front: a syndrome for a frame with one (or two) flipped
+    bits is just the XOR of the syndromes of those single bits, so repair
+    is a dict lookup and a couple of XORs, no trial flipping.
+
+    Works per frame (bytes) or on whole batches (numpy uint8 arrays).
+    """
+
+    POLY = 0xfff409
+    # the DF field decides the frame length, never "repair" those bits
+    PROTECTED_BITS = 5
+
+    def __init__(self, max_fix_bits=1):
+        self.max_fix_bits = max_fix_bits
+        self.table = self._build_table()
+        # syndrome -> tuple of bit positions, per frame length
+        self.fix_long = self._build_syndrome_map(112, max_fix_bits)
+        # DF11 only gets single bit repair, two bits on 56 bits is too easy to fake
+        self.fix_short = self._build_syndrome_map(56, 1)
+        self._batch_maps = {}
+
+    def _build_table(self):
+        table = []
+        for byte in range(256):
+            crc = byte << 16
+            for _ in range(8):
+                crc = ((crc << 1) ^ self.POLY) if crc & 0x800000 else (crc << 1)
+            table.append(crc & 0xffffff)
+        return table
+
+    def crc(self, data):
+        # plain CRC-24 of the given bytes
+        table = self.table
+        crc = 0
+        for b in data:
+            crc = ((crc << 8) & 0xffffff) ^ table[(crc >> 16) ^ b]
+        return crc
+
+    def syndrome(self, msg):
+        # CRC of the data part XOR the transmitted parity, 0 for a clean DF11/17/18 frame
+        return self.crc(msg[:-3]) ^ ((msg[-3] << 16) | (msg[-2] << 8) | msg[-1])
+
+    def _single_bit_syndromes(self, nbits):
+        nbytes = nbits // 8
+        syndromes = []
+        for bit in range(nbits):
+            msg = bytearray(nbytes)
+            msg[bit // 8] = 0x80 >> (bit % 8)
+            syndromes.append(self.syndrome(msg))
+        return syndromes
+
+    def _build_syndrome_map(self, nbits, max_fix_bits):
+        single = self._single_bit_syndromes(nbits)
+        fixes = {}
+        ambiguous = set()
+
+        def add(syn, bits):
+            if syn in fixes or syn in ambiguous:
+                # two different error patterns give the same syndrome, can't tell which
+                fixes.pop(syn, None)
+                ambiguous.add(syn)
+            else:
+                fixes[syn] = bits
+
+        first = self.PROTECTED_BITS
+        for i in range(first, nbits):
+            add(single[i], (i,))
+        if max_fix_bits >= 2:
+            for i in range(first, nbits):
+                for j in range(i + 1, nbits):
+                    add(single[i] ^ single[j], (i, j))
+        return fixes
+
+    # ---------------- per frame ---------------- #
+
+    def check(self, msg):
+        """
+        Validate (and repair if possible) one frame.
+
+        Returns (frame_bytes, corrected_bits) for a good frame, (None, -1)
+        for a bad one. DF11 is accepted with a non-zero interrogator id
+        overlaid on the parity. Address/parity formats (DF0/4/5/16/20/21)
+        can't be checked without knowing the aircraft, use address_parity().
+        """
+        df = msg[0] >> 3
+        syn = self.syndrome(msg)
+        if syn == 0:
+            return bytes(msg), 0
+
+        if len(msg) == 14 and df in (17, 18):
+            bits = self.fix_long.get(syn)
+        elif len(msg) == 7 and df == 11:
+            if syn < 0x80:
+                return bytes(msg), 0 # IID overlaid, still a clean frame
+            bits = self.fix_short.get(syn)
+        else:
+            return None, -1
+
+        if bits is None:
+            return None, -1
+        fixed = bytearray(msg)
+        for bit in bits:
+            fixed[bit // 8] ^= 0x80 >> (bit % 8)
+        return bytes(fixed), len(bits)
+
+    def address_parity(self, msg):
+        # for AP formats the syndrome IS the aircraft address (as int)
+        return self.syndrome(msg)
+
+    # ---------------- batches ---------------- #
+
+    def syndromes_batch(self, frames):
+        # (N, nbytes) uint8 array -> (N,) syndromes, one vectorized table step per byte column
+        table = self._np_table()
+        crc = np.zeros(frames.shape[0], dtype=np.uint32)
+        for col in range(frames.shape[1] - 3):
+            crc = ((crc << 8) & 0xffffff) ^ table[(crc >> 16) ^ frames[:, col]]
+        parity = (frames[:, -3].astype(np.uint32) << 16) | (frames[:, -2].astype(np.uint32) << 8) | frames[:, -1]
+        return crc ^ parity
+
+    def _np_table(self):
+        if 'table' not in self._batch_maps:
+            self._batch_maps['table'] = np.array(self.table, dtype=np.uint32)
+        return self._batch_maps['table']
+
+    def _np_fix_map(self, nbits):
+        # sorted syndromes + bit positions (padded with -1) for searchsorted lookups
+        key = ('fix', nbits)
+        if key not in self._batch_maps:
+            fixes = self.fix_long if nbits == 112 else self.fix_short
+            syns = np.array(sorted(fixes), dtype=np.uint32)
+            bits = np.full((len(syns), 2), -1, dtype=np.int64)
+            for row, syn in enumerate(syns.tolist()):
+                positions = fixes[syn]
+                bits[row, :len(positions)] = positions
+            self._batch_maps[key] = (syns, bits)
+        return self._batch_maps[key]
+
+    def check_batch(self, frames):
+        """
+        Validate and repair a batch of same-length frames in place.
+
+        frames is an (N, 14) or (N, 7) uint8 array. Returns (ok, corrected)
+        arrays: ok is the mask of frames that passed (possibly after repair),
+        corrected the number of bits fixed per frame.
+        """
+        if np is None:
+            raise ImportError("numpy is required for batch CRC checking (pip install numpy)")
+
+        nbits = frames.shape[1] * 8
+        df = frames[:, 0] >> 3
+        syn = self.syndromes_batch(frames)
+        corrected = np.zeros(frames.shape[0], dtype=np.int64)
+
+        if nbits == 112:
+            ok = syn == 0
+            fixable = ~ok & ((df == 17) | (df == 18))
+        else:
+            ok = (syn == 0) | ((df == 11) & (syn < 0x80))
+            fixable = ~ok & (df == 11)
+
+        rows = np.flatnonzero(fixable)
+        if rows.size:
+            syns, bits = self._np_fix_map(nbits)
+            if syns.size:
+                pos = np.minimum(np.searchsorted(syns, syn[rows]), syns.size - 1)
+                hit = syns[pos] == syn[rows]
+                rows, pos = rows[hit], pos[hit]
+                for k in range(2):
+                    bit = bits[pos, k]
+                    use = bit >= 0
+                    r, b = rows[use], bit[use]
+                    frames[r, b // 8] ^= (0x80 >> (b % 8)).astype(np.uint8)
+                    corrected[r] += 1
+                ok[rows] = True
+
+        return ok, corrected
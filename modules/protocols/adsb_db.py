@@ -0,0 +1,274 @@
+import argparse
+import csv
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Offline aircraft database: registration, ICAO type and operator by ICAO
+# address, from a local CSV (OpenSky's aircraftDatabase.csv, tar1090-db's
+# aircraft.csv or anything with similar columns) compiled into a sorted
+# fixed-width index that is memory-mapped, never loaded.
+#
+#   header   16 bytes, HEADER below
+#   keys     count * uint32 LE, the ICAO addresses, ascending
+#   records  count * RECORD, same order as the keys
+#
+# A lookup bisects the key column (a memoryview over the map, so it's C
+# speed and only touches the ~20 pages it looks at) and unpacks one record.
+
+MAGIC = b'RFDB'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI4x')     # magic, version, record size, count
+RECORD = struct.Struct('<12s4s40s')    # registration, type, operator (NUL padded ascii)
+
+# CSV column names we know, first one found wins. A file without any of the
+# ICAO names is taken as headerless in tar1090-db's order:
+# icao;registration;type;flags;description;year;owner/operator
+ICAO_COLUMNS = ('icao24', 'icao', 'hex', 'modes', 'mode_s', 'icao_address')
+REGISTRATION_COLUMNS = ('registration', 'reg', 'r', 'tail')
+TYPE_COLUMNS = ('typecode', 'icaotype', 'icao_type', 'type', 't')
+OPERATOR_COLUMNS = ('operator', 'owner', 'ownop', 'operatoricao', 'airline')
+HEADERLESS_COLUMNS = (0, 1, 2, 6)
+
+
+def _text(value, size):
+    return value.strip().encode('ascii', 'replace')[:size]
+
+
+def _column(header, names):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+def read_csv(path):
+    # (icao int, registration, type, operator) per usable row
+    with open(path, newline='', encoding='utf-8', errors='replace') as f:
+        sample = f.readline()
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        except csv.Error:
+            dialect = csv.excel
+        f.seek(0)
+        reader = csv.reader(f, dialect)
+        first = next(reader, None)
+        if first is None:
+            return
+        header = [name.strip().strip("'").lower() for name in first]
+        icao_col = _column(header, ICAO_COLUMNS)
+        if icao_col is None:
+            columns = HEADERLESS_COLUMNS
+            rows = _chain_first(first, reader)
+        else:
+            columns = (icao_col, _column(header, REGISTRATION_COLUMNS),
+                       _column(header, TYPE_COLUMNS), _column(header, OPERATOR_COLUMNS))
+            rows = reader
+
+        for row in rows:
+            fields = []
+            for col in columns:
+                fields.append(row[col].strip().strip("'") if col is not None and col < len(row) else '')
+            try:
+                icao = int(fields[0], 16)
+            except ValueError:
+                continue
+            if 0 < icao < 1 << 24 and any(fields[1:]):
+                yield icao, fields[1], fields[2], fields[3]
+
+
+def _chain_first(first, reader):
+    yield first
+    yield from reader
+
+
+def build_index(csv_path, index_path):
+    # CSV -> index file (written next to it and renamed over, so readers never see half of one).
+    # Returns the number of aircraft. A later row for the same ICAO replaces an earlier one
+    keys = array('I')
+    records = bytearray()
+    pack = RECORD.pack
+    for icao, registration, type_code, operator in read_csv(csv_path):
+        keys.append(icao)
+        records += pack(_text(registration, 12), _text(type_code.upper(), 4), _text(operator, 40))
+
+    size = RECORD.size
+    order = sorted(range(len(keys)), key=keys.__getitem__)  # stable: duplicates stay in file order
+    out_keys = array('I')
+    out_records = bytearray()
+    for pos, idx in enumerate(order):
+        if pos + 1 < len(order) and keys[order[pos + 1]] == keys[idx]:
+            continue
+        out_keys.append(keys[idx])
+        out_records += records[idx * size:(idx + 1) * size]
+    if sys.byteorder != 'little':
+        out_keys.byteswap()
+
+    tmp = index_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, size, len(out_keys)))
+        f.write(out_keys.tobytes())
+        f.write(out_records)
+    os.replace(tmp, index_path)
+    return len(out_keys)
+
+
+class _BigEndianKeys:
+    # the key column for bisect on a big endian host, where a native cast would read it backwards
+    __slots__ = ('buf', 'count')
+
+    def __init__(self, buf, count):
+        self.buf = buf
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, idx):
+        return struct.unpack_from('<I', self.buf, idx * 4)[0]
+
+
+class AircraftDB:
+    """
+    Lookups in an index made by build_index().
+
+    The file is mapped read only, the OS pages in what gets looked at and
+    can drop it again, so a few hundred MB of database costs next to no
+    RSS. An LRU of the last cache_size answers (misses included, most
+    ICAOs heard aren't in any database) sits in front, so the parser pays
+    a dict lookup for aircraft it has seen recently.
+
+    lookup() returns (registration, type, operator), None for any that is
+    blank, or None when the ICAO isn't there (or the database has been
+    closed: close() takes the same lock, so it waits for a lookup in
+    progress and a parser still holding on to us gets nothing after).
+    """
+
+    def __init__(self, path, cache_size=4096):
+        self.path = path
+        self.cache_size = cache_size
+        self.hits = 0
+        self.lookups = 0
+        self.found = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, record_size, count = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+                raise ValueError(f"{path} is not an aircraft index (or from another version), rebuild it")
+            if len(self._map) < HEADER.size + count * (4 + record_size):
+                raise ValueError(f"{path} is truncated, rebuild it")
+        except (ValueError, struct.error):
+            self._map.close()
+            raise
+        self.count = count
+        self._records = HEADER.size + count * 4
+        self._view = memoryview(self._map)[HEADER.size:self._records]
+        self._keys = self._view.cast('I') if sys.byteorder == 'little' else _BigEndianKeys(self._view, count)
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, icao):
+        # icao as the hex string the table uses
+        with self._lock:
+            if self._map is None:
+                return None
+            self.lookups += 1
+            cache = self._cache
+            if icao in cache:
+                self.hits += 1
+                cache.move_to_end(icao)
+                return cache[icao]
+            info = self._search(icao)
+            cache[icao] = info
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+            return info
+
+    def _search(self, icao):
+        try:
+            key = int(icao, 16)
+        except ValueError:
+            return None
+        keys = self._keys
+        idx = bisect_left(keys, key)
+        if idx >= self.count or keys[idx] != key:
+            return None
+        self.found += 1
+        fields = RECORD.unpack_from(self._map, self._records + idx * RECORD.size)
+        return tuple(field.rstrip(b'\0').decode('ascii', 'replace') or None for field in fields)
+
+    def enrich(self, aircraft):
+        # fill in what the database knows about this aircraft
+        info = self.lookup(aircraft.hex)
+        if info is not None:
+            aircraft.registration, aircraft.aircraft_type, aircraft.operator = info
+
+    def close(self):
+        # views first, the map won't close while they point into it
+        with self._lock:
+            if self._map is None:
+                return
+            if isinstance(self._keys, memoryview):
+                self._keys.release()
+            self._view.release()
+            self._map.close()
+            self._map = None
+            self._cache.clear()
+
+    def stats(self):
+        return {
+            'aircraft': self.count,
+            'lookups': self.lookups,
+            'cache_hits': self.hits,
+            'found': self.found,
+            'cached': len(self._cache),
+        }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="build / query the offline aircraft database index")
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    b = sub.add_parser('build', help="compile a CSV into an index")
+    b.add_argument('csv')
+    b.add_argument('index')
+    q = sub.add_parser('lookup', help="look up ICAO addresses")
+    q.add_argument('index')
+    q.add_argument('icao', nargs='+')
+    args = ap.parse_args(argv)
+
+    if args.cmd == 'build':
+        try:
+            count = build_index(args.csv, args.index)
+        except OSError as e:
+            print(e)
+            return 1
+        print(f"{count} aircraft written to {args.index}")
+        return 0
+
+    try:
+        db = AircraftDB(args.index)
+    except (OSError, ValueError) as e:
+        print(e)
+        return 1
+    for icao in args.icao:
+        info = db.lookup(icao.upper())
+        if info is None:
+            print(f"{icao.upper()}  not found")
+        else:
+            print(f"{icao.upper()}  " + '  '.join(field or '-' for field in info))
+    db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
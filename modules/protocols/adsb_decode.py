@@ -0,0 +1,170 @@
+import math
+
+# Mode S / ADS-B field extraction straight from frame bytes, no text involved.
+# Everything here works on the 56 bit ME field as one int so each field is a
+# shift and a mask.
+
+CALLSIGN_CHARSET = "#ABCDEFGHIJKLMNOPQRSTUVWXYZ##### ###############0123456789######"
+
+
+def frame_df(msg):
+    # downlink format, top 5 bits
+    return msg[0] >> 3
+
+
+def frame_icao(msg):
+    # AA field of DF11/17/18, as the usual upper case hex string
+    return msg[1:4].hex().upper()
+
+
+def decode_ac12(alt):
+    # 12 bit altitude code from airborne position messages, only the 25 ft (Q=1) form
+    if not alt or not (alt & 0x10):
+        return None
+    n = ((alt & 0xfe0) >> 1) | (alt & 0xf)
+    return n * 25 - 1000
+
+
+def decode_callsign(me):
+    chars = [CALLSIGN_CHARSET[(me >> (42 - 6 * k)) & 0x3f] for k in range(8)]
+    callsign = ''.join(chars).replace('#', '').strip()
+    return callsign or None
+
+
+def decode_velocity(me, fields):
+    # TC 19, subtypes 1/2 ground speed, 3/4 air speed
+    subtype = (me >> 48) & 0x7
+
+    if subtype in (1, 2):
+        v_ew = (me >> 32) & 0x3ff
+        v_ns = (me >> 21) & 0x3ff
+        if v_ew and v_ns:
+            scale = 4 if subtype == 2 else 1
+            vx = (v_ew - 1) * scale * (-1 if (me >> 42) & 1 else 1)
+            vy = (v_ns - 1) * scale * (-1 if (me >> 31) & 1 else 1)
+            fields['speed'] = math.hypot(vx, vy)
+            fields['speed_type'] = 'gs'
+            fields['heading'] = math.degrees(math.atan2(vx, vy)) % 360.0
+    elif subtype in (3, 4):
+        if (me >> 42) & 1:
+            fields['heading'] = ((me >> 32) & 0x3ff) * 360.0 / 1024.0
+        airspeed = (me >> 21) & 0x3ff
+        if airspeed:
+            scale = 4 if subtype == 4 else 1
+            fields['speed'] = float((airspeed - 1) * scale)
+            fields['speed_type'] = 'tas' if (me >> 31) & 1 else 'ias'
+
+    vr = (me >> 10) & 0x1ff
+    if vr:
+        fields['v_rate'] = (vr - 1) * 64 * (-1 if (me >> 19) & 1 else 1)
+
+
+def decode_movement(mov):
+    # surface movement field -> ground speed in kt, None if not available
+    if mov == 0 or mov > 124:
+        return None
+    if mov == 1:
+        return 0.0
+    if mov <= 8:
+        return 0.125 + (mov - 2) * 0.125
+    if mov <= 12:
+        return 1.0 + (mov - 9) * 0.25
+    if mov <= 38:
+        return 2.0 + (mov - 13) * 0.5
+    if mov <= 93:
+        return 15.0 + (mov - 39)
+    if mov <= 108:
+        return 70.0 + (mov - 94) * 2
+    if mov <= 123:
+        return 100.0 + (mov - 109) * 5
+    return 175.0
+
+
+def decode_surface_position(me, fields):
+    # TC 5-8, speed and track come with the position
+    speed = decode_movement((me >> 44) & 0x7f)
+    if speed is not None:
+        fields['speed'] = speed
+        fields['speed_type'] = 'gs'
+    if (me >> 43) & 1:
+        fields['heading'] = ((me >> 36) & 0x7f) * 360.0 / 128.0
+    fields['cpr_type'] = 'Surface'
+    fields['cpr_odd'] = bool((me >> 34) & 1)
+    fields['cpr_lat'] = (me >> 17) & 0x1ffff
+    fields['cpr_lon'] = me & 0x1ffff
+
+
+def decode_airborne_position(me, fields, tc):
+    # TC 9-18 (baro alt) and 20-22 (GNSS height, plain metres)
+    alt_code = (me >> 36) & 0xfff
+    if tc >= 20:
+        altitude = int(alt_code * 3.28084) if alt_code else None
+    else:
+        altitude = decode_ac12(alt_code)
+    if altitude is not None:
+        fields['altitude'] = altitude
+    fields['cpr_type'] = 'Airborne'
+    fields['cpr_odd'] = bool((me >> 34) & 1)
+    fields['cpr_lat'] = (me >> 17) & 0x1ffff
+    fields['cpr_lon'] = me & 0x1ffff
+
+
+# DF18 control field values that carry a normal ADS-B ME field
+DF18_ADSB_CF = (0, 1, 2, 5, 6)
+ME_MASK = (1 << 56) - 1
+
+
+def decode_me(df, icao, me):
+    # shared by the bytes and hex paths, everything is shifts on the 56 bit ME int
+    tc = me >> 51
+    fields = {'icao': icao, 'df': df, 'tc': tc}
+
+    if 1 <= tc <= 4:
+        callsign = decode_callsign(me)
+        if callsign:
+            fields['callsign'] = callsign
+    elif 5 <= tc <= 8:
+        decode_surface_position(me, fields)
+    elif 9 <= tc <= 18 or 20 <= tc <= 22:
+        decode_airborne_position(me, fields, tc)
+    elif tc == 19:
+        decode_velocity(me, fields)
+
+    return fields
+
+
+def decode_frame(msg):
+    # decode a raw Mode S frame (bytes) into a flat field dict, None if we don't handle it
+    if len(msg) != 14:
+        return None
+    df = msg[0] >> 3
+    if df != 17 and not (df == 18 and (msg[0] & 0x7) in DF18_ADSB_CF):
+        return None
+    return decode_me(df, frame_icao(msg), int.from_bytes(msg[4:11], 'big'))
+
+
+def decode_hex_frames(lines, crc=None):
+    # batch decode of readsb raw lines ("*8d4840d6202cc371c32ce0576098;"), one int() per
+    # frame and the rest is bit ops. returns a list of field dicts for the DF17/18 ones.
+    # pass a ModeSCRC to have every frame checked (and repaired) first
+    out = []
+    append = out.append
+    for line in lines:
+        # 112 bit frame = 28 hex digits, plus the * and ;
+        if len(line) != 30:
+            continue
+        try:
+            if crc is None:
+                value = int(line[1:29], 16)
+            else:
+                msg, _ = crc.check(bytes.fromhex(line[1:29]))
+                if msg is None:
+                    continue
+                value = int.from_bytes(msg, 'big')
+        except ValueError:
+            continue
+        df = value >> 107
+        if df != 17 and not (df == 18 and ((value >> 104) & 0x7) in DF18_ADSB_CF):
+            continue
+        append(decode_me(df, '%06X' % ((value >> 80) & 0xffffff), (value >> 24) & ME_MASK))
+    return out
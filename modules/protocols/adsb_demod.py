@@ -0,0 +1,260 @@
+import subprocess
+import time
+
+from .adsb_crc import ModeSCRC
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only the native decoder needs it
+    np = None
+
+
+class ModeSDemodulator:
+    """
+    Native Mode S / ADS-B demodulator
+
+    Works directly on interleaved int8 IQ samples at 2 MS/s, the format
+    hackrf_transfer writes (both live on stdout and in the .iq recordings
+    made by RFReplay). Preamble search and bit slicing are vectorized over
+    whole chunks so the per-sample work never touches the interpreter.
+    """
+
+    SAMPLE_RATE = 2000000
+    PREAMBLE_SAMPLES = 16           # 8 us preamble at 2 samples/us
+    LONG_BITS = 112
+    SHORT_BITS = 56
+    FRAME_SAMPLES = PREAMBLE_SAMPLES + LONG_BITS * 2
+
+    # downlink formats we know how to size, anything else is noise
+    SHORT_DFS = (0, 4, 5, 11)
+    LONG_DFS = (16, 17, 18, 19, 20, 21, 24)
+    # formats whose parity is CRC XOR the aircraft address
+    ADDRESS_PARITY_DFS = (0, 4, 5, 16, 20, 21, 24)
+    # how long an address seen in DF11/17/18 stays valid for address/parity frames
+    KNOWN_ICAO_TTL = 60.0
+
+    def __init__(self, chunk_samples=262144, min_level=400, max_weak_bits=10, crc_fix_bits=1):
+        if np is None:
+            raise ImportError("numpy is required for the native ADS-B demodulator (pip install numpy)")
+
+        self.chunk_samples = chunk_samples
+        # preamble high level must beat this (magnitude units, see _build_mag_lut)
+        self.min_level = min_level
+        # bits whose two halves are this close are "weak", too many and we drop the frame
+        self.max_weak_bits = max_weak_bits
+
+        self._mag_lut = self._build_mag_lut()
+        self._bit_offsets = self.PREAMBLE_SAMPLES + 2 * np.arange(self.LONG_BITS)
+        self._valid_df = np.zeros(32, dtype=bool)
+        self._valid_df[list(self.SHORT_DFS + self.LONG_DFS)] = True
+        self._ap_df = np.zeros(32, dtype=bool)
+        self._ap_df[list(self.ADDRESS_PARITY_DFS)] = True
+
+        self.crc = ModeSCRC(max_fix_bits=crc_fix_bits)
+        # icao int -> sample index last seen, for accepting address/parity frames
+        self.known_icaos = {}
+
+        self.reset()
+
+    def reset(self):
+        # carry over from the previous chunk so frames across the boundary aren't lost
+        self._tail = np.zeros(0, dtype=np.uint16)
+        self._pending_byte = np.zeros(0, dtype=np.uint8)
+        self.samples_processed = 0
+        self.frames_decoded = 0
+        self.frames_corrected = 0
+        self.preambles_seen = 0
+        self.started = time.time()
+
+    def _build_mag_lut(self):
+        # magnitude for every possible (I, Q) int8 pair, indexed by the raw
+        # little endian uint16 so one gather converts a whole chunk
+        raw = np.arange(65536, dtype=np.uint32)
+        i = (raw & 0xff).astype(np.uint8).view(np.int8).astype(np.float32)
+        q = (raw >> 8).astype(np.uint8).view(np.int8).astype(np.float32)
+        # max is sqrt(2 * 128^2) ~= 181, scale by 256 to stay inside uint16
+        return np.minimum(np.sqrt(i * i + q * q) * 256.0, 65535).astype(np.uint16)
+
+    def magnitude(self, iq_bytes):
+        # interleaved int8 IQ (bytes / bytearray / ndarray) -> uint16 magnitude
+        raw = np.frombuffer(iq_bytes, dtype=np.uint8)
+        # pipes can hand us half an IQ pair, hold the stray byte for the next chunk
+        if self._pending_byte.size:
+            raw = np.concatenate((self._pending_byte, raw))
+        if raw.size & 1:
+            self._pending_byte = raw[-1:].copy()
+            raw = raw[:-1]
+        else:
+            self._pending_byte = raw[:0].copy()
+        return self._mag_lut[raw.view('<u2')]
+
+    def _find_preambles(self, m):
+        # dump1090 style 2 MHz preamble check, done for every offset at once
+        n = m.size - self.FRAME_SAMPLES + 1
+        if n <= 0:
+            return np.zeros(0, dtype=np.int64)
+
+        s = [m[k:k + n].astype(np.int32) for k in range(15)]
+
+        mask = (s[0] > s[1]) & (s[1] < s[2]) & (s[2] > s[3]) & (s[3] < s[0])
+        mask &= (s[4] < s[0]) & (s[5] < s[0]) & (s[6] < s[0])
+        mask &= (s[7] > s[8]) & (s[8] < s[9]) & (s[9] > s[6])
+
+        # quiet zones have to sit well under the pulse level
+        high = (s[0] + s[2] + s[7] + s[9]) // 6
+        mask &= high > self.min_level
+        for k in (4, 5, 11, 12, 13, 14):
+            mask &= s[k] < high
+
+        return np.flatnonzero(mask)
+
+    def _slice_frames(self, m, starts):
+        # pulse position decode for all candidates in one go: bit = first half > second half
+        idx = starts[:, None] + self._bit_offsets[None, :]
+        first = m[idx].astype(np.int32)
+        second = m[idx + 1].astype(np.int32)
+        bits = (first > second).astype(np.uint8)
+
+        # level of the whole frame, weak bits are ones we can't tell apart
+        level = np.maximum(first, second)
+        weak = np.abs(first - second) * 4 < level
+
+        frames = np.packbits(bits, axis=1)
+        return frames, weak
+
+    def process(self, iq_bytes):
+        # demodulate one chunk, returns a list of (sample_index, frame_bytes)
+        mag = self.magnitude(iq_bytes)
+        chunk_start = self.samples_processed
+        self.samples_processed += mag.size
+
+        if self._tail.size:
+            mag = np.concatenate((self._tail, mag))
+        base = chunk_start - self._tail.size
+
+        # keep the unsearched end for next time
+        keep_from = max(0, mag.size - self.FRAME_SAMPLES + 1)
+        self._tail = mag[keep_from:].copy()
+        return self._decode(mag, base)
+
+    def flush(self):
+        # end of input: search what's left in the tail, zero padded to a full frame.
+        # Frames that really ended with the input decode, the padding fails the CRC
+        if not self._tail.size:
+            return []
+        base = self.samples_processed - self._tail.size
+        mag = np.concatenate((self._tail, np.zeros(self.FRAME_SAMPLES - 1, dtype=np.uint16)))
+        self._tail = self._tail[:0]
+        return self._decode(mag, base)
+
+    def _decode(self, mag, base):
+        # every frame whose preamble starts in mag, mag[0] being sample number base
+        starts = self._find_preambles(mag)
+        if not starts.size:
+            return []
+        self.preambles_seen += starts.size
+
+        frames, weak = self._slice_frames(mag, starts)
+        df = frames[:, 0] >> 3
+        long_frame = df >= 16
+
+        # weak bit count only over the bits that belong to the frame
+        weak_long = weak.sum(axis=1)
+        weak_short = weak[:, :self.SHORT_BITS].sum(axis=1)
+        weak_count = np.where(long_frame, weak_long, weak_short)
+        plausible = self._valid_df[df] & (weak_count <= self.max_weak_bits)
+
+        # CRC decides what's real, repairs go straight into the frame bytes
+        good = {}
+        for is_long, nbytes in ((True, 14), (False, 7)):
+            rows = np.flatnonzero(plausible & (long_frame == is_long))
+            if not rows.size:
+                continue
+            batch = np.ascontiguousarray(frames[rows, :nbytes])
+            ok, corrected = self.crc.check_batch(batch)
+            syn = self.crc.syndromes_batch(batch)
+            for k, row in enumerate(rows.tolist()):
+                if ok[k]:
+                    good[row] = (batch[k].tobytes(), int(corrected[k]))
+                elif self._ap_df[df[row]]:
+                    # address/parity: only believe it if we've heard from that address
+                    seen = self.known_icaos.get(int(syn[k]))
+                    if seen is not None and base + starts[row] - seen <= self.KNOWN_ICAO_TTL * self.SAMPLE_RATE:
+                        good[row] = (batch[k].tobytes(), 0)
+
+        results = []
+        next_free = -1
+        for row in sorted(good):
+            # a real frame tends to trigger neighbouring offsets, take the first one
+            start = int(starts[row])
+            if start < next_free:
+                continue
+            frame, corrected = good[row]
+            sample_idx = base + start
+            results.append((sample_idx, frame))
+            self.frames_corrected += corrected > 0
+            if frame[0] >> 3 in (11, 17, 18):
+                self.known_icaos[int.from_bytes(frame[1:4], 'big')] = sample_idx
+            next_free = start + self.PREAMBLE_SAMPLES + len(frame) * 16
+
+        if len(self.known_icaos) > 10000:
+            cutoff = self.samples_processed - self.KNOWN_ICAO_TTL * self.SAMPLE_RATE
+            self.known_icaos = {k: v for k, v in self.known_icaos.items() if v >= cutoff}
+
+        self.frames_decoded += len(results)
+        return results
+
+    def iter_stream(self, stream):
+        # read a binary stream (file or pipe) chunk by chunk and yield decoded frames
+        buf = bytearray(self.chunk_samples * 2)
+        view = memoryview(buf)
+        while True:
+            n = stream.readinto(buf)
+            if not n:
+                break
+            for frame in self.process(view[:n]):
+                yield frame
+        yield from self.flush()
+
+    def iter_file(self, path):
+        with open(path, 'rb') as f:
+            yield from self.iter_stream(f)
+
+    def hackrf_command(self, freq=1090000000, gain=20, lna_gain=32):
+        # hackrf_transfer streaming raw samples to stdout
+        return [
+            'hackrf_transfer',
+            '-r', '-',
+            '-f', str(int(freq)),
+            '-s', str(self.SAMPLE_RATE),
+            '-g', str(gain),
+            '-l', str(lna_gain),
+            '-a', '1',
+        ]
+
+    def open_hackrf(self, freq=1090000000, gain=20, lna_gain=32):
+        return subprocess.Popen(
+            self.hackrf_command(freq, gain, lna_gain),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+
+    def stats(self):
+        # throughput numbers, handy for comparing against readsb
+        elapsed = max(time.time() - self.started, 1e-6)
+        signal_seconds = self.samples_processed / self.SAMPLE_RATE
+        return {
+            'elapsed': elapsed,
+            'samples': self.samples_processed,
+            'preambles': self.preambles_seen,
+            'frames': self.frames_decoded,
+            'corrected': self.frames_corrected,
+            'frames_per_sec': self.frames_decoded / elapsed,
+            'realtime_factor': signal_seconds / elapsed,
+        }
+
+    @staticmethod
+    def frame_to_hex(frame):
+        # same "*...;" form readsb prints for raw frames
+        return '*' + frame.hex() + ';'
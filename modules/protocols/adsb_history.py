@@ -0,0 +1,508 @@
+import argparse
+import datetime
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+
+SCHEMA = """
+-- clustered by aircraft, so one track (or a slice of it) is a contiguous read
+CREATE TABLE IF NOT EXISTS positions (
+    ts    INTEGER NOT NULL,   -- epoch ms
+    icao  INTEGER NOT NULL,   -- 24 bit address
+    lat   INTEGER NOT NULL,   -- deg * 1e5
+    lon   INTEGER NOT NULL,   -- deg * 1e5
+    alt   INTEGER,            -- ft
+    gs    INTEGER,            -- kt
+    track INTEGER,            -- deg
+    vrate INTEGER,            -- ft/min
+    PRIMARY KEY (icao, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS positions_ts ON positions (ts);
+CREATE TABLE IF NOT EXISTS idents (
+    ts       INTEGER NOT NULL,
+    icao     INTEGER NOT NULL,
+    callsign TEXT,
+    squawk   TEXT
+);
+CREATE INDEX IF NOT EXISTS idents_icao_ts ON idents (icao, ts);
+CREATE INDEX IF NOT EXISTS idents_ts ON idents (ts);
+-- spatial index: which aircraft were in which grid cell during which time bucket
+CREATE TABLE IF NOT EXISTS cells (
+    bucket INTEGER NOT NULL,  -- ts // PARTITION_SECONDS
+    cell   INTEGER NOT NULL,  -- grid row * GRID_COLS + grid col
+    icao   INTEGER NOT NULL,
+    PRIMARY KEY (bucket, cell, icao)
+) WITHOUT ROWID;
+"""
+
+COORD_SCALE = 100000.0
+# spatial index granularity: 10 minute buckets of 0.1 deg cells
+PARTITION_SECONDS = 600
+GRID_DEG = 0.1
+GRID_UNITS = int(round(GRID_DEG * COORD_SCALE))
+GRID_COLS = int(round(360 / GRID_DEG))
+EARTH_RADIUS_KM = 6371.0
+
+
+def grid_row(lat):
+    # lat in deg * 1e5
+    return (lat + 90 * 100000) // GRID_UNITS
+
+
+def grid_col(lon):
+    return ((lon + 180 * 100000) // GRID_UNITS) % GRID_COLS
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    # haversine, degrees in
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _int_or_none(value):
+    return None if value is None else int(round(value))
+
+
+class TrackStore:
+    """
+    Append-only history of decoded positions, in SQLite (WAL mode).
+
+    The parser thread only ever appends a tuple to an in-memory deque,
+    it never touches the database. A writer thread swaps the deque out
+    every flush_interval seconds and writes it in one transaction
+    (executemany), so disk speed can't stall ingest: if the writer falls
+    behind by more than max_pending rows the oldest are dropped and
+    counted.
+
+    Size is bounded three ways:
+      - at most one sample per aircraft per `interval` seconds (a new
+        callsign/squawk always gets an ident row)
+      - rows older than retention_hours are deleted
+      - above max_mb the oldest hour is deleted until it fits again
+    Freed pages are reused, so the file stops growing at the cap. A sample
+    is ~70 bytes on disk including the indexes: 500 aircraft sampled every
+    5 s is ~8.6M rows, ~600 MB a day.
+
+    Spatial queries (near, in_box) go through the cells table, built as
+    samples are flushed: one row per aircraft per 0.1 deg grid cell per 10
+    minute bucket. A query turns its time window and bounding box into
+    (bucket, cell range) seeks, gets back which aircraft were there in
+    which buckets, and only reads those slices of their tracks for the
+    exact filter. Cost follows the size of the answer, not of the history.
+    """
+
+    PRUNE_EVERY = 60.0
+
+    def __init__(self, path, interval=5.0, retention_hours=48.0, max_mb=1024.0,
+                 flush_interval=1.0, max_pending=200000):
+        self.path = str(path)
+        self.interval = interval
+        self.retention_hours = retention_hours
+        self.max_mb = max_mb
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending = deque(maxlen=max_pending)
+        # append vs swap, so a full deque's drops are counted exactly
+        self._pending_lock = threading.Lock()
+        # icao -> [last sample ts, callsign, squawk] for thinning, pruned with the table
+        self._last = {}
+        self._last_prune_ts = 0.0
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.deleted = 0
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._read_conn = None
+        self._read_lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        # WAL + NORMAL: a crash can lose the last commit, never corrupt the file
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    # ---------------- ingest side (parser thread) ---------------- #
+
+    def add_position(self, aircraft, ts, lat=None, lon=None):
+        """
+        Record a fix of aircraft at ts (epoch seconds), by default its
+        current lat/lon. Cheap: a dict lookup, and one deque append when a
+        sample is due.
+        """
+        icao = aircraft.hex
+        last = self._last.get(icao)
+        if last is not None and ts - last[0] < self.interval:
+            return
+        if ts - self._last_prune_ts >= self.PRUNE_EVERY:
+            self._prune_last(ts)
+
+        code = int(icao, 16)
+        ms = int(ts * 1000)
+        callsign = aircraft.callsign
+        squawk = aircraft.squawk
+        rows = []
+        if last is None or last[1] != callsign or last[2] != squawk:
+            rows.append(('i', ms, code, callsign, squawk))
+        self._last[icao] = [ts, callsign, squawk]
+        rows.append((
+            'p', ms, code,
+            int(round((aircraft.lat if lat is None else lat) * COORD_SCALE)),
+            int(round((aircraft.lon if lon is None else lon) * COORD_SCALE)),
+            aircraft.altitude, _int_or_none(aircraft.speed),
+            _int_or_none(aircraft.heading), aircraft.v_rate,
+        ))
+        self.queued += len(rows)
+        with self._pending_lock:
+            pending = self._pending
+            for row in rows:
+                if len(pending) == self.max_pending:
+                    # writer is behind, the deque drops its oldest to make room
+                    self.dropped += 1
+                pending.append(row)
+
+    def _prune_last(self, ts):
+        # forget aircraft not sampled for a while, same idea as the table's expiry
+        self._last_prune_ts = ts
+        cutoff = ts - max(self.interval * 2, 120.0)
+        self._last = {icao: last for icao, last in self._last.items() if last[0] >= cutoff}
+
+    # ---------------- writer thread ---------------- #
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # flushes whatever is still pending
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+            self._thread = None
+        if self._read_conn is not None:
+            self._read_conn.close()
+            self._read_conn = None
+
+    def _run(self):
+        conn = self._connect()
+        last_prune = time.monotonic()
+        try:
+            while not self._stop.wait(self.flush_interval):
+                self.flush(conn)
+                if time.monotonic() - last_prune >= self.PRUNE_EVERY:
+                    last_prune = time.monotonic()
+                    self.prune(conn)
+            self.flush(conn)
+        finally:
+            conn.close()
+
+    def flush(self, conn):
+        # move everything pending to disk in one transaction
+        with self._pending_lock:
+            pending, self._pending = self._pending, deque(maxlen=self.max_pending)
+        positions = []
+        idents = []
+        cells = set()
+        bucket_ms = PARTITION_SECONDS * 1000
+        for row in pending:
+            if row[0] == 'p':
+                positions.append(row[1:])
+                cells.add((row[1] // bucket_ms, grid_row(row[3]) * GRID_COLS + grid_col(row[4]), row[2]))
+            else:
+                idents.append(row[1:])
+        if not positions and not idents:
+            return 0
+        with conn:
+            conn.executemany('INSERT OR IGNORE INTO positions VALUES (?, ?, ?, ?, ?, ?, ?, ?)', positions)
+            conn.executemany('INSERT INTO idents VALUES (?, ?, ?, ?)', idents)
+            conn.executemany('INSERT OR IGNORE INTO cells VALUES (?, ?, ?)', cells)
+        self.written += len(positions) + len(idents)
+        return len(positions) + len(idents)
+
+    def prune(self, conn):
+        # retention by age (relative to the newest sample, so replayed logs age right), then by size
+        newest = conn.execute('SELECT MAX(ts) FROM positions').fetchone()[0]
+        if newest is None:
+            return
+        cutoff = newest - int(self.retention_hours * 3600 * 1000)
+        self._delete_before(conn, cutoff)
+
+        limit = self.max_mb * 1024 * 1024
+        while self.db_bytes(conn) > limit:
+            oldest = conn.execute('SELECT MIN(ts) FROM positions').fetchone()[0]
+            if oldest is None or oldest >= newest:
+                break
+            self._delete_before(conn, min(oldest + 3600 * 1000, newest))
+
+    def _delete_before(self, conn, cutoff):
+        with conn:
+            deleted = conn.execute('DELETE FROM positions WHERE ts < ?', (cutoff,)).rowcount
+            deleted += conn.execute('DELETE FROM idents WHERE ts < ?', (cutoff,)).rowcount
+            # buckets that are only partly expired stay, the position filter sorts that out
+            conn.execute('DELETE FROM cells WHERE bucket < ?', (cutoff // (PARTITION_SECONDS * 1000),))
+        self.deleted += deleted
+
+    @staticmethod
+    def db_bytes(conn):
+        # pages in use, free pages get reused before the file grows
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        used = conn.execute('PRAGMA page_count').fetchone()[0] - conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return used * page_size
+
+    # ---------------- queries ---------------- #
+
+    def _query(self, sql, args=()):
+        with self._read_lock:
+            if self._read_conn is None:
+                self._read_conn = self._connect()
+            return self._read_conn.execute(sql, args).fetchall()
+
+    @staticmethod
+    def _position_row(row):
+        ts, icao, lat, lon, alt, gs, track, vrate = row
+        return {
+            'ts': ts / 1000.0, 'hex': f"{icao:06X}",
+            'lat': lat / COORD_SCALE, 'lon': lon / COORD_SCALE,
+            'altitude': alt, 'speed': gs, 'heading': track, 'v_rate': vrate,
+        }
+
+    def track(self, icao, start=None, end=None):
+        # one aircraft's samples in time order, start/end in epoch seconds
+        start_ms = 0 if start is None else int(start * 1000)
+        end_ms = (1 << 62) if end is None else int(end * 1000)
+        rows = self._query('SELECT * FROM positions WHERE icao = ? AND ts BETWEEN ? AND ? ORDER BY ts',
+                           (int(icao, 16), start_ms, end_ms))
+        return [self._position_row(r) for r in rows]
+
+    def positions_between(self, start, end):
+        # every sample in [start, end], time order
+        rows = self._query('SELECT * FROM positions WHERE ts BETWEEN ? AND ? ORDER BY ts',
+                           (int(start * 1000), int(end * 1000)))
+        return [self._position_row(r) for r in rows]
+
+    def idents(self, icao):
+        # (ts, callsign, squawk) changes for one aircraft
+        rows = self._query('SELECT ts, callsign, squawk FROM idents WHERE icao = ? ORDER BY ts', (int(icao, 16),))
+        return [(ts / 1000.0, callsign, squawk) for ts, callsign, squawk in rows]
+
+    # ---------------- spatial queries ---------------- #
+
+    def in_box(self, lat_min, lat_max, lon_min, lon_max, start, end, min_alt=None, max_alt=None):
+        """
+        Aircraft seen inside a lat/lon box between start and end (epoch s),
+        optionally within an altitude band (ft). lon_min > lon_max means the
+        box crosses the antimeridian. Returns {hex: [samples in the box]}.
+        """
+        box = (int(math.floor(lat_min * COORD_SCALE)), int(math.ceil(lat_max * COORD_SCALE)),
+               int(math.floor(lon_min * COORD_SCALE)), int(math.ceil(lon_max * COORD_SCALE)))
+        return self._search(box, start, end, min_alt, max_alt)
+
+    def near(self, lat, lon, radius_km, start, end, min_alt=None, max_alt=None):
+        """
+        Aircraft that came within radius_km of (lat, lon) between start and
+        end. Returns {hex: [samples inside the circle]}.
+        """
+        dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        lat_min = max(-90.0, lat - dlat)
+        lat_max = min(90.0, lat + dlat)
+        if lat_min <= -90.0 or lat_max >= 90.0:
+            lon_min, lon_max = -180.0, 180.0
+        else:
+            dlon = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(lat)))))
+            lon_min = (lon - dlon + 180.0) % 360.0 - 180.0
+            lon_max = (lon + dlon + 180.0) % 360.0 - 180.0
+            if dlon >= 180.0:
+                lon_min, lon_max = -180.0, 180.0
+        found = self.in_box(lat_min, lat_max, lon_min, lon_max, start, end, min_alt, max_alt)
+        result = {}
+        for icao, samples in found.items():
+            inside = [s for s in samples if distance_km(lat, lon, s['lat'], s['lon']) <= radius_km]
+            if inside:
+                result[icao] = inside
+        return result
+
+    def _search(self, box, start, end, min_alt, max_alt):
+        # grid index -> candidate aircraft, then their samples filtered exactly
+        lat_min, lat_max, lon_min, lon_max = box
+        start_ms = int(start * 1000)
+        end_ms = int(end * 1000)
+        bucket_ms = PARTITION_SECONDS * 1000
+
+        # grid column ranges, split in two if the box wraps around 180
+        col_lo = grid_col(lon_min)
+        col_hi = grid_col(min(lon_max, 180 * 100000 - 1))
+        if lon_min <= lon_max:
+            col_ranges = [(col_lo, col_hi)]
+        else:
+            col_ranges = [(col_lo, GRID_COLS - 1), (0, col_hi)]
+        ranges = [
+            (bucket, row * GRID_COLS + lo, row * GRID_COLS + hi)
+            for bucket in range(start_ms // bucket_ms, end_ms // bucket_ms + 1)
+            for row in range(grid_row(lat_min), grid_row(lat_max) + 1)
+            for lo, hi in col_ranges
+        ]
+
+        with self._read_lock:
+            conn = self._read_conn = self._read_conn or self._connect()
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS ranges (bucket INTEGER, lo INTEGER, hi INTEGER)')
+            conn.execute('DELETE FROM temp.ranges')
+            conn.executemany('INSERT INTO temp.ranges VALUES (?, ?, ?)', ranges)
+            hits = conn.execute(
+                'SELECT DISTINCT c.icao, c.bucket FROM temp.ranges r CROSS JOIN cells c '
+                'ON c.bucket = r.bucket AND c.cell BETWEEN r.lo AND r.hi').fetchall()
+
+            # only read each aircraft's samples from the buckets the grid matched,
+            # consecutive buckets merged into one span
+            hits.sort()
+            spans = []
+            for icao, bucket in hits:
+                lo = max(bucket * bucket_ms, start_ms)
+                hi = min((bucket + 1) * bucket_ms - 1, end_ms)
+                if spans and spans[-1][0] == icao and spans[-1][2] + 1 >= lo:
+                    spans[-1][2] = hi
+                else:
+                    spans.append([icao, lo, hi])
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS spans (icao INTEGER, lo INTEGER, hi INTEGER)')
+            conn.execute('DELETE FROM temp.spans')
+            conn.executemany('INSERT INTO temp.spans VALUES (?, ?, ?)', spans)
+
+            if lon_min <= lon_max:
+                lon_sql = 'p.lon BETWEEN ? AND ?'
+            else:
+                lon_sql = '(p.lon >= ? OR p.lon <= ?)'
+            sql = ('SELECT p.* FROM temp.spans s CROSS JOIN positions p '
+                   'ON p.icao = s.icao AND p.ts BETWEEN s.lo AND s.hi '
+                   'WHERE p.lat BETWEEN ? AND ? AND ' + lon_sql)
+            args = [lat_min, lat_max, lon_min, lon_max]
+            if min_alt is not None:
+                sql += ' AND p.alt >= ?'
+                args.append(min_alt)
+            if max_alt is not None:
+                sql += ' AND p.alt <= ?'
+                args.append(max_alt)
+
+            result = {}
+            for row in conn.execute(sql, args):
+                sample = self._position_row(row)
+                result.setdefault(sample['hex'], []).append(sample)
+        return result
+
+    def rebuild_index(self):
+        # (re)fill the grid index from the stored positions, for databases written before it existed
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM cells')
+                conn.execute(
+                    'INSERT OR IGNORE INTO cells SELECT ts / ?, '
+                    '((lat + 9000000) / ?) * ? + ((lon + 18000000) / ?) % ?, icao FROM positions',
+                    (PARTITION_SECONDS * 1000, GRID_UNITS, GRID_COLS, GRID_UNITS, GRID_COLS))
+        finally:
+            conn.close()
+
+    def pending(self):
+        return len(self._pending)
+
+    def stats(self):
+        return {
+            'pending': len(self._pending),
+            'queued': self.queued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'deleted': self.deleted,
+        }
+
+
+def parse_time(value):
+    # epoch seconds, or a local ISO date/time like "2026-05-01 14:00"
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def _print_matches(found):
+    for icao, samples in sorted(found.items()):
+        first, last = samples[0], samples[-1]
+        alts = [s['altitude'] for s in samples if s['altitude'] is not None]
+        alt = f"{min(alts)}-{max(alts)} ft" if alts else "alt n/a"
+        print(f"{icao}  {datetime.datetime.fromtimestamp(first['ts']):%Y-%m-%d %H:%M:%S} -> "
+              f"{datetime.datetime.fromtimestamp(last['ts']):%H:%M:%S}  {len(samples):>5} samples  {alt}")
+    print(f"{len(found)} aircraft")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="query a recorded ADS-B track history")
+    ap.add_argument('db', help="history database (history_path in the ADS-B config)")
+    sub = ap.add_subparsers(dest='command', required=True)
+
+    def add_window(p):
+        p.add_argument('--start', type=parse_time, help="epoch s or local ISO time (default: end - 1 h)")
+        p.add_argument('--end', type=parse_time, help="epoch s or local ISO time (default: now)")
+        p.add_argument('--min-alt', type=int, help="ft")
+        p.add_argument('--max-alt', type=int, help="ft")
+
+    p = sub.add_parser('near', help="aircraft within KM of a point")
+    p.add_argument('lat', type=float)
+    p.add_argument('lon', type=float)
+    p.add_argument('km', type=float)
+    add_window(p)
+    p = sub.add_parser('box', help="aircraft inside a lat/lon box")
+    for name in ('lat_min', 'lat_max', 'lon_min', 'lon_max'):
+        p.add_argument(name, type=float)
+    add_window(p)
+    p = sub.add_parser('track', help="one aircraft's samples")
+    p.add_argument('hex')
+    p.add_argument('--start', type=parse_time)
+    p.add_argument('--end', type=parse_time)
+    sub.add_parser('reindex', help="rebuild the spatial index from the stored positions")
+    args = ap.parse_args(argv)
+
+    store = TrackStore(args.db)
+    try:
+        if args.command == 'reindex':
+            store.rebuild_index()
+            return 0
+        if args.command == 'track':
+            for s in store.track(args.hex, args.start, args.end):
+                print(f"{datetime.datetime.fromtimestamp(s['ts']):%Y-%m-%d %H:%M:%S}  {s['lat']:.5f} {s['lon']:.5f}  "
+                      f"{s['altitude']} ft  {s['speed']} kt  {s['heading']} deg")
+            for ts, callsign, squawk in store.idents(args.hex):
+                print(f"{datetime.datetime.fromtimestamp(ts):%Y-%m-%d %H:%M:%S}  ident {callsign or '-'} squawk {squawk or '-'}")
+            return 0
+
+        end = time.time() if args.end is None else args.end
+        start = end - 3600 if args.start is None else args.start
+        started = time.perf_counter()
+        if args.command == 'near':
+            found = store.near(args.lat, args.lon, args.km, start, end, args.min_alt, args.max_alt)
+        else:
+            found = store.in_box(args.lat_min, args.lat_max, args.lon_min, args.lon_max,
+                                 start, end, args.min_alt, args.max_alt)
+        _print_matches(found)
+        print(f"query took {(time.perf_counter() - started) * 1e3:.1f} ms")
+        return 0
+    finally:
+        store.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
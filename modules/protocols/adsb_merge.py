@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class FrameDeduplicator:
+    """
+    Drops Mode S frames already heard by another receiver.
+
+    The raw frame bytes are the key (a dict hash of the bytes), so the same
+    transmission picked up by several receivers collapses to one. Entries
+    sit in arrival order and are expired from the front once they are older
+    than the window, so memory is bounded by traffic * window. Age is taken
+    from the local monotonic clock, not the receivers' timestamps: those
+    come from different clocks and one running ahead would expire
+    everybody else's frames early.
+
+    Every entry remembers which receiver heard it first and whether any
+    other one heard it too. When it expires unshared, that receiver gets
+    one in exclusive[source], the frames nobody else picked up.
+    """
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self.exclusive = {}
+        # msg -> [arrival time, first source, heard by another source too]
+        self._seen = OrderedDict()
+
+    def is_duplicate(self, msg, source=None, now=None):
+        seen = self._seen
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+
+        entry = seen.get(msg)
+        if entry is not None:
+            if source != entry[1]:
+                entry[2] = True
+            return True
+        seen[msg] = [now, source, False]
+        return False
+
+    def expire(self, now=None):
+        # drop everything older than the window, oldest first
+        seen = self._seen
+        cutoff = (time.monotonic() if now is None else now) - self.window
+        exclusive = self.exclusive
+        while seen:
+            entry = next(iter(seen.values()))
+            if entry[0] >= cutoff:
+                break
+            seen.popitem(last=False)
+            if not entry[2]:
+                exclusive[entry[1]] = exclusive.get(entry[1], 0) + 1
+
+    def __len__(self):
+        return len(self._seen)
+
+
+class ReceiverStats:
+    # message counters for one feed, rates are worked out over the time since the last snapshot
+
+    def __init__(self, name):
+        self.name = name
+        self.messages = 0
+        self.first = 0
+        self.unique = 0
+        self._last_time = time.time()
+        self._last_messages = 0
+        self._last_first = 0
+        self._last_unique = 0
+        self.msg_rate = 0.0
+        self.first_rate = 0.0
+        self.unique_rate = 0.0
+
+    def snapshot(self, now=None):
+        now = time.time() if now is None else now
+        elapsed = now - self._last_time
+        if elapsed >= 1.0:
+            self.msg_rate = (self.messages - self._last_messages) / elapsed
+            self.first_rate = (self.first - self._last_first) / elapsed
+            self.unique_rate = (self.unique - self._last_unique) / elapsed
+            self._last_time = now
+            self._last_messages = self.messages
+            self._last_first = self.first
+            self._last_unique = self.unique
+        return {
+            'name': self.name,
+            'messages': self.messages,
+            'first': self.first,
+            'unique': self.unique,
+            'msg_rate': self.msg_rate,
+            'first_rate': self.first_rate,
+            'unique_rate': self.unique_rate,
+        }
+
+
+class MultiReceiverMerger:
+    """
+    Fans several Beast feeds into one handler.
+
+    Every feed gets its own callback from feed_callback(name). Batches are
+    de-duplicated under one lock and the surviving frames passed on to
+    handler, so the shared aircraft table only ever sees one writer at a
+    time and each transmission once.
+
+    Per receiver, "first" counts the frames it delivered before anyone
+    else (its share of the merged stream, which goes to whoever is
+    quickest), "unique" the frames no other receiver heard at all, i.e.
+    the coverage the merge would lose without it. A frame is only known to
+    be unique once it leaves the dedup window, so that count trails by a
+    window.
+    """
+
+    def __init__(self, handler, window=1.0):
+        self.handler = handler
+        self.dedup = FrameDeduplicator(window)
+        self.receivers = OrderedDict()
+        self.duplicates = 0
+        self._lock = threading.Lock()
+
+    def add_receiver(self, name):
+        self.receivers[name] = ReceiverStats(name)
+        return self.feed_callback(name)
+
+    def feed_callback(self, name):
+        def callback(batch):
+            self.feed(name, batch)
+        return callback
+
+    def feed(self, name, batch):
+        # batch of (timestamp, signal, message_bytes) from one receiver
+        stats = self.receivers[name]
+        with self._lock:
+            is_duplicate = self.dedup.is_duplicate
+            now = time.monotonic()
+            fresh = []
+            for frame in batch:
+                if is_duplicate(frame[2], name, now):
+                    continue
+                fresh.append(frame)
+            stats.messages += len(batch)
+            stats.first += len(fresh)
+            self.duplicates += len(batch) - len(fresh)
+            if fresh:
+                self.handler(fresh)
+
+    def stats(self):
+        # per receiver counters and rates, plus each one's share of the merged stream
+        now = time.time()
+        with self._lock:
+            # a quiet feed shouldn't hold back the unique counts
+            self.dedup.expire()
+            for name, stats in self.receivers.items():
+                stats.unique = self.dedup.exclusive.get(name, 0)
+        rows = [r.snapshot(now) for r in self.receivers.values()]
+        total_first = sum(r['first'] for r in rows)
+        for row in rows:
+            row['contribution'] = row['first'] / total_first if total_first else 0.0
+        return rows
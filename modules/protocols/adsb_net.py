@@ -0,0 +1,328 @@
+import json
+import socket
+import threading
+import time
+
+
+class BeastParser:
+    """
+    Incremental parser for readsb's Beast binary output (--net-bo-port).
+
+    Frames are <1a> <type> <6 byte 12 MHz timestamp> <signal> <message>,
+    with any 0x1a inside the frame doubled. Feed it whatever recv() gives
+    you, it keeps the partial frame between calls.
+    """
+
+    ESCAPE = 0x1a
+    # type byte -> message length
+    FRAME_LENGTHS = {0x31: 2, 0x32: 7, 0x33: 14}
+
+    def __init__(self):
+        self._buf = b''
+
+    def feed(self, data):
+        # returns a list of (timestamp_ticks, signal, message_bytes)
+        buf = self._buf + data if self._buf else bytes(data)
+        n = len(buf)
+        frames = []
+        i = 0
+
+        while True:
+            start = buf.find(b'\x1a', i)
+            if start < 0 or start + 1 >= n:
+                i = n if start < 0 else start
+                break
+
+            length = self.FRAME_LENGTHS.get(buf[start + 1])
+            if length is None:
+                # escaped byte or garbage, resync on the next marker
+                i = start + 2 if buf[start + 1] == self.ESCAPE else start + 1
+                continue
+
+            need = 7 + length
+            body_start = start + 2
+            body = buf[body_start:body_start + need]
+            if len(body) < need:
+                i = start
+                break
+
+            if self.ESCAPE not in body:
+                end = body_start + need
+            else:
+                body, end = self._unescape(buf, body_start, need)
+                if body is None:
+                    # ran out of data mid frame
+                    if end >= n:
+                        i = start
+                        break
+                    # unescaped 0x1a means the frame was cut short, resync there
+                    i = end
+                    continue
+
+            frames.append((int.from_bytes(body[:6], 'big'), body[6], bytes(body[7:])))
+            i = end
+
+        self._buf = buf[i:]
+        return frames
+
+    def _unescape(self, buf, pos, need):
+        # slow path, only hit when the frame actually contains 0x1a
+        out = bytearray()
+        n = len(buf)
+        while len(out) < need:
+            if pos >= n:
+                return None, n
+            b = buf[pos]
+            if b == self.ESCAPE:
+                if pos + 1 >= n:
+                    return None, n
+                if buf[pos + 1] != self.ESCAPE:
+                    return None, pos
+                pos += 1
+            out.append(b)
+            pos += 1
+        return out, pos
+
+
+class BeastClock:
+    """
+    Maps the 48 bit 12 MHz Beast receive counter onto wall clock seconds.
+
+    The offset is pinned on the first frame, so time differences between
+    frames are exactly what readsb measured no matter how late we read them.
+    Re-anchors if the counter jumps (receiver restart, wrap, drift).
+    """
+
+    TICKS_PER_SEC = 12000000.0
+    WRAP = 1 << 48
+
+    def __init__(self, max_drift=2.0):
+        self.max_drift = max_drift
+        self._base_ticks = None
+        self._base_wall = 0.0
+
+    def to_wall(self, ticks, now=None):
+        now = time.time() if now is None else now
+        if self._base_ticks is None:
+            self._base_ticks = ticks
+            self._base_wall = now
+            return now
+
+        elapsed = ((ticks - self._base_ticks) % self.WRAP) / self.TICKS_PER_SEC
+        ts = self._base_wall + elapsed
+        # the counter can run ahead of us a little but never way off, re-anchor if so
+        if abs(ts - now) > self.max_drift:
+            self._base_ticks = ticks
+            self._base_wall = now
+            return now
+        return ts
+
+
+class SBSParser:
+    """
+    Parser for BaseStation / SBS-1 lines (--net-sbs-port).
+
+    Plain comma split, the "generated" date/time columns become the
+    message timestamp. Midnight of each date is cached so the per line
+    cost is a few int() calls.
+    """
+
+    def __init__(self):
+        self._midnight_cache = {}
+
+    def _timestamp(self, date_str, time_str):
+        midnight = self._midnight_cache.get(date_str)
+        if midnight is None:
+            try:
+                y, mo, d = date_str.split('/')
+                midnight = time.mktime((int(y), int(mo), int(d), 0, 0, 0, 0, 0, -1))
+            except ValueError:
+                return None
+            if len(self._midnight_cache) > 8:
+                self._midnight_cache.clear()
+            self._midnight_cache[date_str] = midnight
+        try:
+            h, m, s = time_str.split(':')
+            return midnight + int(h) * 3600 + int(m) * 60 + float(s)
+        except ValueError:
+            return None
+
+    def parse_line(self, line):
+        # returns (icao, fields, timestamp) or None
+        parts = line.split(',')
+        if len(parts) < 18 or parts[0] != 'MSG':
+            return None
+
+        icao = parts[4].strip().lstrip('~').upper()
+        if len(icao) != 6:
+            return None
+
+        fields = {}
+        callsign = parts[10].strip()
+        if callsign:
+            fields['callsign'] = callsign
+        try:
+            if parts[11]:
+                fields['altitude'] = int(float(parts[11]))
+            if parts[12]:
+                fields['speed'] = float(parts[12])
+                fields['speed_type'] = 'gs'
+            if parts[13]:
+                fields['heading'] = float(parts[13])
+            if parts[14] and parts[15]:
+                fields['lat'] = float(parts[14])
+                fields['lon'] = float(parts[15])
+            if parts[16]:
+                fields['v_rate'] = int(float(parts[16]))
+        except ValueError:
+            return None
+        if parts[17].strip():
+            fields['squawk'] = parts[17].strip()
+
+        return icao, fields, self._timestamp(parts[6], parts[7])
+
+
+class JSONPositionParser:
+    """
+    Parser for readsb's JSON position output (--net-json-port), one
+    aircraft.json style object per line.
+    """
+
+    def parse_line(self, line):
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            return None
+
+        icao = str(obj.get('hex', '')).lstrip('~').upper()
+        if len(icao) != 6:
+            return None
+
+        fields = {}
+        flight = obj.get('flight')
+        if flight and flight.strip():
+            fields['callsign'] = flight.strip()
+
+        alt = obj.get('alt_baro', obj.get('alt_geom'))
+        if isinstance(alt, (int, float)):
+            fields['altitude'] = int(alt)
+
+        for key, speed_type in (('gs', 'gs'), ('tas', 'tas'), ('ias', 'ias')):
+            if isinstance(obj.get(key), (int, float)):
+                fields['speed'] = float(obj[key])
+                fields['speed_type'] = speed_type
+                break
+
+        heading = obj.get('track', obj.get('true_heading', obj.get('mag_heading')))
+        if isinstance(heading, (int, float)):
+            fields['heading'] = float(heading)
+
+        v_rate = obj.get('baro_rate', obj.get('geom_rate'))
+        if isinstance(v_rate, (int, float)):
+            fields['v_rate'] = int(v_rate)
+
+        if isinstance(obj.get('lat'), (int, float)) and isinstance(obj.get('lon'), (int, float)):
+            fields['lat'] = float(obj['lat'])
+            fields['lon'] = float(obj['lon'])
+
+        if obj.get('squawk'):
+            fields['squawk'] = str(obj['squawk'])
+
+        ts = obj.get('now')
+        if isinstance(ts, (int, float)) and isinstance(obj.get('seen_pos', obj.get('seen')), (int, float)):
+            ts -= obj.get('seen_pos', obj.get('seen'))
+        return icao, fields, ts if isinstance(ts, (int, float)) else None
+
+
+class NetFeedReader:
+    """
+    Reads one readsb network output over TCP and hands decoded data to a
+    callback. Reconnects on its own until stop() is called.
+
+    mode is 'beast', 'sbs' or 'json'. For beast the callback gets
+    (timestamp, signal, message_bytes) lists, for the line formats it gets
+    lists of (icao, fields, timestamp). An exception out of the callback
+    is counted in errors (the latest one kept in last_error) and the batch
+    dropped, the feed keeps going.
+    """
+
+    def __init__(self, host, port, mode, callback, recv_size=65536, reconnect_delay=1.0):
+        self.host = host
+        self.port = port
+        self.mode = mode
+        self.callback = callback
+        self.recv_size = recv_size
+        self.reconnect_delay = reconnect_delay
+        self.running = False
+        self.connected = False
+        self.bytes_read = 0
+        self.errors = 0
+        self.last_error = None
+        self._sock = None
+        self._thread = None
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._sock:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _run(self):
+        while self.running:
+            try:
+                self._sock = socket.create_connection((self.host, self.port), timeout=5)
+                self._sock.settimeout(None)
+                self.connected = True
+                self._read_loop(self._sock)
+            except OSError:
+                pass
+            finally:
+                self.connected = False
+                if self._sock:
+                    try:
+                        self._sock.close()
+                    except OSError:
+                        pass
+                    self._sock = None
+            if self.running:
+                time.sleep(self.reconnect_delay)
+
+    def _read_loop(self, sock):
+        if self.mode == 'beast':
+            parser = BeastParser()
+            clock = BeastClock()
+        else:
+            parser = SBSParser() if self.mode == 'sbs' else JSONPositionParser()
+            pending = b''
+
+        while self.running:
+            data = sock.recv(self.recv_size)
+            if not data:
+                return
+            self.bytes_read += len(data)
+
+            if self.mode == 'beast':
+                now = time.time()
+                batch = [(clock.to_wall(ticks, now), sig, msg) for ticks, sig, msg in parser.feed(data)]
+            else:
+                lines = (pending + data).split(b'\n')
+                pending = lines.pop()
+                batch = []
+                for raw in lines:
+                    record = parser.parse_line(raw.decode('ascii', 'replace').strip())
+                    if record:
+                        batch.append(record)
+
+            if batch:
+                try:
+                    self.callback(batch)
+                except Exception as e:
+                    self.errors += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
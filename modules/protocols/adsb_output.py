@@ -0,0 +1,290 @@
+import datetime
+import json
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+
+def aircraft_to_sbs(aircraft):
+    # one BaseStation MSG,3 line with everything we know, same layout readsb --net-sbs-port uses
+    stamp = datetime.datetime.fromtimestamp(aircraft.last_seen)
+    date_str = stamp.strftime('%Y/%m/%d')
+    time_str = stamp.strftime('%H:%M:%S.') + f"{stamp.microsecond // 1000:03d}"
+
+    def num(value, fmt):
+        return '' if value is None else format(value, fmt)
+
+    return ','.join((
+        'MSG', '3', '1', '1', aircraft.hex, '1',
+        date_str, time_str, date_str, time_str,
+        aircraft.callsign or '',
+        num(aircraft.altitude, 'd'),
+        num(aircraft.speed, '.0f'),
+        num(aircraft.heading, '.1f'),
+        num(aircraft.lat, '.5f'),
+        num(aircraft.lon, '.5f'),
+        num(aircraft.v_rate, 'd'),
+        aircraft.squawk or '',
+        '0', '0', '0', '0',
+    )) + '\r\n'
+
+
+class _Client:
+    __slots__ = ('sock', 'kind', 'queue', 'queued', 'request')
+
+    def __init__(self, sock, kind):
+        self.sock = sock
+        self.kind = kind            # 'sbs', 'json' or 'http' (until the request is read)
+        self.queue = deque()        # shared bytes objects / memoryview of a partly sent one
+        self.queued = 0
+        self.request = b''
+
+
+class AircraftOutputServer:
+    """
+    Streams the aircraft table to any number of local clients.
+
+    sbs_port:  BaseStation lines, like readsb's --net-sbs-port
+    json_port: newline delimited JSON, a full snapshot on connect and then
+               one delta object per tick with only the fields that changed
+    http_port: GET /aircraft.json for a snapshot, /stats.json for the
+               pipeline stats, anything else streams the same JSON deltas
+               as json_port
+
+    One thread, non blocking sockets on a selector. Every interval it
+    drains the ChangeTracker, serializes the changes ONCE per format and
+    appends that same bytes object to every client's queue, so the cost
+    doesn't grow with the number of clients. A client that lets more than
+    max_buffer bytes pile up is disconnected, the parser never waits on
+    anybody.
+    """
+
+    def __init__(self, adsb, tracker, host='127.0.0.1', sbs_port=30103, json_port=30154,
+                 http_port=8090, interval=0.5, max_buffer=1 << 20):
+        self.adsb = adsb
+        self.tracker = tracker
+        self.host = host
+        self.ports = {'sbs': sbs_port, 'json': json_port, 'http': http_port}
+        self.interval = interval
+        self.max_buffer = max_buffer
+
+        self.clients = {}
+        self.disconnected_slow = 0
+        self.bytes_sent = 0
+        # last fields sent per aircraft, the JSON deltas are diffs against this
+        self._sent_state = {}
+        self._selector = None
+        self._listeners = []
+        self._thread = None
+        self.running = False
+
+    def start(self):
+        self._selector = selectors.DefaultSelector()
+        for kind, port in self.ports.items():
+            if not port:
+                continue
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind((self.host, port))
+            listener.listen(16)
+            listener.setblocking(False)
+            self._selector.register(listener, selectors.EVENT_READ, kind)
+            self._listeners.append(listener)
+
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    # ---------------- main loop ---------------- #
+
+    def _run(self):
+        next_tick = time.time() + self.interval
+        try:
+            while self.running:
+                timeout = max(0.0, next_tick - time.time())
+                for key, events in self._selector.select(timeout):
+                    if isinstance(key.data, str):
+                        self._accept(key.fileobj, key.data)
+                        continue
+                    client = key.data
+                    if events & selectors.EVENT_READ:
+                        self._read(client)
+                    if events & selectors.EVENT_WRITE and client.sock.fileno() >= 0:
+                        self._flush(client)
+
+                if time.time() >= next_tick:
+                    next_tick += self.interval
+                    if next_tick < time.time():
+                        next_tick = time.time() + self.interval
+                    self._publish()
+        finally:
+            for client in list(self.clients.values()):
+                self._close(client)
+            for listener in self._listeners:
+                self._selector.unregister(listener)
+                listener.close()
+            self._listeners = []
+            self._selector.close()
+
+    def _accept(self, listener, kind):
+        try:
+            sock, _addr = listener.accept()
+        except OSError:
+            return
+        sock.setblocking(False)
+        client = _Client(sock, kind)
+        self.clients[sock.fileno()] = client
+        self._selector.register(sock, selectors.EVENT_READ, client)
+        if kind == 'json':
+            self._enqueue(client, self._snapshot_json())
+        elif kind == 'sbs':
+            self._enqueue(client, self._snapshot_sbs())
+
+    def _read(self, client):
+        try:
+            data = client.sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._close(client)
+            return
+        if client.kind != 'http':
+            return # stream clients have nothing to say, ignore it
+        client.request += data
+        if b'\r\n\r\n' not in client.request:
+            if len(client.request) > 8192:
+                self._close(client)
+            return
+
+        path = client.request.split(b' ', 2)[1] if client.request.count(b' ') >= 2 else b'/'
+        client.request = b''
+        route = path.split(b'?')[0]
+        if route in (b'/aircraft.json', b'/stats.json'):
+            if route == b'/stats.json':
+                body = json.dumps(self.adsb.stats_snapshot()).encode()
+            else:
+                body = json.dumps({'now': time.time(), 'aircraft': [a.to_dict() for a in self.adsb.aircraft_snapshot()]}).encode()
+            head = (f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                    "Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n").encode()
+            client.kind = 'http_close'
+            self._enqueue(client, head + body)
+        else:
+            head = (b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nCache-Control: no-cache\r\n"
+                    b"Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n")
+            client.kind = 'json'
+            self._enqueue(client, head)
+            self._enqueue(client, self._snapshot_json())
+
+    # ---------------- sending ---------------- #
+
+    def _enqueue(self, client, data):
+        if not data:
+            return
+        if client.queued and client.queued + len(data) > self.max_buffer:
+            # still sitting on earlier data and it's not keeping up, drop it rather than buffer without limit
+            self.disconnected_slow += 1
+            self._close(client)
+            return
+        was_empty = not client.queue
+        client.queue.append(data)
+        client.queued += len(data)
+        if was_empty:
+            self._flush(client)
+
+    def _flush(self, client):
+        sock = client.sock
+        queue = client.queue
+        while queue:
+            data = queue[0]
+            try:
+                sent = sock.send(data)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                self._close(client)
+                return
+            self.bytes_sent += sent
+            client.queued -= sent
+            if sent < len(data):
+                # keep the rest without copying the (shared) buffer
+                queue[0] = memoryview(data)[sent:]
+                break
+            queue.popleft()
+
+        if queue:
+            self._selector.modify(sock, selectors.EVENT_READ | selectors.EVENT_WRITE, client)
+        elif client.kind == 'http_close':
+            self._close(client)
+        else:
+            self._selector.modify(sock, selectors.EVENT_READ, client)
+
+    def _close(self, client):
+        fileno = client.sock.fileno()
+        if fileno < 0:
+            return
+        self.clients.pop(fileno, None)
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+
+    # ---------------- serialization ---------------- #
+
+    def _publish(self):
+        # one serialization per format per tick, shared by every client of that format
+        updated, removed = self.tracker.drain()
+        if not updated and not removed:
+            return
+
+        lookup = self.adsb.aircraft_data.get
+        changed = [a for a in map(lookup, updated) if a is not None]
+        for icao in removed:
+            self._sent_state.pop(icao, None)
+
+        clients = list(self.clients.values())
+        if any(c.kind == 'sbs' for c in clients) and changed:
+            sbs_blob = ''.join(aircraft_to_sbs(a) for a in changed).encode()
+            for client in clients:
+                if client.kind == 'sbs':
+                    self._enqueue(client, sbs_blob)
+
+        deltas = []
+        for aircraft in changed:
+            current = aircraft.to_dict()
+            previous = self._sent_state.get(aircraft.hex, {})
+            delta = {k: v for k, v in current.items() if previous.get(k) != v}
+            self._sent_state[aircraft.hex] = current
+            if delta:
+                delta['hex'] = aircraft.hex
+                deltas.append(delta)
+        if deltas or removed:
+            json_blob = (json.dumps({'now': time.time(), 'aircraft': deltas, 'removed': sorted(removed)}) + '\n').encode()
+            for client in clients:
+                if client.kind == 'json':
+                    self._enqueue(client, json_blob)
+
+    def _snapshot_json(self):
+        # full state for a new client, the deltas that follow apply on top of it
+        aircraft = [a.to_dict() for a in self.adsb.aircraft_snapshot()]
+        return (json.dumps({'now': time.time(), 'aircraft': aircraft, 'removed': [], 'snapshot': True}) + '\n').encode()
+
+    def _snapshot_sbs(self):
+        return ''.join(aircraft_to_sbs(a) for a in self.adsb.aircraft_snapshot()).encode()
+
+    def stats(self):
+        return {
+            'clients': len(self.clients),
+            'bytes_sent': self.bytes_sent,
+            'disconnected_slow': self.disconnected_slow,
+        }
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Replay of captured readsb output through the full ADS-B parser.
+
+Takes a recorded readsb stdout log (verbose text or --raw, plain or .gz)
+and feeds it line by line through the same code the live pipeline uses,
+at 1x, 10x or as fast as possible. The table runs on a virtual clock
+taken from the log itself, so CPR pairing windows and the 60 s expiry
+behave as they did live whatever the replay speed.
+
+Usage:
+    python -m modules.protocols.adsb_replay readsb.log.gz [--speed max|1|10]
+"""
+
+import argparse
+import gzip
+import re
+import sys
+import time
+
+from .adsb_stats import LatencyHistogram
+
+
+class VirtualClock:
+    # stands in for time.time while replaying, the replayer moves it along
+
+    def __init__(self, start):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def open_log(path):
+    # text mode reader for plain or gzip'd logs
+    opener = gzip.open if str(path).endswith('.gz') else open
+    return opener(path, 'rt', errors='replace')
+
+
+def parse_speed(text):
+    # "max" / "0" -> None (no pacing), otherwise the speed multiplier
+    text = str(text).strip().lower()
+    if text in ('max', 'inf', '0', ''):
+        return None
+    speed = float(text[:-1] if text.endswith('x') else text)
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    return speed
+
+
+class LogReplayer:
+    """
+    Drives an ADSB instance from a log file.
+
+    Virtual time comes from the log: readsb's verbose "Time: 12345.67us"
+    lines, or the 12 MHz counter on "@<12 hex digits><frame>;" raw lines
+    (--raw with mlat timestamps). A log with neither advances the clock by
+    frame_interval per frame. The 12 MHz counter can reset, a backwards
+    jump of more than a second re-anchors instead of going back in time.
+    """
+
+    TIME_LINE_RE = re.compile(r'Time:\s*([0-9.]+)\s*us')
+    MLAT_TICKS_PER_SEC = 12000000.0
+
+    def __init__(self, adsb, path, speed=None, mode='auto', frame_interval=0.001):
+        self.adsb = adsb
+        self.path = path
+        self.speed = speed
+        self.mode = mode
+        self.frame_interval = frame_interval
+
+        self.lines = 0
+        self.frames = 0
+        self.latency = LatencyHistogram()
+        self.max_lag = 0.0
+        self._has_timestamps = False
+        self._started = None
+        self._elapsed = None
+        self._virtual_start = 0.0
+        self._virtual_span = 0.0
+
+    def _detect_mode(self):
+        # raw if the log is nothing but frame lines
+        with open_log(self.path) as f:
+            for count, line in enumerate(f):
+                line = line.strip()
+                if line and line[0] not in '*@':
+                    return 'text'
+                if count >= 200:
+                    break
+        return 'raw'
+
+    def _log_time(self, line):
+        # (seconds on the receiver's clock or None, line to feed the parser)
+        if line.startswith('@') and len(line) > 13:
+            try:
+                ticks = int(line[1:13], 16)
+            except ValueError:
+                return None, line
+            return ticks / self.MLAT_TICKS_PER_SEC, '*' + line[13:]
+        if line.startswith('Time:'):
+            match = self.TIME_LINE_RE.match(line)
+            if match:
+                return float(match.group(1)) / 1e6, line
+        return None, line
+
+    def run(self, progress=None):
+        """
+        Replay the whole log. progress, if given, is called about once a
+        second with the report so far. Returns the final report dict.
+        """
+        adsb = self.adsb
+        mode = self._detect_mode() if self.mode == 'auto' else self.mode
+        raw_mode = mode == 'raw'
+        if raw_mode:
+            adsb._get_crc() # build the lazy CRC tables now, not inside the first timed line
+
+        start_wall = time.time()
+        clock = VirtualClock(start_wall)
+        real_clock = adsb.clock
+        adsb._reset_tracking_state()
+        adsb.clock = clock
+        adsb.last_cleanup = clock.now
+
+        log_anchor = None      # receiver time that maps onto virtual_anchor
+        virtual_anchor = clock.now
+        perf = time.perf_counter
+        pace_start = perf()
+        next_progress = pace_start + 1.0
+        self._started = pace_start
+        self._virtual_start = clock.now
+
+        try:
+            with open_log(self.path) as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    self.lines += 1
+
+                    log_ts, line = self._log_time(line)
+                    if log_ts is not None:
+                        self._has_timestamps = True
+                        if log_anchor is None:
+                            log_anchor, virtual_anchor = log_ts, clock.now
+                        virtual = virtual_anchor + (log_ts - log_anchor)
+                        if virtual < clock.now - 1.0:
+                            # counter reset, carry on from where we are
+                            log_anchor, virtual_anchor = log_ts, clock.now
+                            virtual = clock.now
+                        clock.now = max(clock.now, virtual)
+
+                    is_frame = line.startswith('*')
+                    if is_frame:
+                        self.frames += 1
+                        if not self._has_timestamps:
+                            clock.now += self.frame_interval
+
+                    if self.speed:
+                        # hold back until this line is due at the chosen speed
+                        due = pace_start + (clock.now - self._virtual_start) / self.speed
+                        delay = due - perf()
+                        if delay > 0:
+                            time.sleep(delay)
+                        elif -delay > self.max_lag:
+                            self.max_lag = -delay
+
+                    t0 = perf()
+                    try:
+                        if raw_mode and is_frame:
+                            adsb._process_raw_batch([line])
+                        else:
+                            adsb._process_output_line(line)
+                    except Exception:
+                        pass
+                    self.latency.record(perf() - t0)
+
+                    if progress and perf() >= next_progress:
+                        next_progress = perf() + 1.0
+                        progress(self.report())
+
+            # last text block has no following '*' line to close it
+            adsb._parse_complete_message_block()
+            adsb.current_message_block.clear()
+        finally:
+            self._elapsed = perf() - self._started
+            self._virtual_span = clock.now - self._virtual_start
+            adsb.clock = real_clock
+            adsb.last_cleanup = real_clock()
+
+        return self.report()
+
+    def report(self):
+        if self._elapsed is None:
+            # still running
+            elapsed = time.perf_counter() - self._started if self._started else 0.0
+            virtual_span = self.adsb.clock() - self._virtual_start if self._started else 0.0
+        else:
+            elapsed, virtual_span = self._elapsed, self._virtual_span
+        elapsed = max(elapsed, 1e-9)
+        return {
+            'lines': self.lines,
+            'frames': self.frames,
+            'elapsed': elapsed,
+            'virtual_span': virtual_span,
+            'lines_per_sec': self.lines / elapsed,
+            'frames_per_sec': self.frames / elapsed,
+            'speedup': virtual_span / elapsed,
+            'latency': self.latency.summary(),
+            'max_lag': self.max_lag,
+            'aircraft_seen': self.adsb.aircraft_created,
+            'aircraft_active': len(self.adsb.aircraft_data),
+            'position_updates': self.adsb.position_updates,
+            'has_timestamps': self._has_timestamps,
+        }
+
+
+def format_report(report):
+    lat = report['latency']
+    lines = [
+        f"Lines replayed:     {report['lines']} ({report['frames']} frames)",
+        f"Wall time:          {report['elapsed']:.2f} s for {report['virtual_span']:.1f} s of log "
+        f"({report['speedup']:.1f}x real time)"
+        + ("" if report['has_timestamps'] else " [no timestamps in log, clock assumed]"),
+        f"Throughput:         {report['lines_per_sec']:,.0f} lines/s, {report['frames_per_sec']:,.0f} frames/s",
+        f"Per line latency:   mean {lat['mean'] * 1e6:.1f} us, p50 {lat['p50'] * 1e6:.1f} us, "
+        f"p90 {lat['p90'] * 1e6:.1f} us, p99 {lat['p99'] * 1e6:.1f} us, max {lat['max'] * 1e3:.2f} ms",
+        f"Behind schedule:    max {report['max_lag'] * 1e3:.1f} ms",
+        f"Aircraft:           {report['aircraft_seen']} seen, {report['aircraft_active']} still active, "
+        f"{report['position_updates']} position updates",
+    ]
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    from .adsb import ADSB
+
+    ap = argparse.ArgumentParser(description="replay a captured readsb log through the ADS-B parser")
+    ap.add_argument('log', help="recorded readsb stdout (plain or .gz)")
+    ap.add_argument('--speed', default='max', help="1, 10, ... times real time, or max (default)")
+    ap.add_argument('--mode', default='auto', choices=('auto', 'text', 'raw'))
+    args = ap.parse_args(argv)
+
+    replayer = LogReplayer(ADSB(), args.log, parse_speed(args.speed), args.mode)
+    try:
+        report = replayer.run()
+    except KeyboardInterrupt:
+        report = replayer.report()
+    print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
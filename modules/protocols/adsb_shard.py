@@ -0,0 +1,322 @@
+import multiprocessing
+import threading
+from queue import Empty, Full
+
+from .adsb_state import Aircraft
+
+# Sharded parsing: the parser thread only splits readsb output into frames /
+# message blocks and hands them to worker processes by ICAO, each worker runs
+# the normal ADSB parser on its share (so an aircraft's CPR state lives on
+# exactly one worker) and sends back the state of the aircraft it touched.
+# CPR reference fixes already in the main process (a restored checkpoint) are
+# handed to the worker that owns them on start, and while a checkpointer is
+# saving the workers send theirs back so the saved ones stay current.
+
+# a worker's state rows carry the fields in this order
+FIELDS = Aircraft.__slots__
+
+# message blocks are never longer than this (same limit as ADSB._process_message_line)
+MAX_BLOCK_LINES = 20
+
+# first two hex digits of a DF17/18 frame (DF is the top 5 bits), either case
+ES_PREFIXES = frozenset(f'{b:02{case}}' for b in range(0x88, 0x98) for case in 'xX')
+
+
+def shard_map(workers):
+    # last two hex digits of an ICAO (either case) -> its worker, a dict lookup instead of
+    # int(..., 16) % workers per line. Same answer as the full address % workers when
+    # workers divides 256, and a fixed split of the address space either way
+    return {f'{b:02{case}}': b % workers for b in range(256) for case in 'xX'}
+
+
+class WorkerDied(RuntimeError):
+    pass
+
+
+class _FixRecorder:
+    # takes the track store's place inside a worker, keeps every fix for the main process
+
+    def __init__(self):
+        self.fixes = []
+
+    def add_position(self, aircraft, ts, lat=None, lon=None):
+        self.fixes.append((aircraft.hex, ts, aircraft.lat if lat is None else lat,
+                           aircraft.lon if lon is None else lon))
+
+
+def shard_worker(index, config, raw_mode, collect_fixes, refs, send_refs, in_queue, out_queue):
+    # worker process main: parse what we're sent,
+    # reply with (index, rows, fixes, counters, positions, lines, refs)
+    from .adsb import ADSB
+
+    adsb = ADSB()
+    adsb.config.update(config)
+    cpr_data = adsb.cpr_data
+    for icao, ref in refs.items():
+        cpr_data[icao] = {'ref': ref}
+    tracker = adsb.add_change_tracker()
+    recorder = _FixRecorder() if collect_fixes else None
+    adsb.track_store = recorder
+    counters = adsb.stats.counters
+    table = adsb.aircraft_data
+
+    while True:
+        lines = in_queue.get()
+        if lines is None:
+            break
+        if raw_mode:
+            adsb._process_raw_batch(lines)
+        else:
+            for line in lines:
+                adsb._process_message_line(line)
+            # we only ever get whole blocks, the last one is complete too
+            if adsb.current_message_block:
+                adsb._finish_block()
+                adsb.current_message_block.clear()
+
+        updated, _removed = tracker.drain()
+        rows = []
+        for aircraft in map(table.get, updated):
+            if aircraft is not None:
+                rows.append(tuple([getattr(aircraft, name) for name in FIELDS]))
+        fixes = ()
+        if recorder is not None:
+            fixes, recorder.fixes = recorder.fixes, []
+        new_refs = ()
+        if send_refs:
+            new_refs = []
+            for icao in updated:
+                entry = cpr_data.get(icao)
+                if entry and 'ref' in entry:
+                    new_refs.append((icao, entry['ref']))
+        # our private table's expiry isn't news, the main table expires (and counts) them itself
+        counters.pop('aircraft_expired', None)
+        out_queue.put((index, rows, fixes, dict(counters), adsb.position_updates, len(lines), new_refs))
+        counters.clear()
+        adsb.position_updates = 0
+    out_queue.put((index, None, None, None, 0, 0, None))
+
+
+class ShardedParser:
+    """
+    Spreads parsing over worker processes, one shard of the ICAO space each.
+
+    feed() runs on the parser thread: raw frames are routed by the AA field
+    of the hex, text blocks by their hex: line, anything that isn't a
+    message (stats, errors) is handled locally as before. Lines are sent in
+    batches of up to batch_lines per worker, over bounded queues, so a
+    saturated pool pushes back on the ingest queue like a slow parser
+    thread would.
+
+    A collector thread applies what comes back to the main table: one state
+    row per aircraft touched in a batch, plus every position fix when the
+    track store or coverage maps want them. Only frames that the in-process
+    raw parser would use (DF17/18) are sent in raw mode.
+
+    The CPR reference fixes in adsb.cpr_data at start() go to the worker
+    owning each aircraft, so a restored checkpoint decodes single frames
+    there too. With a checkpointer running, the refs of every aircraft a
+    batch touched come back with its rows and go into adsb.cpr_data.
+
+    If a worker dies, whatever was routed to it and not parsed yet (its
+    queue, the batch it was on, its buffer) is gone with it: stop() counts
+    those lines in lines_lost, the other workers still finish theirs.
+    """
+
+    def __init__(self, adsb, workers, raw_mode, batch_lines=1024, queue_batches=64):
+        self.adsb = adsb
+        self.workers = workers
+        self.raw_mode = raw_mode
+        self.batch_lines = batch_lines
+        self.queue_batches = queue_batches
+        self.in_queues = []
+        self.processes = []
+        self.out_queue = None
+        self.lines_sent = [0] * workers
+        self.lines_done = [0] * workers
+        self.lines_lost = 0
+        self._shard_of = shard_map(workers)
+        self._buffers = [[] for _ in range(workers)]
+        self._block = []
+        self._collector = None
+
+    def start(self):
+        # spawn: the parent has reader/output threads running, don't fork them
+        ctx = multiprocessing.get_context('spawn')
+        self.out_queue = ctx.Queue()
+        collect_fixes = self.adsb.track_store is not None or self.adsb.coverage is not None
+        config = dict(self.adsb.config)
+        send_refs = self.adsb.checkpointer is not None
+        refs = [{} for _ in range(self.workers)]
+        for icao, entry in list(self.adsb.cpr_data.items()):
+            if 'ref' in entry:
+                refs[self._shard_of.get(icao[4:6], 0)][icao] = entry['ref']
+        for index in range(self.workers):
+            in_queue = ctx.Queue(maxsize=self.queue_batches)
+            process = ctx.Process(target=shard_worker, daemon=True,
+                                  args=(index, config, self.raw_mode, collect_fixes, refs[index], send_refs,
+                                        in_queue, self.out_queue))
+            process.start()
+            self.in_queues.append(in_queue)
+            self.processes.append(process)
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def stop(self, timeout=10.0):
+        # hand over what's buffered, let every live worker finish its queue, then wait for the last results
+        if self._block:
+            self._route_block(self._block)
+            self._block = []
+        for index in range(len(self.in_queues)):
+            try:
+                if self._buffers[index]:
+                    self._send(index)
+                self._put(index, None)
+            except WorkerDied:
+                pass  # its lines show up in lines_lost
+        if self._collector:
+            self._collector.join(timeout)
+            self._collector = None
+        for process, in_queue in zip(self.processes, self.in_queues):
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=1)
+            if process.exitcode != 0:
+                # nobody will drain its pipe, don't let the feeder thread hold up exit
+                in_queue.cancel_join_thread()
+        self.processes = []
+        self.in_queues = []
+        # sent but never reported back, all zero unless a worker died (or hung)
+        self.lines_lost = sum(sent - done for sent, done in zip(self.lines_sent, self.lines_done))
+
+    # ---------------- parser thread side ---------------- #
+
+    def feed(self, lines):
+        adsb = self.adsb
+        buffers = self._buffers
+        if self.raw_mode:
+            # per frame this is a prefix check, two slices and a dict lookup: the hex is
+            # only ever looked at where the DF and the AA field sit, the worker checks the rest
+            debug = adsb.debug_mode
+            shard_of = self._shard_of.get
+            frames = 0
+            for line in lines:
+                if line.startswith('*'):
+                    frames += 1
+                    if debug:
+                        adsb.raw_output_buffer.append(line.strip())
+                    if line[1:3] in ES_PREFIXES:
+                        index = shard_of(line[7:9])
+                        if index is not None:
+                            buffers[index].append(line)
+                else:
+                    line = line.strip()
+                    if line:
+                        try:
+                            adsb._process_output_line(line)
+                        except Exception:
+                            pass
+            if frames:
+                adsb.has_received_data = True
+        else:
+            block = self._block
+            for line in lines:
+                line = line.strip()
+                if line.startswith('*'):
+                    if block:
+                        self._route_block(block)
+                    block = [line]
+                    adsb.has_received_data = True
+                elif block:
+                    block.append(line)
+                    if not line or len(block) > MAX_BLOCK_LINES:
+                        self._route_block(block)
+                        block = []
+                elif line:
+                    try:
+                        adsb._process_output_line(line)
+                    except Exception:
+                        pass
+            self._block = block
+
+        for index, buffer in enumerate(buffers):
+            if len(buffer) >= self.batch_lines:
+                self._send(index)
+
+    def _route_block(self, block):
+        if self.adsb.debug_mode:
+            self.adsb.raw_output_buffer.extend(block)
+        icao = block[0][3:9]
+        for line in block:
+            if line.startswith('hex:'):
+                icao = line[4:].strip().lstrip('~')[:6]
+                break
+        self._buffers[self._shard_of.get(icao[4:6], 0)].extend(block)
+
+    def flush(self):
+        # send everything buffered, called when the ingest queue runs dry
+        for index, buffer in enumerate(self._buffers):
+            if buffer:
+                self._send(index)
+
+    def _send(self, index):
+        buffer = self._buffers[index]
+        self._buffers[index] = []
+        self.lines_sent[index] += len(buffer)
+        self._put(index, buffer)
+
+    def _put(self, index, item):
+        # blocks while that worker is busy (backpressure), gives up if it's gone
+        process = self.processes[index]
+        while process.is_alive():
+            try:
+                self.in_queues[index].put(item, timeout=0.5)
+                return
+            except Full:
+                pass
+        raise WorkerDied(f"parser worker {index} exited (code {process.exitcode})")
+
+    def alive(self):
+        return all(p.is_alive() for p in self.processes)
+
+    # ---------------- collector thread ---------------- #
+
+    def _collect(self):
+        adsb = self.adsb
+        counters = adsb.stats.counters
+        running = set(range(self.workers))
+        while running:
+            try:
+                index, rows, fixes, worker_counters, positions, lines, refs = self.out_queue.get(timeout=1.0)
+            except Empty:
+                # a worker that died can't send its goodbye, stop waiting for it (not for the others)
+                running = {index for index in running if self.processes[index].is_alive()}
+                continue
+            if rows is None:
+                running.discard(index)
+                continue
+            self.lines_done[index] += lines
+            try:
+                adsb._apply_shard_update(rows, fixes, refs)
+            except Exception:
+                pass
+            # under the table lock, cleanup writes these counters from the view thread too
+            with adsb.aircraft_lock:
+                adsb.position_updates += positions
+                for name, value in worker_counters.items():
+                    counters[name] += value
+
+    def stats(self):
+        pending = []
+        for in_queue in self.in_queues:
+            try:
+                pending.append(in_queue.qsize())
+            except NotImplementedError:
+                pending.append(None)
+        return {
+            'workers': self.workers,
+            'lines_sent': list(self.lines_sent),
+            'lines_done': list(self.lines_done),
+            'pending_batches': pending,
+        }
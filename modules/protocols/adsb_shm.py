@@ -0,0 +1,380 @@
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, SharedAircraftReader.array() needs it
+    np = None
+
+import argparse
+import os
+import struct
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+# The live aircraft table published as a fixed layout block of shared memory,
+# for other processes on the same box (loggers, alerting, map renderers).
+#
+#   header  64 bytes, HEADER below. seq is a seqlock: odd while the writer is
+#           in the middle of an update, +2 per completed update
+#   records capacity * 128 bytes, RECORD below, one slot per aircraft. A slot
+#           keeps its aircraft until it expires, icao 0 marks a free slot
+#
+# Everything is little endian and fixed size, so a reader in another
+# language can map it too.
+
+DEFAULT_NAME = 'rf_toolkit_adsb'
+MAGIC = b'ADSB'
+VERSION = 2
+
+HEADER = struct.Struct('<4sHHIIQdII24x')   # magic, version, record size, capacity, slots used,
+                                           # seq, updated (epoch s), writer pid (0 = stopped), overflow
+SEQ = struct.Struct('<Q')
+SEQ_OFFSET = 16
+RECORD = struct.Struct('<IIdddddii8s4s12s4s40s4x')  # icao, flags, last_seen, lat, lon, speed, heading,
+                                                    # altitude, v_rate, callsign, squawk, registration,
+                                                    # aircraft_type, operator
+EMPTY_RECORD = bytes(RECORD.size)
+# blocks this process created, a reader in the same process must leave their tracking alone
+_OWNED = set()
+
+# which of the numeric fields hold a value (a plain 0 is a valid reading)
+HAS_ALTITUDE = 1
+HAS_SPEED = 2
+HAS_HEADING = 4
+HAS_V_RATE = 8
+HAS_POSITION = 16
+SPEED_TAS = 32
+SPEED_IAS = 64
+
+if np is not None:
+    RECORD_DTYPE = np.dtype({
+        'names': ['icao', 'flags', 'last_seen', 'lat', 'lon', 'speed', 'heading',
+                  'altitude', 'v_rate', 'callsign', 'squawk', 'registration', 'aircraft_type', 'operator'],
+        'formats': ['<u4', '<u4', '<f8', '<f8', '<f8', '<f8', '<f8', '<i4', '<i4', 'S8', 'S4', 'S12', 'S4', 'S40'],
+        'offsets': [0, 4, 8, 16, 24, 32, 40, 48, 52, 56, 64, 68, 80, 84],
+        'itemsize': RECORD.size,
+    })
+
+
+def pack_aircraft(aircraft):
+    # one Aircraft -> RECORD bytes
+    flags = 0
+    if aircraft.altitude is not None:
+        flags |= HAS_ALTITUDE
+    if aircraft.speed is not None:
+        flags |= HAS_SPEED
+        if aircraft.speed_type == 'tas':
+            flags |= SPEED_TAS
+        elif aircraft.speed_type == 'ias':
+            flags |= SPEED_IAS
+    if aircraft.heading is not None:
+        flags |= HAS_HEADING
+    if aircraft.v_rate is not None:
+        flags |= HAS_V_RATE
+    lat, lon = aircraft.lat, aircraft.lon
+    if lat is not None and lon is not None:
+        flags |= HAS_POSITION
+    else:
+        lat = lon = 0.0
+    return RECORD.pack(
+        int(aircraft.hex, 16), flags, aircraft.last_seen, lat, lon,
+        aircraft.speed or 0.0, aircraft.heading or 0.0, aircraft.altitude or 0, aircraft.v_rate or 0,
+        (aircraft.callsign or '').encode('ascii', 'replace')[:8], (aircraft.squawk or '').encode('ascii', 'replace')[:4],
+        (aircraft.registration or '').encode('ascii', 'replace')[:12],
+        (aircraft.aircraft_type or '').encode('ascii', 'replace')[:4],
+        (aircraft.operator or '').encode('ascii', 'replace')[:40],
+    )
+
+
+def unpack_record(fields):
+    # RECORD tuple -> dict shaped like Aircraft.to_dict()
+    icao, flags, last_seen, lat, lon, speed, heading, altitude, v_rate, callsign, squawk, registration, aircraft_type, operator = fields
+    if flags & HAS_SPEED:
+        speed_type = 'tas' if flags & SPEED_TAS else 'ias' if flags & SPEED_IAS else 'gs'
+    else:
+        speed_type = None
+    position = flags & HAS_POSITION
+    return {
+        'hex': f"{icao:06X}",
+        'last_seen': last_seen,
+        'callsign': callsign.rstrip(b'\0').decode('ascii') or None,
+        'altitude': altitude if flags & HAS_ALTITUDE else None,
+        'speed': speed if flags & HAS_SPEED else None,
+        'speed_type': speed_type,
+        'heading': heading if flags & HAS_HEADING else None,
+        'v_rate': v_rate if flags & HAS_V_RATE else None,
+        'lat': lat if position else None,
+        'lon': lon if position else None,
+        'squawk': squawk.rstrip(b'\0').decode('ascii') or None,
+        'registration': registration.rstrip(b'\0').decode('ascii') or None,
+        'aircraft_type': aircraft_type.rstrip(b'\0').decode('ascii') or None,
+        'operator': operator.rstrip(b'\0').decode('ascii') or None,
+    }
+
+
+class SharedAircraftTable:
+    """
+    Writer side: mirrors the ADSB table into shared memory.
+
+    Every interval it drains its ChangeTracker and rewrites only the slots
+    of aircraft that changed or expired, inside one seqlock write section.
+    The parser never waits on it or on any reader. More aircraft than
+    capacity at once are left out and counted as overflow. A publish that
+    fails still leaves the seqlock even, is counted in errors (the latest
+    one kept in last_error) and the publisher carries on.
+    """
+
+    def __init__(self, adsb, tracker, name=DEFAULT_NAME, capacity=4096, interval=0.25):
+        self.adsb = adsb
+        self.tracker = tracker
+        self.name = name
+        self.capacity = capacity
+        self.interval = interval
+        self.shm = None
+        self.seq = 0
+        self.used = 0
+        self.overflow = 0
+        self.publishes = 0
+        self.errors = 0
+        self.last_error = None
+        self._slots = {}
+        self._free = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        size = HEADER.size + self.capacity * RECORD.size
+        try:
+            self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            # left over from a run that didn't shut down cleanly
+            stale = shared_memory.SharedMemory(name=self.name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        self.shm.buf[:size] = bytes(size)
+        _OWNED.add(self.name)
+        self._write_header(os.getpid())
+
+        # whatever is in the table already goes out with the first publish
+        with self.adsb.aircraft_lock:
+            for icao in self.adsb.aircraft_data:
+                self.tracker.mark(icao)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self.shm is not None:
+            # pid 0 tells attached readers the data is final
+            self._write_header(0)
+            self.shm.close()
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+            _OWNED.discard(self.name)
+            self.shm = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+
+    def _write_header(self, pid):
+        HEADER.pack_into(self.shm.buf, 0, MAGIC, VERSION, RECORD.size, self.capacity, self.used,
+                         self.seq, time.time(), pid, self.overflow)
+
+    def publish(self):
+        updated, removed = self.tracker.drain()
+        if not updated and not removed:
+            return
+
+        buf = self.shm.buf
+        slots = self._slots
+        free = self._free
+        lookup = self.adsb.aircraft_data.get
+        base = HEADER.size
+        size = RECORD.size
+
+        self.seq += 1
+        SEQ.pack_into(buf, SEQ_OFFSET, self.seq)
+        try:
+            for icao in removed:
+                slot = slots.pop(icao, None)
+                if slot is not None:
+                    buf[base + slot * size:base + (slot + 1) * size] = EMPTY_RECORD
+                    free.append(slot)
+
+            for icao in updated:
+                aircraft = lookup(icao)
+                slot = slots.get(icao)
+                if aircraft is None:
+                    # expired again before we got to it
+                    if slot is not None:
+                        del slots[icao]
+                        buf[base + slot * size:base + (slot + 1) * size] = EMPTY_RECORD
+                        free.append(slot)
+                    continue
+                # packed before a slot is taken, one that won't pack doesn't leave a hole
+                record = pack_aircraft(aircraft)
+                if slot is None:
+                    if free:
+                        slot = free.pop()
+                    elif self.used < self.capacity:
+                        slot = self.used
+                        self.used += 1
+                    else:
+                        self.overflow += 1
+                        continue
+                    slots[icao] = slot
+                buf[base + slot * size:base + (slot + 1) * size] = record
+        finally:
+            # even again whatever happened, an odd seq left behind would hang every reader
+            self.seq += 1
+            self._write_header(os.getpid())
+        self.publishes += 1
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'aircraft': len(self._slots),
+            'capacity': self.capacity,
+            'generation': self.seq // 2,
+            'overflow': self.overflow,
+            'errors': self.errors,
+        }
+
+
+class SharedAircraftReader:
+    """
+    Reader side, for use from any other process on the box:
+
+        reader = SharedAircraftReader()
+        for aircraft in reader.snapshot():
+            print(aircraft['hex'], aircraft['lat'], aircraft['lon'])
+
+    A snapshot is one copy of the used part of the block, taken between two
+    reads of the seqlock; if the writer was active in between it's retried,
+    so every snapshot is a consistent table. No sockets, no serialization,
+    nothing from the reader ever reaches the writer.
+    """
+
+    def __init__(self, name=DEFAULT_NAME):
+        self.shm = shared_memory.SharedMemory(name=name)
+        # we only attach: don't let this process's resource tracker unlink the block on exit
+        if name not in _OWNED:
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, 'shared_memory')
+            except Exception:
+                pass
+        magic, version, record_size, capacity = HEADER.unpack_from(self.shm.buf, 0)[:4]
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.shm.close()
+            raise ValueError(f"{name} is not an ADS-B table this reader understands")
+        self.capacity = capacity
+        self.generation = 0
+        self.updated = 0.0
+        self.writer_pid = 0
+        self.overflow = 0
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def current_generation(self):
+        # bumps by one per writer update, cheap enough to poll
+        return SEQ.unpack_from(self.shm.buf, SEQ_OFFSET)[0] // 2
+
+    def raw(self, retries=1000):
+        # consistent copy of the used records, as bytes
+        buf = self.shm.buf
+        for _ in range(retries):
+            seq = SEQ.unpack_from(buf, SEQ_OFFSET)[0]
+            if seq & 1:
+                time.sleep(0)
+                continue
+            header = HEADER.unpack(bytes(buf[:HEADER.size]))
+            used = header[4]
+            data = bytes(buf[HEADER.size:HEADER.size + used * RECORD.size])
+            if SEQ.unpack_from(buf, SEQ_OFFSET)[0] == seq and header[5] == seq:
+                self.generation = seq // 2
+                self.updated = header[6]
+                self.writer_pid = header[7]
+                self.overflow = header[8]
+                return data
+        raise TimeoutError("writer kept the table busy, no consistent snapshot")
+
+    def snapshot(self):
+        # list of dicts shaped like Aircraft.to_dict()
+        return [unpack_record(fields) for fields in RECORD.iter_unpack(self.raw()) if fields[0]]
+
+    def array(self):
+        # numpy structured array (RECORD_DTYPE) of the occupied slots, see the HAS_* flags
+        if np is None:
+            raise ImportError("numpy is required for SharedAircraftReader.array() (pip install numpy)")
+        records = np.frombuffer(self.raw(), dtype=RECORD_DTYPE)
+        return records[records['icao'] != 0]
+
+    def wait(self, generation=None, timeout=None, poll=0.05):
+        # block until the writer publishes past generation (default: the last one we read)
+        generation = self.generation if generation is None else generation
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.current_generation() <= generation:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    @property
+    def alive(self):
+        # False once the writer has stopped
+        return HEADER.unpack_from(self.shm.buf, 0)[7] != 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="print the live ADS-B table from shared memory")
+    ap.add_argument('--name', default=DEFAULT_NAME)
+    ap.add_argument('--watch', action='store_true', help="keep printing on every update")
+    args = ap.parse_args(argv)
+
+    try:
+        reader = SharedAircraftReader(args.name)
+    except FileNotFoundError:
+        print(f"No shared table named {args.name} (is the ADS-B monitor running with it enabled?)")
+        return 1
+    with reader:
+        while True:
+            rows = reader.snapshot()
+            print(f"generation {reader.generation}, {len(rows)} aircraft, overflow {reader.overflow}")
+            for a in sorted(rows, key=lambda r: -r['last_seen']):
+                pos = f"{a['lat']:.4f}/{a['lon']:.4f}" if a['lat'] is not None else '-'
+                print(f"  {a['hex']:<7} {a['callsign'] or '-':<9} {a['registration'] or '-':<9} {a['aircraft_type'] or '-':<5} "
+                      f"{a['altitude'] if a['altitude'] is not None else '-':>6} {pos:<20} {a['squawk'] or '-'}")
+            if not args.watch or not reader.alive:
+                return 0
+            try:
+                reader.wait(timeout=5)
+            except KeyboardInterrupt:
+                return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import datetime
+import threading
+
+
+class Aircraft:
+    """
+    One tracked aircraft.
+
+    Plain numeric fields in __slots__, None meaning "not received yet".
+    Nothing is stored as display text, formatting happens in the
+    display_* helpers at render time only.
+    """
+
+    __slots__ = (
+        'hex',          # ICAO address, upper case hex string
+        'last_seen',    # epoch seconds of the last message
+        'callsign',     # str
+        'altitude',     # int, ft
+        'speed',        # float, kt
+        'speed_type',   # 'gs', 'tas' or 'ias'
+        'heading',      # float, deg
+        'v_rate',       # int, ft/min
+        'lat',          # float, deg
+        'lon',          # float, deg
+        'squawk',       # str, 4 octal digits
+        'registration', # str, from the aircraft database (adsb_db)
+        'aircraft_type',# str, ICAO type designator, same
+        'operator',     # str, same
+    )
+
+    def __init__(self, icao, now):
+        self.hex = icao
+        self.last_seen = now
+        self.callsign = None
+        self.altitude = None
+        self.speed = None
+        self.speed_type = None
+        self.heading = None
+        self.v_rate = None
+        self.lat = None
+        self.lon = None
+        self.squawk = None
+        self.registration = None
+        self.aircraft_type = None
+        self.operator = None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    # ---------------- display helpers ---------------- #
+
+    def display_callsign(self):
+        return self.callsign or 'N/A'
+
+    def display_altitude(self):
+        return 'N/A' if self.altitude is None else f"{self.altitude} ft"
+
+    def display_speed(self):
+        if self.speed is None:
+            return 'N/A'
+        return f"{self.speed:.0f} kt (TAS)" if self.speed_type == 'tas' else f"{self.speed:.0f} kt"
+
+    def display_heading(self):
+        return 'N/A' if self.heading is None else f"{self.heading:.1f}"
+
+    def display_v_rate(self):
+        if self.v_rate is None:
+            return 'N/A'
+        return f"{self.v_rate:+} ft/m" if self.v_rate else '0'
+
+    def display_position(self):
+        if self.lat is None:
+            return 'N/A/N/A'
+        return f"{self.lat:.4f}/{self.lon:.4f}"
+
+    def display_last_seen(self):
+        return datetime.datetime.fromtimestamp(self.last_seen).strftime("%H:%M:%S")
+
+    def display_operator(self):
+        # long names are cut to fit the column
+        return (self.operator or '')[:18]
+
+    def display_row(self):
+        # one line of the view_aircraft table
+        return (f"{self.hex:<10} {self.display_callsign():<12} {self.registration or '':<9} {self.aircraft_type or '':<5} "
+                f"{self.display_altitude():<12} {self.display_speed():<12} {self.display_heading():<10} "
+                f"{self.display_v_rate():<10} {self.display_position():<25} {self.display_last_seen():<10} "
+                f"{self.display_operator()}")
+
+
+class ChangeTracker:
+    """
+    Which aircraft changed (or expired) since a consumer last looked.
+
+    The table marks ICAOs as it updates them, that's one set add on the
+    parser side. A consumer (output server, renderer) calls drain() at its
+    own pace and gets everything that happened in between, each ICAO once
+    however many messages it got. Pass the table's lock: marks happen
+    while it's held, drain() takes it for the swap.
+    """
+
+    def __init__(self, lock=None):
+        self.updated = set()
+        self.removed = set()
+        self._lock = lock or threading.Lock()
+
+    def mark(self, icao):
+        self.updated.add(icao)
+
+    def mark_removed(self, icao):
+        self.removed.add(icao)
+
+    def drain(self):
+        # swap the sets out, returns (updated, removed)
+        with self._lock:
+            updated, self.updated = self.updated, set()
+            removed, self.removed = self.removed, set()
+        # an aircraft that expired and came back is an update, not a removal
+        removed -= updated
+        return updated, removed
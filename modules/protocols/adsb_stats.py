@@ -0,0 +1,167 @@
+import json
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+
+
+def format_seconds(seconds):
+    # short human latency: 12us / 3.4ms / 1.2s
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f}us"
+    if seconds < 1.0:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.1f}s"
+
+
+class LatencyHistogram:
+    """
+    Fixed size latency histogram, log spaced buckets from 1 us up to ~1 min.
+
+    Recording is one bisect and an increment, memory doesn't grow with the
+    number of samples. Percentiles come back as the upper edge of the
+    bucket they fall in (so within ~20% of the real value).
+    """
+
+    # bucket upper edges in seconds, 1 us * 1.2^k
+    BOUNDS = [1e-6 * 1.2 ** k for k in range(100)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect_right(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, pct):
+        if not self.count:
+            return 0.0
+        target = self.count * pct / 100.0
+        seen = 0
+        for idx, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                return min(self.BOUNDS[idx], self.max) if idx < len(self.BOUNDS) else self.max
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.mean(),
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class PipelineStats:
+    """
+    Counters, latency histograms and gauges for the ADS-B pipeline.
+
+    counters   plain dict of ints, hot paths do counters[name] += n. A
+               key is either written by one thread only (the stdout and
+               stderr readers get their own keys) or only while the
+               aircraft table's lock is held: aircraft_expired, since
+               cleanup runs from the parser and from the view. No lock
+               of its own.
+    latency    name -> LatencyHistogram, one writer each as well
+    gauges     name -> callable, read when a snapshot is taken
+
+    snapshot() is the programmatic view: a plain, JSON-able dict, cheap
+    enough to scrape every second.
+    """
+
+    def __init__(self):
+        self.gauges = {}
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+        self.counters = defaultdict(int)
+        self.latency = defaultdict(LatencyHistogram)
+
+    def gauge(self, name, func):
+        self.gauges[name] = func
+
+    def timer(self, name):
+        # for the odd non-hot path: with stats.timer('x'): ...
+        return _Timer(self.latency[name])
+
+    def snapshot(self):
+        gauges = {}
+        for name, func in self.gauges.items():
+            try:
+                gauges[name] = func()
+            except Exception:
+                gauges[name] = None
+        return {
+            'time': time.time(),
+            'uptime': time.time() - self.started,
+            'counters': dict(self.counters),
+            'gauges': gauges,
+            'latency': {name: hist.summary() for name, hist in list(self.latency.items())},
+        }
+
+    @staticmethod
+    def rates(previous, current):
+        # counter deltas per second between two snapshots
+        elapsed = current['time'] - previous['time']
+        if elapsed <= 0:
+            return {}
+        old = previous['counters']
+        return {name: (value - old.get(name, 0)) / elapsed for name, value in current['counters'].items()}
+
+
+class _Timer:
+    __slots__ = ('hist', 'start')
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.record(time.perf_counter() - self.start)
+        return False
+
+
+class StatsLogger:
+    # appends a snapshot as one JSON line every interval seconds, from its own thread
+
+    def __init__(self, stats, path, interval=10.0):
+        self.stats = stats
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(self.stats.snapshot()) + '\n')
+            except OSError:
+                pass
@@ -0,0 +1,167 @@
+import shutil
+import sys
+
+# Terminal output for view_aircraft: a model of what's on screen, so each
+# refresh only sends the lines that changed, as plain ANSI sequences (no
+# curses, no clear subprocess). Works the same over SSH and in Termux.
+
+ALT_SCREEN_ON = '\x1b[?1049h'
+ALT_SCREEN_OFF = '\x1b[?1049l'
+HIDE_CURSOR = '\x1b[?25l'
+SHOW_CURSOR = '\x1b[?25h'
+CLEAR = '\x1b[2J'
+ERASE_TO_EOL = '\x1b[K'
+
+
+def move_to(row, col=0):
+    # cursor to a (0 based) screen position
+    return f'\x1b[{row + 1};{col + 1}H'
+
+
+def changed_span(old, new):
+    # (start, end) of the part of new that differs from old, end None = to the end of the line
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    if len(old) != len(new):
+        return start, None
+    end = len(new)
+    while end > start and old[end - 1] == new[end - 1]:
+        end -= 1
+    return start, end
+
+
+class Screen:
+    """
+    The terminal as a list of lines, as last drawn.
+
+    render(lines) diffs the new frame against it and writes only what
+    differs: for a changed line, a cursor move to the first changed column
+    and the changed span (to the end of the line plus an erase if its
+    length changed). The whole frame goes out in one write. Lines are clipped to the terminal (one column
+    short, so the last one can't wrap and scroll everything up under the
+    model), a resize clears and repaints.
+
+    open() switches to the alternate screen, close() puts back whatever the
+    user had before.
+    """
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.lines = []
+        self.size = None
+        self.bytes_written = 0
+        self.lines_written = 0
+
+    def open(self):
+        self.size = None
+        self.lines = []
+        self._write(ALT_SCREEN_ON + HIDE_CURSOR)
+
+    def close(self):
+        self._write(SHOW_CURSOR + ALT_SCREEN_OFF)
+
+    def render(self, lines):
+        parts = []
+        size = shutil.get_terminal_size()
+        if size != self.size:
+            self.size = size
+            self.lines = []
+            parts.append(CLEAR)
+        width = max(size.columns - 1, 1)
+        # a slice that covers the whole string is the string itself, so unchanged rows compare by identity
+        lines = [line[:width] for line in lines[:size.lines]]
+
+        old = self.lines
+        for row, line in enumerate(lines):
+            if row >= len(old):
+                parts.append(move_to(row) + line + ERASE_TO_EOL)
+            elif line != old[row]:
+                start, end = changed_span(old[row], line)
+                if end is None:
+                    parts.append(move_to(row, start) + line[start:] + ERASE_TO_EOL)
+                else:
+                    parts.append(move_to(row, start) + line[start:end])
+        for row in range(len(lines), len(old)):
+            parts.append(move_to(row) + ERASE_TO_EOL)
+        self.lines = lines
+        if parts:
+            self.lines_written += len(parts)
+            self._write(''.join(parts))
+
+    def _write(self, text):
+        self.bytes_written += len(text)
+        self.out.write(text)
+        self.out.flush()
+
+
+class AircraftRows:
+    """
+    The aircraft rows of view_aircraft, kept from one frame to the next.
+
+    Shows the max_rows most recently heard aircraft, but an aircraft keeps
+    its row for as long as it's on the list, instead of the list being
+    re-sorted by recency every frame (which moves nearly every row).
+    Newcomers take free rows from the top, a row freed in the middle gets
+    the bottom row moved into it so the table stays packed.
+
+    Row text is formatted when an aircraft gets a row and again only when
+    the tracker (a ChangeTracker fed by the parser) says it changed, so
+    with Screen a quiet aircraft costs nothing per frame.
+    """
+
+    def __init__(self, adsb, tracker):
+        self.adsb = adsb
+        self.tracker = tracker
+        self.icaos = []     # per row: the ICAO shown there
+        self.rows = []      # per row: its formatted text
+        self.slot = {}      # ICAO -> row
+        self.formatted = 0
+
+    def update(self, max_rows):
+        updated, _removed = self.tracker.drain()
+        newest = self.adsb._most_recent_aircraft(max_rows)
+        icaos, rows, slot = self.icaos, self.rows, self.slot
+
+        # drop whoever expired or fell out of the top max_rows
+        keep = {aircraft.hex for aircraft in newest}
+        free = []
+        for icao in [icao for icao in slot if icao not in keep]:
+            row = slot.pop(icao)
+            icaos[row] = None
+            free.append(row)
+        free.sort(reverse=True)
+
+        for aircraft in newest:
+            icao = aircraft.hex
+            row = slot.get(icao)
+            if row is None:
+                if free:
+                    row = free.pop()
+                else:
+                    row = len(icaos)
+                    icaos.append(None)
+                    rows.append('')
+                icaos[row] = icao
+                slot[icao] = row
+            elif icao not in updated:
+                continue
+            rows[row] = aircraft.display_row()
+            self.formatted += 1
+
+        # pack: holes left over get the bottom row moved up, empty rows at the end go
+        for row in sorted(free):
+            while icaos and icaos[-1] is None:
+                icaos.pop()
+                rows.pop()
+            if row >= len(icaos):
+                break
+            icao = icaos.pop()
+            icaos[row] = icao
+            rows[row] = rows.pop()
+            slot[icao] = row
+        while icaos and icaos[-1] is None:
+            icaos.pop()
+            rows.pop()
+        return rows
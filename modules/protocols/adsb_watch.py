@@ -0,0 +1,365 @@
+import argparse
+import json
+import os
+import re
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+from queue import Queue, Empty, Full
+
+# Watchlist alerts: ICAOs, callsign patterns and squawks to shout about when
+# they show up. Matching runs on the parser thread, so it's built to cost
+# the same with ten entries or ten thousand: ICAOs and squawks are dict
+# lookups, callsign patterns share one trie, and an aircraft is only looked
+# at again when its callsign or squawk changes (or the window runs out).
+# Alerts are written out by a thread of their own.
+
+KINDS = ('icao', 'callsign', 'squawk')
+
+ICAO_RE = re.compile(r'[0-9A-F]{6}$')
+SQUAWK_RE = re.compile(r'[0-7]{4}$')
+CALLSIGN_RE = re.compile(r'[A-Z0-9*?]{1,8}$')
+
+
+class _Node:
+    __slots__ = ('children', 'star', 'loop', 'patterns')
+
+    def __init__(self, loop=False):
+        self.children = {}      # next character ('?' for any one) -> node
+        self.star = None        # node after a '*'
+        self.loop = loop        # this node is a '*', it eats any number of characters
+        self.patterns = []      # (pattern, label) of the entries ending here
+
+
+class CallsignTrie:
+    """
+    Callsign patterns in glob syntax: * is any run of characters (BAW*
+    is every BAW callsign), ? any single one, anything else literal. A
+    pattern without wildcards has to match the whole callsign.
+
+    Entries share prefixes, and match() walks the callsign once keeping the
+    set of trie nodes it's in (more than one only around wildcards), so
+    its cost depends on the callsign and the wildcards, not on how many
+    patterns there are.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.count = 0
+
+    def add(self, pattern, label=''):
+        node = self.root
+        for ch in pattern:
+            if ch == '*':
+                if node.star is None:
+                    node.star = _Node(loop=True)
+                node = node.star
+            else:
+                child = node.children.get(ch)
+                if child is None:
+                    child = node.children[ch] = _Node()
+                node = child
+        node.patterns.append((pattern, label))
+        self.count += 1
+
+    def match(self, callsign):
+        # every (pattern, label) that matches callsign
+        states = self._closure((self.root,))
+        for ch in callsign:
+            step = []
+            for node in states:
+                child = node.children.get(ch)
+                if child is not None:
+                    step.append(child)
+                child = node.children.get('?')
+                if child is not None:
+                    step.append(child)
+                if node.loop:
+                    step.append(node)
+            if not step:
+                return []
+            states = self._closure(step)
+        return [entry for node in states for entry in node.patterns]
+
+    @staticmethod
+    def _closure(nodes):
+        # the nodes plus everything reachable through '*' (which may match nothing)
+        seen = {}
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if id(node) not in seen:
+                seen[id(node)] = node
+                if node.star is not None:
+                    stack.append(node.star)
+        return seen.values()
+
+
+class Watchlist:
+    """
+    What to alert on. Loaded from a text file, one entry per line:
+
+        icao      4CA2D1        optional label
+        callsign  BAW*          British Airways
+        squawk    7700          emergency
+
+    Blank lines and # comments are skipped. ICAOs are 6 hex digits,
+    squawks 4 octal digits, callsigns glob patterns (see CallsignTrie).
+    """
+
+    def __init__(self):
+        self.icaos = {}
+        self.squawks = {}
+        self.callsigns = CallsignTrie()
+
+    def __len__(self):
+        return len(self.icaos) + len(self.squawks) + self.callsigns.count
+
+    def add(self, kind, pattern, label=''):
+        pattern = pattern.strip().upper()
+        if kind == 'icao':
+            if not ICAO_RE.match(pattern):
+                raise ValueError(f"not an ICAO address: {pattern}")
+            self.icaos[pattern] = label
+        elif kind == 'squawk':
+            if not SQUAWK_RE.match(pattern):
+                raise ValueError(f"not a squawk: {pattern}")
+            self.squawks[pattern] = label
+        elif kind == 'callsign':
+            if not CALLSIGN_RE.match(pattern):
+                raise ValueError(f"not a callsign pattern: {pattern}")
+            self.callsigns.add(pattern, label)
+        else:
+            raise ValueError(f"unknown watchlist entry type: {kind} (one of {', '.join(KINDS)})")
+
+    @classmethod
+    def load(cls, path):
+        watchlist = cls()
+        with open(path) as f:
+            for number, line in enumerate(f, 1):
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                parts = line.split(None, 2)
+                if len(parts) < 2:
+                    raise ValueError(f"{path}:{number}: expected '<type> <pattern> [label]'")
+                try:
+                    watchlist.add(parts[0].lower(), parts[1], parts[2] if len(parts) > 2 else '')
+                except ValueError as e:
+                    raise ValueError(f"{path}:{number}: {e}") from None
+        return watchlist
+
+    def match(self, icao, callsign, squawk):
+        # [(kind, pattern, label)] for everything this aircraft hits
+        hits = []
+        label = self.icaos.get(icao)
+        if label is not None:
+            hits.append(('icao', icao, label))
+        if callsign:
+            hits.extend(('callsign', pattern, label) for pattern, label in self.callsigns.match(callsign))
+        if squawk:
+            label = self.squawks.get(squawk)
+            if label is not None:
+                hits.append(('squawk', squawk, label))
+        return hits
+
+
+class Watcher:
+    """
+    Checks aircraft against a Watchlist and sends out the alerts.
+
+    check() is called by the parser for every aircraft it updates. It
+    costs one dict lookup unless the aircraft's callsign or squawk changed
+    since it was last matched, or that was more than window seconds ago.
+    A hit on the same aircraft and entry is only reported once per window.
+
+    Alerts are queued to a thread that appends them as JSON lines to
+    log_path, sends the same JSON as a datagram to socket_addr ("host:port"
+    for UDP, anything else a unix datagram socket) and runs command with
+    the alert in WATCH_* environment variables, whichever are set. If
+    that thread can't keep up, alerts are dropped (and counted), the
+    parser never waits.
+    """
+
+    def __init__(self, adsb, watchlist, window=300.0, log_path=None, socket_addr=None,
+                 command=None, max_queue=1000):
+        self.adsb = adsb
+        self.watchlist = watchlist
+        self.window = window
+        self.log_path = log_path
+        self.socket_addr = socket_addr
+        self.command = shlex.split(command) if command else None
+
+        self.alerts = 0
+        self.suppressed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_alert = None
+        # icao -> (callsign, squawk, when it was matched)
+        self._checked = {}
+        # (icao, kind, pattern) -> time of the last alert
+        self._alerted = {}
+        self._last_prune = 0.0
+        self._queue = Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------------- parser thread side ---------------- #
+
+    def check(self, aircraft, now):
+        seen = self._checked.get(aircraft.hex)
+        if (seen is not None and seen[0] == aircraft.callsign and seen[1] == aircraft.squawk
+                and now - seen[2] < self.window):
+            return
+        self._checked[aircraft.hex] = (aircraft.callsign, aircraft.squawk, now)
+        if now - self._last_prune >= self.window:
+            self._prune(now)
+
+        for kind, pattern, label in self.watchlist.match(aircraft.hex, aircraft.callsign, aircraft.squawk):
+            key = (aircraft.hex, kind, pattern)
+            last = self._alerted.get(key)
+            if last is not None and now - last < self.window:
+                self.suppressed += 1
+                continue
+            self._alerted[key] = now
+            self._raise(aircraft, now, kind, pattern, label)
+
+    def _raise(self, aircraft, now, kind, pattern, label):
+        alert = {
+            'time': now,
+            'icao': aircraft.hex,
+            'match': kind,
+            'pattern': pattern,
+            'label': label,
+            'callsign': aircraft.callsign,
+            'squawk': aircraft.squawk,
+            'registration': aircraft.registration,
+            'aircraft_type': aircraft.aircraft_type,
+            'operator': aircraft.operator,
+            'altitude': aircraft.altitude,
+            'lat': aircraft.lat,
+            'lon': aircraft.lon,
+        }
+        self.alerts += 1
+        self.last_alert = alert
+        try:
+            self._queue.put_nowait(alert)
+        except Full:
+            self.dropped += 1
+
+    def _prune(self, now):
+        # forget aircraft and alerts older than the window, keeps both dicts bounded
+        self._last_prune = now
+        cutoff = now - self.window
+        self._checked = {icao: seen for icao, seen in self._checked.items() if seen[2] >= cutoff}
+        self._alerted = {key: ts for key, ts in self._alerted.items() if ts >= cutoff}
+
+    # ---------------- alert thread ---------------- #
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        log = sock = None
+        target = None
+        try:
+            if self.log_path:
+                log = open(self.log_path, 'a')
+            if self.socket_addr:
+                host, sep, port = self.socket_addr.rpartition(':')
+                if sep and port.isdigit():
+                    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    target = (host or '127.0.0.1', int(port))
+                else:
+                    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                    target = self.socket_addr
+        except OSError as e:
+            print(f"\nWatchlist alert output failed: {e}")
+            self.errors += 1
+
+        try:
+            while True:
+                try:
+                    alert = self._queue.get(timeout=0.5)
+                except Empty:
+                    if self._stop.is_set():
+                        return
+                    continue
+                self._deliver(alert, log, sock, target)
+        finally:
+            if log:
+                log.close()
+            if sock:
+                sock.close()
+
+    def _deliver(self, alert, log, sock, target):
+        line = json.dumps(alert)
+        if log:
+            try:
+                log.write(line + '\n')
+                log.flush()
+            except OSError:
+                self.errors += 1
+        if sock:
+            try:
+                sock.sendto(line.encode(), target)
+            except OSError:
+                self.errors += 1  # nobody listening is fine, it's a datagram
+        if self.command:
+            env = dict(os.environ)
+            env.update({'WATCH_' + name.upper(): '' if value is None else str(value)
+                        for name, value in alert.items()})
+            env['WATCH_JSON'] = line
+            try:
+                subprocess.run(self.command, env=env, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+            except (OSError, subprocess.SubprocessError):
+                self.errors += 1
+
+    def stats(self):
+        return {
+            'entries': len(self.watchlist),
+            'alerts': self.alerts,
+            'suppressed': self.suppressed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'pending': self._queue.qsize(),
+        }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="check a watchlist file / test what it matches")
+    ap.add_argument('path', help="watchlist file")
+    ap.add_argument('--icao', default='')
+    ap.add_argument('--callsign', default='')
+    ap.add_argument('--squawk', default='')
+    args = ap.parse_args(argv)
+
+    try:
+        watchlist = Watchlist.load(args.path)
+    except (OSError, ValueError) as e:
+        print(e)
+        return 1
+    print(f"{len(watchlist.icaos)} ICAOs, {watchlist.callsigns.count} callsign patterns, "
+          f"{len(watchlist.squawks)} squawks")
+    if args.icao or args.callsign or args.squawk:
+        hits = watchlist.match(args.icao.upper(), args.callsign.upper(), args.squawk)
+        for kind, pattern, label in hits:
+            print(f"  {kind:<9} {pattern:<9} {label}")
+        if not hits:
+            print("  no match")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -127,6 +127,12 @@ def check_dependencies():
         except Exception:
             print(f"[INFO] Unable to verify status of {dep}.")
 
+    try:
+        import numpy
+        print("[OK] numpy detected.")
+    except ImportError:
+        print("[INFO] numpy not installed (required for the native ADS-B IQ decoder: pip install numpy).")
+
     # ------------------------
     # Digital Voice Research Dependencies
     # ------------------------